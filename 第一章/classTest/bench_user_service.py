@@ -0,0 +1,65 @@
+"""
+用户注册性能对比 - 每次新建连接 vs 连接池长连接 vs 批量注册
+运行: python bench_user_service.py [注册数量]
+"""
+import sys
+import time
+
+from user_service import UserService
+
+
+def bench_register(use_pool, count):
+    """注册 count 个用户，返回每秒注册数"""
+    db_path = "bench_pool.db" if use_pool else "bench_no_pool.db"
+    service = UserService(db_path, use_pool=use_pool)
+    service.clear_database()
+    try:
+        start = time.perf_counter()
+        for i in range(count):
+            result = service.register_user(f"bench_user_{i}", "password123", f"u{i}@test.com")
+            assert result["success"], result["message"]
+        elapsed = time.perf_counter() - start
+    finally:
+        service.close()
+    return count / elapsed
+
+
+def bench_register_bulk(count):
+    """批量注册 count 个用户，返回每秒注册数"""
+    service = UserService("bench_bulk.db")
+    service.clear_database()
+    try:
+        rows = ((f"bench_user_{i}", "password123", f"u{i}@test.com") for i in range(count))
+        start = time.perf_counter()
+        for result in service.register_users_bulk(rows):
+            assert result["success"], result["message"]
+        elapsed = time.perf_counter() - start
+    finally:
+        service.close()
+    return count / elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print("=" * 60)
+    print("用户注册性能对比")
+    print("=" * 60)
+    print(f"注册数量: {count}")
+
+    before = bench_register(False, count)
+    print(f"\n每次新建连接: {before:,.0f} 注册/秒")
+
+    after = bench_register(True, count)
+    print(f"连接池长连接: {after:,.0f} 注册/秒")
+
+    bulk = bench_register_bulk(count)
+    print(f"批量注册:     {bulk:,.0f} 注册/秒")
+
+    print(f"\n连接池提升倍数: {after / before:.2f}x")
+    print(f"批量注册提升倍数: {bulk / before:.2f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
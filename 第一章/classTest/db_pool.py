@@ -0,0 +1,108 @@
+"""
+SQLite 连接池 - 为用户服务提供长连接复用
+每个线程持有一个长期存活的连接，避免每次调用都重新建立连接；线程结束时它的连接随之关闭
+"""
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+
+class _ThreadConnection:
+    """放在 threading.local 中的连接持有者：线程结束时 local 中的值被释放，触发 finalize 关闭连接"""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
+class ConnectionPool:
+    """按线程复用的 SQLite 连接池"""
+
+    def __init__(self, db_path, timeout=5.0, wal=True, cached_statements=256):
+        """
+        初始化连接池
+        :param db_path: 数据库文件路径
+        :param timeout: 数据库被锁定时的等待秒数
+        :param wal: 是否启用 WAL 日志模式（读写互不阻塞）
+        :param cached_statements: 每个连接缓存的预编译语句数量
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+        self.wal = wal
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}  # {连接: 线程结束时关闭它的 finalize}
+
+    def _create_connection(self):
+        """创建新连接并设置 PRAGMA"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        if self.wal:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL 模式下 NORMAL 同步级别即可保证一致性
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get_connection(self):
+        """获取当前线程的连接，不存在时创建"""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            conn = self._create_connection()
+            holder = self._local.holder = _ThreadConnection(conn)
+            # 每个请求一个线程的服务器中线程不断退出，不关闭的话文件句柄会无限增长；
+            # finalize 只引用连接池的弱引用，不会让连接池本身无法回收
+            with self._lock:
+                self._connections[conn] = weakref.finalize(holder, _release, weakref.ref(self), conn)
+        return holder.conn
+
+    @contextmanager
+    def connection(self):
+        """以上下文方式使用连接，异常时回滚未提交的事务"""
+        conn = self.get_connection()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _discard(self, conn):
+        """从登记中移除连接，返回是否移除（close_all 已关闭的连接返回 False）"""
+        with self._lock:
+            return self._connections.pop(conn, None) is not None
+
+    @property
+    def size(self):
+        """当前打开的连接数（已结束的线程的连接不计入）"""
+        with self._lock:
+            return len(self._connections)
+
+    def close_all(self):
+        """关闭所有线程的连接"""
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for conn, finalizer in connections.items():
+            finalizer.detach()
+            _close(conn)
+        # 重新创建 local，使其他线程下次调用时重新建立连接
+        self._local = threading.local()
+
+
+def _close(conn):
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def _release(pool_ref, conn):
+    """线程结束时调用：关闭该线程的连接并从连接池中移除"""
+    pool = pool_ref()
+    if pool is None or pool._discard(conn):
+        _close(conn)
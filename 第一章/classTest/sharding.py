@@ -0,0 +1,291 @@
+"""
+用户库分片 - 按用户名一致性哈希路由到多个 SQLite 文件
+- HashRing：每个分片在环上放 vnodes 个虚拟节点，增减分片时只有约 1/N 的用户需要迁移
+- migrate_rows：按 id 分批流式读取源分片，把不再属于它的行搬到新分片（先写目标再删源）
+- ShardedUserService：与 UserService 相同的公开方法，跨分片操作在线程池中并发执行，
+  reshard 迁移期间继续提供读写（查不到时回退到旧分片）
+- 用户 id 全局唯一且迁移前后不变：每个分片在自己的文件中记录 id 区间编号和下一个 id，
+  新用户从本分片区间分配，迁入的用户保留原 id
+"""
+import bisect
+import hashlib
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from user_service import UserService
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HashRing:
+    """一致性哈希环"""
+
+    def __init__(self, nodes, vnodes=100):
+        """
+        :param nodes: 分片名列表（如数据库文件路径）
+        :param vnodes: 每个分片的虚拟节点数，越多分布越均匀
+        """
+        self.nodes = list(nodes)
+        if not self.nodes:
+            raise ValueError("至少需要一个分片")
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key):
+        """key 所属的分片"""
+        i = bisect.bisect(self._points, _hash(key))
+        return self._owners[i % len(self._owners)]
+
+
+def migrate_rows(source, owner_of, connect, columns, batch_size=1000, on_moved=None, keep_ids=False):
+    """
+    把 source 分片中不再属于它的行搬到新分片
+    :param source: 源分片名
+    :param owner_of: 函数，用户名 -> 新分片名
+    :param connect: 函数，分片名 -> 产出连接的上下文管理器
+    :param columns: 需要搬运的列，第一列为 username
+    :param batch_size: 每批读取的行数
+    :param on_moved: 每批搬完后调用 on_moved(源, 目标, 用户名列表)，用于更新缓存
+    :param keep_ids: True 时连同 id 一起搬运（各分片 id 必须全局唯一），否则目标分片重新分配 id
+    :return: 搬运的行数
+    """
+    select = f"SELECT id, {', '.join(columns)} FROM users WHERE id > ? ORDER BY id LIMIT ?"
+    if keep_ids:
+        # 只忽略用户名冲突（上次迁移中途失败留下的重复行）；id 冲突说明 id 区间有误，直接报错
+        insert = (f"INSERT INTO users (id, {', '.join(columns)}) VALUES ({', '.join('?' * (len(columns) + 1))}) "
+                  "ON CONFLICT (username) DO NOTHING")
+    else:
+        insert = f"INSERT OR IGNORE INTO users ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    start = 0 if keep_ids else 1
+    last_id = 0
+    moved = 0
+    while True:
+        with connect(source) as conn:
+            rows = conn.execute(select, (last_id, batch_size)).fetchall()
+        if not rows:
+            return moved
+        last_id = rows[-1][0]
+        groups = defaultdict(list)
+        for row in rows:
+            target = owner_of(row[1])
+            if target != source:
+                groups[target].append(row[start:])
+        for target, batch in groups.items():
+            # 先提交到目标再从源删除：中途失败时行只会重复，不会丢失，重新迁移即可
+            with connect(target) as conn:
+                conn.executemany(insert, batch)
+                conn.commit()
+            usernames = [row[1 - start] for row in batch]
+            with connect(source) as conn:
+                conn.executemany("DELETE FROM users WHERE username = ?", [(name,) for name in usernames])
+                conn.commit()
+            if on_moved is not None:
+                on_moved(source, target, usernames)
+            moved += len(batch)
+
+
+class _ShardService(UserService):
+    """
+    单个分片：新用户的 id 从本分片的区间分配，而不是用 AUTOINCREMENT
+    （迁入的行带着其他区间的 id，AUTOINCREMENT 会从表中最大的 id 继续编号，与其他分片重复）
+    """
+
+    def _init_database(self):
+        super()._init_database()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS shard_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.commit()
+
+    def id_range(self):
+        """分片的 id 区间编号，尚未分配时返回 None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM shard_meta WHERE name = 'range'").fetchone()
+        return None if row is None else row[0]
+
+    def max_id(self):
+        """分片中的最大 id（包括迁入的行和此前 AUTOINCREMENT 分配过的 id）"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(value) FROM (SELECT MAX(id) AS value FROM users "
+                "UNION ALL SELECT seq FROM sqlite_sequence WHERE name = 'users')").fetchone()
+        return row[0] or 0
+
+    def assign_range(self, index, id_space):
+        """记录区间编号，下一个 id 为区间起点"""
+        with self._connect() as conn:
+            conn.executemany("INSERT OR IGNORE INTO shard_meta (name, value) VALUES (?, ?)",
+                             [("range", index), ("next_id", index * id_space + 1)])
+            conn.commit()
+
+    def _allocate(self, cursor, count):
+        """在当前事务中预留 count 个连续 id，返回第一个"""
+        cursor.execute("UPDATE shard_meta SET value = value + ? WHERE name = 'next_id' RETURNING value", (count,))
+        return cursor.fetchone()[0] - count
+
+    def _insert_user(self, cursor, row):
+        user_id = self._allocate(cursor, 1)
+        cursor.execute("INSERT INTO users (id, username, password, email) VALUES (?, ?, ?, ?)", (user_id, *row))
+        return user_id
+
+    def _insert_users(self, cursor, rows):
+        if rows:
+            first = self._allocate(cursor, len(rows))
+            cursor.executemany("INSERT INTO users (id, username, password, email) VALUES (?, ?, ?, ?)",
+                               [(first + i, *row) for i, row in enumerate(rows)])
+
+
+class ShardedUserService:
+    """分片的用户服务"""
+
+    # 第 k 个 id 区间为 [k << 32, (k + 1) << 32)，区间编号保存在分片文件中，跨分片不重复
+    ID_SPACE = 1 << 32
+
+    def __init__(self, db_paths, vnodes=100, workers=None, **options):
+        """
+        :param db_paths: 各分片的数据库文件路径
+        :param vnodes: 每个分片的虚拟节点数
+        :param workers: 跨分片操作的线程数，默认等于分片数
+        :param options: 传给每个分片 UserService 的参数（use_pool、use_cache 等）
+        """
+        self.vnodes = vnodes
+        self.options = options
+        self.shards = {}
+        self._open(db_paths)
+        self.ring = HashRing(db_paths, vnodes)
+        self._old_ring = None  # 迁移期间的旧环
+        self._executor = ThreadPoolExecutor(workers or len(db_paths))
+        self._reshard_lock = threading.Lock()
+
+    def _open(self, paths):
+        """
+        打开分片，并给还没有 id 区间的分片分配新区间
+        新区间编号大于所有已知分片的区间编号和其中已用过的 id（包括从已移出的分片迁入的 id），
+        所以其他实例新建过的分片只要在列表中，就不会再分到同一区间
+        """
+        for path in paths:
+            if path not in self.shards:
+                self.shards[path] = _ShardService(path, **self.options)
+        ranges = {path: service.id_range() for path, service in self.shards.items()}
+        used = [index for index in ranges.values() if index is not None]
+        used += [max_id // self.ID_SPACE for max_id in (service.max_id() for service in self.shards.values()) if max_id]
+        next_range = max(used) + 1 if used else 0
+        for path in paths:
+            if ranges[path] is None:
+                self.shards[path].assign_range(next_range, self.ID_SPACE)
+                next_range += 1
+
+    def _shard(self, username):
+        return self.shards[self.ring.node_for(username)]
+
+    def _old_shard(self, username):
+        """迁移期间用户名原来所在的分片（与新分片相同时返回 None）"""
+        old_ring = self._old_ring
+        if old_ring is None:
+            return None
+        old = old_ring.node_for(username)
+        return None if old == self.ring.node_for(username) else self.shards[old]
+
+    def _fan_out(self, fn, services=None):
+        """在线程池中对每个分片执行 fn，按分片顺序返回结果"""
+        return list(self._executor.map(fn, list(self.shards.values()) if services is None else services))
+
+    def register_user(self, username, password, email=None):
+        """注册用户（参数与返回值同 UserService.register_user）"""
+        error = UserService._validate(username, password)
+        if error:
+            return {"success": False, "message": error}
+        old = self._old_shard(username)
+        if old is not None and old.get_user_by_username(username) is not None:
+            return {"success": False, "message": "用户名已存在"}
+        return self._shard(username).register_user(username, password, email)
+
+    def register_users_bulk(self, users, chunk_size=500):
+        """批量注册：每批按分片拆开并发写入，按输入顺序产出结果"""
+        yield from UserService._in_chunks(users, chunk_size, lambda rows: self._register_chunk(rows, chunk_size))
+
+    def _register_chunk(self, chunk, chunk_size):
+        results = [None] * len(chunk)
+        groups = defaultdict(list)  # {分片: [(位置, 行)]}
+        for i, row in enumerate(chunk):
+            username, password, _ = row
+            error = UserService._validate(username, password)
+            old = None if error else self._old_shard(username)
+            if old is not None and old.get_user_by_username(username) is not None:
+                error = "用户名已存在"
+            if error:
+                results[i] = {"success": False, "message": error, "username": username}
+            else:
+                groups[self._shard(username)].append((i, row))
+
+        def run(service):
+            rows = groups[service]
+            return list(service.register_users_bulk([row for _, row in rows], chunk_size))
+
+        services = list(groups)
+        for service, shard_results in zip(services, self._fan_out(run, services)):
+            for (i, _), result in zip(groups[service], shard_results):
+                results[i] = result
+        yield from results
+
+    def get_user_by_username(self, username):
+        """根据用户名查询用户"""
+        user = self._shard(username).get_user_by_username(username)
+        if user is None:
+            old = self._old_shard(username)
+            if old is not None:
+                return old.get_user_by_username(username)
+        return user
+
+    def count_users(self):
+        """所有分片的用户总数"""
+        return sum(self._fan_out(UserService.count_users))
+
+    def clear_database(self):
+        """清空所有分片"""
+        self._fan_out(UserService.clear_database)
+
+    def reshard(self, db_paths, batch_size=1000):
+        """
+        在线重新分片：切换到新的分片列表，并把用户流式迁移到新的所属分片
+        迁移期间新写入进入新分片，查询在新分片查不到时回退到旧分片
+        :return: 迁移的用户数
+        """
+        with self._reshard_lock:
+            self._open(db_paths)
+            sources = list(self.ring.nodes)
+            self._old_ring, self.ring = self.ring, HashRing(db_paths, self.vnodes)
+
+            def moved(source, target, usernames):
+                # 清除两边缓存中该用户名的旧条目（源分片的记录已删除，目标分片可能缓存了“不存在”）
+                for cache in (self.shards[source].cache, self.shards[target].cache):
+                    if cache is not None:
+                        for username in usernames:
+                            cache.record_insert(username)
+
+            def connect(path):
+                return self.shards[path]._connect()
+
+            try:
+                counts = self._fan_out(
+                    lambda path: migrate_rows(path, self.ring.node_for, connect,
+                                              ("username", "password", "email"), batch_size, moved,
+                                              keep_ids=True),
+                    sources)
+            finally:
+                self._old_ring = None
+            # 移出的分片已经清空，只关闭连接，不删除文件
+            for path in list(self.shards):
+                if path not in self.ring.nodes:
+                    service = self.shards.pop(path)
+                    if service.pool is not None:
+                        service.pool.close_all()
+            return sum(counts)
+
+    def close(self):
+        """关闭并删除所有分片的数据库"""
+        self._fan_out(UserService.close)
+        self._executor.shutdown()
@@ -0,0 +1,102 @@
+"""
+测试批量注册接口 register_users_bulk
+测试点：
+1. 按输入顺序逐条返回结果，验证规则与 register_user 一致
+2. 批次内重复、与数据库已有数据重复都能识别
+3. 输入为生成器时按批流式处理
+4. 格式错误的行单独返回失败，不中断后续数据，也不丢弃已收集的批次
+"""
+from user_service import UserService
+
+
+def test_bulk_register_results_in_order(tmp_path):
+    """批量注册结果与输入顺序一一对应"""
+    service = UserService(str(tmp_path / "bulk.db"))
+    service.register_user("existing", "password123")
+
+    rows = [
+        ("alice", "password123", "alice@test.com"),
+        {"username": "bob", "password": "password456"},
+        ("ab", "password123"),           # 用户名太短
+        ("carol", "12345"),              # 密码太短
+        ("", "password123"),             # 用户名为空
+        ("existing", "password123"),     # 数据库中已存在
+        ("alice", "password789"),        # 批次内重复
+    ]
+    results = list(service.register_users_bulk(rows, chunk_size=3))
+
+    assert [r["username"] for r in results] == ["alice", "bob", "ab", "carol", "", "existing", "alice"]
+    assert [r["success"] for r in results] == [True, True, False, False, False, False, False]
+    assert "长度" in results[2]["message"]
+    assert "密码" in results[3]["message"]
+    assert "不能为空" in results[4]["message"]
+    assert results[5]["message"] == "用户名已存在"
+    assert results[6]["message"] == "用户名已存在"
+
+    alice = service.get_user_by_username("alice")
+    assert alice["id"] == results[0]["user_id"]
+    assert alice["email"] == "alice@test.com"
+    assert service.get_user_by_username("bob")["id"] == results[1]["user_id"]
+    service.close()
+
+
+def test_bulk_register_streams_generator(tmp_path):
+    """生成器输入按批处理，不需要一次性读入全部数据"""
+    service = UserService(str(tmp_path / "stream.db"), use_pool=False)
+    consumed = []
+
+    def rows():
+        for i in range(25):
+            consumed.append(i)
+            yield (f"stream_user{i}", "password123")
+
+    results = service.register_users_bulk(rows(), chunk_size=10)
+    first = next(results)
+    assert first["success"] == True
+    assert len(consumed) == 10  # 只读取了第一批
+
+    rest = list(results)
+    assert len(rest) == 24 and all(r["success"] for r in rest)
+    assert service.get_user_by_username("stream_user24") is not None
+    service.close()
+
+
+def test_bulk_register_malformed_rows(tmp_path):
+    """格式错误的行（单元素元组、字符串、None）返回失败结果，前后的行照常注册"""
+    service = UserService(str(tmp_path / "malformed.db"))
+    rows = [("user_a", "password123"), ("user_b",), "user_c", None,
+            ("user_d", "password123"), ("user_e", "password123")]
+    results = list(service.register_users_bulk(rows, chunk_size=10))
+
+    assert [r["success"] for r in results] == [True, False, False, False, True, True]
+    assert [r["username"] for r in results] == ["user_a", "user_b", None, None, "user_d", "user_e"]
+    assert all("格式错误" in r["message"] for r in results[1:4])
+    assert service.count_users() == 3
+    service.close()
+
+
+def test_bulk_register_bad_rows_keep_chunking(tmp_path):
+    """错误行不单独成批：错误行与正常行交替时事务数仍约为 正常行数 / chunk_size；非字符串字段按格式错误报告"""
+    service = UserService(str(tmp_path / "chunks.db"))
+    calls = []
+    register_chunk = service._register_chunk
+    service._register_chunk = lambda rows: calls.append(len(rows)) or register_chunk(rows)
+
+    rows = []
+    for i in range(400):
+        rows.append((f"good_user{i}", "password123"))
+        rows.append((i, "password123") if i % 2 else ("bad",))
+    results = list(service.register_users_bulk(rows, chunk_size=100))
+
+    assert len(results) == 800
+    assert [r["username"] for r in results[:4]] == ["good_user0", "bad", "good_user1", 1]
+    assert all(r["success"] for r in results[::2])
+    assert all(not r["success"] and "格式错误" in r["message"] for r in results[1::2])
+    assert calls == [100] * 4
+    assert service.count_users() == 400
+
+    results = list(service.register_users_bulk([{"username": 7, "password": "password123"}, ("x_user", b"pw123456"),
+                                                ("late_user", "password123")]))
+    assert [r["success"] for r in results] == [False, False, True]
+    assert results[0]["username"] == 7
+    service.close()
@@ -0,0 +1,99 @@
+"""
+测试连接池模式下的用户服务
+测试点：
+1. 同一线程复用同一个连接，不同线程各自持有连接，线程结束后连接关闭
+2. 连接池模式启用 WAL 日志
+3. 关闭连接池（use_pool=False）时注册流程保持不变
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from db_pool import ConnectionPool
+from user_service import UserService
+
+
+def test_pool_reuses_connection_per_thread(tmp_path):
+    """同一线程复用连接，其他线程获得独立连接"""
+    pool = ConnectionPool(str(tmp_path / "pool.db"))
+    assert pool.get_connection() is pool.get_connection()
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(pool.get_connection()) or other.append(pool.size))
+    t.start()
+    t.join()
+    assert other[0] is not pool.get_connection()
+    assert other[1] == 2
+
+    pool.close_all()
+    assert pool.size == 0
+
+
+def test_pool_closes_connections_of_finished_threads(tmp_path):
+    """每个请求一个线程时，线程结束后它的连接被关闭，连接数不随线程数增长"""
+    pool = ConnectionPool(str(tmp_path / "threads.db"))
+    pool.get_connection().execute("CREATE TABLE t (x)")
+    connections = []
+
+    def request(i):
+        conn = pool.get_connection()
+        conn.execute("INSERT INTO t VALUES (?)", (i,))
+        conn.commit()
+        connections.append(conn)
+
+    for i in range(200):
+        t = threading.Thread(target=request, args=(i,))
+        t.start()
+        t.join()
+    assert pool.size == 1
+    assert pool.get_connection().execute("SELECT COUNT(*) FROM t").fetchone()[0] == 200
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[0].execute("SELECT 1")
+    pool.close_all()
+
+
+def test_pool_enables_wal(tmp_path):
+    """连接池默认启用 WAL 日志模式"""
+    pool = ConnectionPool(str(tmp_path / "wal.db"))
+    mode = pool.get_connection().execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+    pool.close_all()
+
+
+def test_register_with_and_without_pool(tmp_path):
+    """连接池与非连接池模式的注册结果一致"""
+    for use_pool in (True, False):
+        service = UserService(str(tmp_path / f"users_{use_pool}.db"), use_pool=use_pool)
+        assert (service.pool is not None) == use_pool
+
+        result = service.register_user("pooluser", "password123", "pool@test.com")
+        assert result["success"] == True
+        assert service.register_user("pooluser", "password123")["message"] == "用户名已存在"
+        assert service.get_user_by_username("pooluser")["email"] == "pool@test.com"
+
+        service.clear_database()
+        assert service.get_user_by_username("pooluser") is None
+        service.close()
+
+
+def test_register_from_multiple_threads(tmp_path):
+    """多线程并发注册，每个用户都能写入"""
+    service = UserService(str(tmp_path / "threads.db"))
+    errors = []
+
+    def worker(n):
+        for i in range(20):
+            result = service.register_user(f"t{n}_user{i}", "password123")
+            if not result["success"]:
+                errors.append(result["message"])
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert service.get_user_by_username("t3_user19") is not None
+    service.close()
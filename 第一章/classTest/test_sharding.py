@@ -0,0 +1,118 @@
+"""
+测试分片的用户服务
+测试点：
+1. 一致性哈希：分布均匀，增加分片时只迁移少量用户
+2. 注册 / 查询 / 批量注册的结果与单库 UserService 一致，id 跨分片不重复
+3. 在线重新分片后所有用户仍可查询，迁移期间可以继续注册
+4. 换一个实例再扩容时新分片的 id 区间不重复，迁移前后用户 id 不变
+"""
+import threading
+
+from sharding import HashRing, ShardedUserService
+
+
+def paths(tmp_path, *names):
+    return [str(tmp_path / f"{name}.db") for name in names]
+
+
+def test_hash_ring_balance_and_stability():
+    """分片负载均匀；从 4 个分片增加到 5 个时约 1/5 的键改变归属"""
+    keys = [f"user{i}" for i in range(20000)]
+    ring = HashRing(["a", "b", "c", "d"])
+    counts = {}
+    for key in keys:
+        counts[ring.node_for(key)] = counts.get(ring.node_for(key), 0) + 1
+    assert min(counts.values()) > 20000 / 4 * 0.8
+
+    bigger = HashRing(["a", "b", "c", "d", "e"])
+    changed = [key for key in keys if ring.node_for(key) != bigger.node_for(key)]
+    assert 0.12 < len(changed) / len(keys) < 0.28
+    assert all(bigger.node_for(key) == "e" for key in changed)
+
+
+def test_register_and_query(tmp_path):
+    """单条注册、重复注册、批量注册与查询"""
+    service = ShardedUserService(paths(tmp_path, "s0", "s1", "s2"))
+    try:
+        first = service.register_user("alice", "password123", "a@test.com")
+        assert first["success"]
+        assert service.register_user("alice", "password123")["message"] == "用户名已存在"
+        assert service.register_user("ab", "password123")["message"] == "用户名长度至少3个字符"
+
+        rows = [(f"bulk{i}", "password123") for i in range(300)] + [("alice", "password123"), ("bulk5", "password123")]
+        results = list(service.register_users_bulk(rows, chunk_size=100))
+        assert [r["username"] for r in results] == [row[0] for row in rows]
+        assert sum(r["success"] for r in results) == 300
+        assert results[-1]["message"] == results[-2]["message"] == "用户名已存在"
+
+        ids = {r["user_id"] for r in results if r["success"]} | {first["user_id"]}
+        assert len(ids) == 301
+        assert service.count_users() == 301
+        assert service.get_user_by_username("bulk42")["username"] == "bulk42"
+        assert service.get_user_by_username("nobody") is None
+        assert all(s.count_users() > 50 for s in service.shards.values())
+
+        service.clear_database()
+        assert service.count_users() == 0
+    finally:
+        service.close()
+
+
+def test_online_reshard(tmp_path):
+    """增加分片并迁移：迁移期间继续注册，迁移后所有用户在新归属分片中"""
+    old_paths = paths(tmp_path, "s0", "s1")
+    service = ShardedUserService(old_paths, use_cache=True)
+    try:
+        list(service.register_users_bulk((f"user{i}", "password123") for i in range(2000)))
+        for i in range(2000):
+            service.get_user_by_username(f"user{i}")  # 预热缓存
+
+        new_paths = old_paths + paths(tmp_path, "s2")
+        during = []
+        writer = threading.Thread(target=lambda: during.extend(
+            service.register_user(f"late{i}", "password123")["success"] for i in range(200)))
+        writer.start()
+        moved = service.reshard(new_paths, batch_size=100)
+        writer.join()
+
+        assert 400 < moved < 1000
+        assert all(during)
+        assert service.count_users() == 2200
+        for name in [f"user{i}" for i in range(2000)] + [f"late{i}" for i in range(200)]:
+            assert service.get_user_by_username(name)["username"] == name
+            assert service.register_user(name, "password123")["success"] is False
+
+        # 缩容：移出的分片中的用户全部迁回
+        assert service.reshard(new_paths[1:]) > 0
+        assert set(service.shards) == set(new_paths[1:])
+        assert service.count_users() == 2200
+    finally:
+        service.close()
+
+
+def test_ids_unique_across_instances_and_stable(tmp_path):
+    """两个实例先后扩容：新分片的 id 区间不与其他实例新建的分片重复；迁移不改变用户 id"""
+    a, b, c, d = paths(tmp_path, "a", "b", "c", "d")
+    first = ShardedUserService([a, b])
+    list(first.register_users_bulk((f"user{i}", "password123") for i in range(500)))
+    ids = {f"user{i}": first.get_user_by_username(f"user{i}")["id"] for i in range(500)}
+    first.reshard([a, b, c])
+    list(first.register_users_bulk((f"late{i}", "password123") for i in range(500)))
+
+    second = ShardedUserService([a, c])
+    second.reshard([a, c, d])
+    list(second.register_users_bulk((f"more{i}", "password123") for i in range(500)))
+    second.register_user("single", "password123")
+
+    all_ids = []
+    for service in second.shards.values():
+        with service._connect() as conn:
+            all_ids += [row[0] for row in conn.execute("SELECT id FROM users")]
+    with first.shards[b]._connect() as conn:
+        all_ids += [row[0] for row in conn.execute("SELECT id FROM users")]
+    assert len(all_ids) == len(set(all_ids)) == 1501
+    for name, user_id in ids.items():
+        user = second.get_user_by_username(name) or first.shards[b].get_user_by_username(name)
+        assert user["id"] == user_id
+    second.close()
+    first.close()
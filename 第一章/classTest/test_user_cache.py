@@ -0,0 +1,90 @@
+"""
+测试用户名缓存
+测试点：
+1. LRU 容量与 TTL 过期
+2. 布隆过滤器负向缓存：新用户名无需查询数据库
+3. 注册和清空数据库时缓存失效
+4. 默认不启用缓存，多个实例共用数据库时结果正确
+"""
+from user_cache import BloomFilter, UserCache
+from user_service import UserService
+
+
+def test_bloom_filter_no_false_negative():
+    """布隆过滤器不会漏判已加入的元素"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"user{i}")
+    assert all(f"user{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other{i}" in bloom for i in range(1000))
+    assert false_positives < 50
+    bloom.clear()
+    assert "user1" not in bloom
+
+
+def test_lru_eviction_and_ttl():
+    """超过容量淘汰最久未使用的条目，过期条目视为未命中"""
+    now = [0.0]
+    cache = UserCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.load_usernames(["a", "b", "c"])
+    cache.put("a", {"id": 1})
+    cache.put("b", {"id": 2})
+    assert cache.get("a") == (True, {"id": 1})
+    cache.put("c", {"id": 3})  # 淘汰最久未使用的 b
+    assert cache.get("b") == (False, None)
+    assert cache.stats()["evictions"] == 1
+
+    now[0] = 11
+    assert cache.get("a") == (False, None)
+
+
+def test_service_cache_counters(tmp_path):
+    """查询命中缓存，注册和清空时缓存失效"""
+    service = UserService(str(tmp_path / "cache.db"), use_cache=True)
+
+    # 新用户名由布隆过滤器直接判定不存在
+    assert service.get_user_by_username("newbie") is None
+    assert service.cache.stats()["negative_hits"] == 1
+
+    assert service.register_user("newbie", "password123")["success"] == True
+    assert service.get_user_by_username("newbie")["username"] == "newbie"  # 未命中，查库
+    assert service.get_user_by_username("newbie")["username"] == "newbie"  # 命中
+    stats = service.cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 1
+
+    # 重复注册由缓存直接拒绝
+    assert service.register_user("newbie", "password123")["message"] == "用户名已存在"
+
+    service.clear_database()
+    assert service.get_user_by_username("newbie") is None
+    assert service.register_user("newbie", "password123")["success"] == True
+    service.close()
+
+
+def test_cache_loaded_from_existing_database(tmp_path):
+    """重新打开数据库时布隆过滤器包含已有用户名"""
+    db_path = str(tmp_path / "reopen.db")
+    first = UserService(db_path, use_cache=True)
+    first.register_user("olduser", "password123")
+    first.pool.close_all()
+
+    second = UserService(db_path, use_cache=True)
+    assert second.register_user("olduser", "password123")["message"] == "用户名已存在"
+    assert second.get_user_by_username("olduser") is not None
+    second.close()
+
+
+def test_cache_disabled_by_default_for_shared_database(tmp_path):
+    """默认不启用缓存：两个实例共用一个数据库时都能看到对方的写入和清空"""
+    db_path = str(tmp_path / "shared.db")
+    a, b = UserService(db_path), UserService(db_path)
+    assert a.cache is None and b.cache is None
+    assert b.get_user_by_username("alice") is None
+    assert a.register_user("alice", "password123")["success"]
+    assert b.get_user_by_username("alice")["username"] == "alice"
+    assert b.register_user("alice", "password123")["message"] == "用户名已存在"
+    b.clear_database()
+    assert a.get_user_by_username("alice") is None
+    assert a.register_user("alice", "password123")["success"]
+    a.pool.close_all()
+    b.close()
@@ -0,0 +1,138 @@
+"""
+用户名缓存 - 减少注册查重和用户查询时的磁盘访问
+包含：LRU + TTL 正向缓存（用户名 -> 用户记录） + 布隆过滤器负向缓存（用户名一定不存在）
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class BloomFilter:
+    """布隆过滤器：判断“一定不存在”，不支持删除"""
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        """
+        :param capacity: 预计元素数量
+        :param error_rate: 期望误判率（元素超过capacity后误判率会升高，但结果仍然正确）
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        """双重哈希计算 k 个比特位"""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        """加入元素"""
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        """返回False表示一定不存在，True表示可能存在"""
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def clear(self):
+        """清空过滤器"""
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+
+class UserCache:
+    """用户名缓存：有界LRU + TTL，配合布隆过滤器做负向缓存"""
+
+    def __init__(self, maxsize=10000, ttl=300, bloom_capacity=100000,
+                 error_rate=0.01, clock=time.monotonic):
+        """
+        :param maxsize: LRU 最多缓存的用户名数量
+        :param ttl: 缓存条目存活秒数
+        :param bloom_capacity: 布隆过滤器预计容纳的用户名数量
+        :param error_rate: 布隆过滤器误判率
+        :param clock: 时间函数（便于测试）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.bloom = BloomFilter(bloom_capacity, error_rate)
+        self._entries = OrderedDict()  # {username: (expire, row)}，row为None表示不存在
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    def load_usernames(self, usernames):
+        """用数据库中已有的用户名初始化布隆过滤器"""
+        with self._lock:
+            for username in usernames:
+                self.bloom.add(username)
+
+    def get(self, username):
+        """
+        查询缓存
+        :return: (hit, row) - hit为False表示需要查询数据库；hit为True且row为None表示用户一定不存在
+        """
+        with self._lock:
+            if username not in self.bloom:
+                self.negative_hits += 1
+                return True, None
+            entry = self._entries.get(username)
+            if entry is not None:
+                expire, row = entry
+                if expire > self.clock():
+                    self._entries.move_to_end(username)
+                    self.hits += 1
+                    return True, dict(row) if row else None
+                del self._entries[username]
+            self.misses += 1
+            return False, None
+
+    def might_exist(self, username):
+        """布隆过滤器判断用户名是否可能存在（不计入命中统计）"""
+        with self._lock:
+            return username in self.bloom
+
+    def put(self, username, row):
+        """缓存数据库查询结果，row为None表示用户不存在"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[username] = (self.clock() + self.ttl, dict(row) if row else None)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_insert(self, username):
+        """新用户写入后：使旧条目失效并加入布隆过滤器"""
+        with self._lock:
+            self._entries.pop(username, None)
+            self.bloom.add(username)
+
+    def clear(self):
+        """清空所有缓存（数据库清空时调用）"""
+        with self._lock:
+            self._entries.clear()
+            self.bloom.clear()
+
+    def stats(self):
+        """返回命中统计，用于评估缓存容量"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.negative_hits
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "negative_hits": self.negative_hits,
+                "evictions": self.evictions,
+                "bloom_items": self.bloom.count,
+                "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0
+            }
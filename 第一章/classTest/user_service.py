@@ -3,30 +3,71 @@
 """
 import sqlite3
 import os
+from contextlib import contextmanager
+
+from db_pool import ConnectionPool
+from user_cache import UserCache
 
 
 class UserService:
     """用户服务类"""
     
-    def __init__(self, db_path="users.db"):
-        """初始化用户服务"""
+    def __init__(self, db_path="users.db", use_pool=True, use_cache=False,
+                 cache_size=10000, cache_ttl=300):
+        """
+        初始化用户服务
+        :param db_path: 数据库文件路径
+        :param use_pool: 是否使用连接池（False 时每次调用新建连接）
+        :param use_cache: 是否启用用户名缓存；只有本实例是该数据库唯一的写入方时才能开启，
+                          否则其他实例（或进程）写入、删除的用户名会被缓存误判
+        :param cache_size: 用户名缓存最大条目数
+        :param cache_ttl: 缓存条目存活秒数
+        """
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path) if use_pool else None
+        self.cache = UserCache(cache_size, cache_ttl) if use_cache else None
         self._init_database()
     
+    @contextmanager
+    def _connect(self):
+        """获取数据库连接：连接池模式复用长连接，否则用完即关"""
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+        conn = sqlite3.connect(self.db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
     def _init_database(self):
         """初始化数据库"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                email TEXT
-            )
-        ''')
-        conn.commit()
-        conn.close()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL,
+                    email TEXT
+                )
+            ''')
+            conn.commit()
+            if self.cache is not None:
+                cursor.execute("SELECT username FROM users")
+                self.cache.load_usernames(name for (name,) in cursor)
+    
+    @staticmethod
+    def _validate(username, password):
+        """校验注册数据，返回错误信息，通过时返回None"""
+        if not username or not password:
+            return "用户名和密码不能为空"
+        if len(username) < 3:
+            return "用户名长度至少3个字符"
+        if len(password) < 6:
+            return "密码长度至少6个字符"
+        return None
     
     def register_user(self, username, password, email=None):
         """
@@ -37,83 +78,259 @@ class UserService:
         :return: dict - 包含success和message的字典
         """
         # 数据验证
-        if not username or not password:
+        error = self._validate(username, password)
+        if error:
             return {
                 "success": False,
-                "message": "用户名和密码不能为空"
+                "message": error
             }
         
-        if len(username) < 3:
-            return {
-                "success": False,
-                "message": "用户名长度至少3个字符"
-            }
-        
-        if len(password) < 6:
+        # 缓存命中时无需查询数据库
+        hit, cached = self.cache.get(username) if self.cache is not None else (False, None)
+        if hit and cached:
             return {
                 "success": False,
-                "message": "密码长度至少6个字符"
+                "message": "用户名已存在"
             }
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 检查用户名是否已存在
-            cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-            if cursor.fetchone():
-                conn.close()
-                return {
-                    "success": False,
-                    "message": "用户名已存在"
-                }
-            
-            # 插入新用户
-            cursor.execute(
-                "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
-                (username, password, email)
-            )
-            conn.commit()
-            user_id = cursor.lastrowid
-            conn.close()
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                
+                # 检查用户名是否已存在
+                if not hit:
+                    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+                    if cursor.fetchone():
+                        return {
+                            "success": False,
+                            "message": "用户名已存在"
+                        }
+                
+                # 插入新用户
+                user_id = self._insert_user(cursor, (username, password, email))
+                conn.commit()
             
+            if self.cache is not None:
+                self.cache.record_insert(username)
             return {
                 "success": True,
                 "message": "注册成功",
                 "user_id": user_id
             }
             
+        except sqlite3.IntegrityError:
+            # 缓存判断为不存在但其他连接已写入，由唯一约束兜底
+            return {
+                "success": False,
+                "message": "用户名已存在"
+            }
         except Exception as e:
             return {
                 "success": False,
                 "message": f"注册失败: {str(e)}"
             }
     
+    def register_users_bulk(self, users, chunk_size=500):
+        """
+        批量注册用户（流式处理，适合导入大批量CSV数据）
+        :param users: 可迭代对象，元素为 (username, password[, email]) 或含对应键的字典
+        :param chunk_size: 每个事务处理的用户数
+        :return: 生成器，按输入顺序逐条产出与 register_user 相同格式的结果（附带username）
+        """
+        yield from self._in_chunks(users, chunk_size, self._register_chunk)
+    
+    @staticmethod
+    def _in_chunks(users, chunk_size, register):
+        """
+        每收集 chunk_size 个格式正确的行调用一次 register(rows)，按输入顺序产出结果
+        格式错误的行不打断当前批次：结果留在原位置，随这一批一起产出（前面没有待处理的行时直接产出）
+        """
+        pending = []  # 规范化后的行（元组）或格式错误行的结果（字典）
+        count = 0
+        for row in users:
+            try:
+                item = UserService._normalize_row(row)
+            except ValueError as e:
+                item = UserService._malformed_result(row, e)
+                if not count:
+                    yield item
+                    continue
+            else:
+                count += 1
+            pending.append(item)
+            # 夹在批次中的错误行也计入上限，避免大量错误行堆在内存中
+            if count >= chunk_size or len(pending) >= 2 * chunk_size:
+                yield from UserService._flush(pending, register)
+                pending, count = [], 0
+        if pending:
+            yield from UserService._flush(pending, register)
+    
+    @staticmethod
+    def _flush(pending, register):
+        """注册 pending 中的行，并把结果与格式错误行的结果按原顺序合并"""
+        results = iter(register([item for item in pending if type(item) is tuple]))
+        for item in pending:
+            yield next(results) if type(item) is tuple else item
+    
+    @staticmethod
+    def _normalize_row(row):
+        """把一行输入统一为 (username, password, email)，格式或类型不对时抛出 ValueError"""
+        if isinstance(row, dict):
+            fields = row.get("username"), row.get("password"), row.get("email")
+        elif isinstance(row, (str, bytes)):
+            raise ValueError("数据格式错误: 每行应为 (username, password[, email])")
+        else:
+            try:
+                username, password, *rest = row
+            except (TypeError, ValueError):
+                raise ValueError("数据格式错误: 每行应为 (username, password[, email])") from None
+            fields = username, password, rest[0] if rest else None
+        # 缺失的字段（None）交给 _validate 报告；其他非字符串值在这里拒绝，不让 len() 中断整个生成器
+        if any(value is not None and not isinstance(value, str) for value in fields):
+            raise ValueError("数据格式错误: 用户名、密码和邮箱必须是字符串")
+        return fields
+    
+    @staticmethod
+    def _malformed_result(row, error):
+        """格式错误的行对应的结果，能取到用户名时一并返回"""
+        username = None
+        if isinstance(row, dict):
+            username = row.get("username")
+        elif isinstance(row, (tuple, list)) and row:
+            username = row[0]
+        return {"success": False, "message": str(error), "username": username}
+    
+    def _register_chunk(self, chunk):
+        """在单个事务内注册一批用户"""
+        # 第一遍：数据验证
+        errors = [self._validate(username, password) for username, password, _ in chunk]
+        
+        # 第二遍：批次内重复的用户名，只保留第一次出现
+        seen = set()
+        for i, (username, _, _) in enumerate(chunk):
+            if errors[i] is None:
+                if username in seen:
+                    errors[i] = "用户名已存在"
+                seen.add(username)
+        
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                # 立即获取写锁，保证“查重 + 插入”之间不会被其他写入打断
+                cursor.execute("BEGIN IMMEDIATE")
+                
+                # 第三遍：一次集合查询找出数据库中已存在的用户名
+                candidates = seen
+                if self.cache is not None:
+                    candidates = [name for name in seen if self.cache.might_exist(name)]
+                existing = self._existing_usernames(cursor, candidates)
+                for i, (username, _, _) in enumerate(chunk):
+                    if errors[i] is None and username in existing:
+                        errors[i] = "用户名已存在"
+                
+                rows = [row for row, error in zip(chunk, errors) if error is None]
+                self._insert_users(cursor, rows)
+                user_ids = self._user_ids(cursor, [row[0] for row in rows])
+                conn.commit()
+            if self.cache is not None:
+                for username, _, _ in rows:
+                    self.cache.record_insert(username)
+        except Exception as e:
+            for username, _, _ in chunk:
+                yield {
+                    "success": False,
+                    "message": f"注册失败: {str(e)}",
+                    "username": username
+                }
+            return
+        
+        for (username, _, _), error in zip(chunk, errors):
+            if error:
+                yield {"success": False, "message": error, "username": username}
+            else:
+                yield {
+                    "success": True,
+                    "message": "注册成功",
+                    "user_id": user_ids[username],
+                    "username": username
+                }
+    
+    def _insert_user(self, cursor, row):
+        """插入一行 (username, password, email)，返回新用户的 id"""
+        cursor.execute("INSERT INTO users (username, password, email) VALUES (?, ?, ?)", row)
+        return cursor.lastrowid
+    
+    def _insert_users(self, cursor, rows):
+        """批量插入 (username, password, email)"""
+        cursor.executemany("INSERT INTO users (username, password, email) VALUES (?, ?, ?)", rows)
+    
+    @staticmethod
+    def _batched(values, size=500):
+        """按 SQLite 参数个数上限拆分 IN 查询"""
+        values = list(values)
+        for start in range(0, len(values), size):
+            yield values[start:start + size]
+    
+    def _existing_usernames(self, cursor, usernames):
+        """返回 usernames 中已在数据库里的用户名集合"""
+        existing = set()
+        for batch in self._batched(usernames):
+            placeholders = ",".join("?" * len(batch))
+            cursor.execute(f"SELECT username FROM users WHERE username IN ({placeholders})", batch)
+            existing.update(name for (name,) in cursor.fetchall())
+        return existing
+    
+    def _user_ids(self, cursor, usernames):
+        """返回 {username: id}"""
+        ids = {}
+        for batch in self._batched(usernames):
+            placeholders = ",".join("?" * len(batch))
+            cursor.execute(f"SELECT username, id FROM users WHERE username IN ({placeholders})", batch)
+            ids.update(cursor.fetchall())
+        return ids
+    
     def get_user_by_username(self, username):
         """根据用户名查询用户"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, username, email FROM users WHERE username = ?", (username,))
-        user = cursor.fetchone()
-        conn.close()
+        if self.cache is not None:
+            hit, cached = self.cache.get(username)
+            if hit:
+                return cached
         
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, username, email FROM users WHERE username = ?", (username,))
+            user = cursor.fetchone()
+        
+        result = None
         if user:
-            return {
+            result = {
                 "id": user[0],
                 "username": user[1],
                 "email": user[2]
             }
-        return None
+        if self.cache is not None:
+            self.cache.put(username, result)
+        return result
+    
+    def count_users(self):
+        """用户总数"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
     
     def clear_database(self):
         """清空数据库（用于测试）"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM users")
-        conn.commit()
-        conn.close()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM users")
+            conn.commit()
+        if self.cache is not None:
+            self.cache.clear()
     
     def close(self):
         """关闭并删除测试数据库"""
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
+        if self.pool is not None:
+            self.pool.close_all()
+        # WAL 模式会额外生成 -wal / -shm 文件
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,227 @@
+"""
+批量校验 - 一次校验整列年龄 / 密码，供导入百万条记录时使用
+- validate_ages：与 age_validator.validate_age 相同的规则，在 NumPy 数组上整列比较
+- validate_passwords：与 test01.isValidPassword 相同的规则，把所有密码拼成一个码点缓冲区，
+  给每个字符标上类别位后用 bitwise_or.reduceat 按行归约；Arrow 风格的 (offsets, data) 缓冲区用 validate_password_buffer
+- 两个函数都返回 (是否有效的布尔数组, 错误码数组)，形状与输入相同，错误码为 0 表示通过了类型等前置检查
+- 含非 ASCII 字符的密码逐条按 str.isdigit / str.isalpha 判断，保证与逐条校验的结果一致
+"""
+import numpy as np
+
+# 年龄错误码
+AGE_OK = 0
+AGE_NOT_NUMBER = 1
+AGE_NEGATIVE = 2
+AGE_FRACTION = 3
+AGE_NOT_FINITE = 4  # nan / inf：validate_age 对它们会抛出异常
+
+AGE_MESSAGES = {
+    AGE_NOT_NUMBER: "错误：非数字类型",
+    AGE_NEGATIVE: "错误：负数",
+    AGE_FRACTION: "错误：浮点数",
+    AGE_NOT_FINITE: "错误：非有限数",
+}
+
+# 密码错误码
+PW_OK = 0
+PW_TOO_SHORT = 1
+PW_TOO_LONG = 2
+PW_NO_DIGIT = 3
+PW_NO_ALPHA = 4
+PW_NOT_STRING = 5  # isValidPassword 对非字符串会抛出异常
+
+
+def validate_ages(ages):
+    """
+    批量验证年龄
+    :param ages: 数值型 NumPy 数组（整数 / 浮点 / 布尔），或任意 Python 对象的序列
+    :return: (valid, codes) - valid 为布尔数组，codes 为 uint8 错误码数组（AGE_*）
+    注意：数值型数组中的每个元素都按数字处理（包括 np.int64），逐条调用 validate_age 时
+    NumPy 整数标量会被判为“非数字类型”
+    """
+    if isinstance(ages, np.ndarray):
+        array = ages
+    else:
+        items = list(ages)
+        try:
+            array = np.array(items) if items else np.array([], dtype=np.int64)
+        except ValueError:
+            array = None
+        # 元素中有列表等嵌套序列时不能整体转换，按对象逐个检查
+        if array is None or array.shape != (len(items),):
+            array = np.empty(len(items), dtype=object)
+    if array.dtype.kind in "biuf":
+        values = array
+        numeric = None
+    else:
+        # 混合类型（np.array 可能已把数字转成字符串，所以用原始元素）：
+        # 逐个做与 validate_age 相同的 isinstance 检查，再转成浮点数组
+        if isinstance(ages, np.ndarray):
+            items = ages.ravel().tolist()
+        numeric = np.fromiter((isinstance(x, (int, float)) for x in items), bool, count=len(items))
+        values = np.array([x if ok else 0 for x, ok in zip(items, numeric.tolist())], dtype=np.float64)
+        values = values.reshape(array.shape)
+        numeric = numeric.reshape(array.shape)
+
+    codes = np.zeros(values.shape, dtype=np.uint8)
+    negative = values < 0
+    if values.dtype.kind == "f":
+        finite = np.isfinite(values)
+        codes[~finite & ~negative] = AGE_NOT_FINITE
+        with np.errstate(invalid="ignore"):
+            codes[finite & ~negative & (values != np.floor(values))] = AGE_FRACTION
+    codes[negative] = AGE_NEGATIVE
+    if numeric is not None:
+        codes[~numeric] = AGE_NOT_NUMBER
+    valid = (codes == AGE_OK) & (values >= 18) & (values <= 60)
+    return valid, codes
+
+
+def age_results(valid, codes):
+    """把批量结果还原成 validate_age 的返回值列表（True / False / 错误信息）"""
+    return [AGE_MESSAGES[code] if code else bool(ok) for ok, code in zip(valid.tolist(), codes.tolist())]
+
+
+def _password_code(s):
+    """单条密码的错误码（非 ASCII 密码逐条判断时使用）"""
+    if not isinstance(s, str):
+        return PW_NOT_STRING
+    if len(s) < 6:
+        return PW_TOO_SHORT
+    if len(s) > 12:
+        return PW_TOO_LONG
+    if not any(c.isdigit() for c in s):
+        return PW_NO_DIGIT
+    if not any(c.isalpha() for c in s):
+        return PW_NO_ALPHA
+    return PW_OK
+
+
+# 每个字符的类别位
+_DIGIT, _ALPHA, _NON_ASCII = 1, 2, 4
+
+
+# 错误码查找表，下标为 min(长度, 13) * 4 + (类别位 & 3)
+_CODE_TABLE = np.array([
+    PW_TOO_SHORT if length < 6 else PW_TOO_LONG if length > 12
+    else PW_NO_DIGIT if not bits & _DIGIT else PW_NO_ALPHA if not bits & _ALPHA else PW_OK
+    for length in range(14) for bits in range(4)
+], dtype=np.uint8)
+
+
+def _char_flags(points, ascii_only=False):
+    """每个字符的类别位（uint8 码点数组上原地计算，避免多余的百万级临时数组）"""
+    if points.dtype != np.uint8:
+        return (((points - 48) < 10).view(np.uint8)
+                | (((points | 32) - 97) < 26).view(np.uint8) << 1
+                | (points >= 128).view(np.uint8) << 2)
+    flags = points - 48
+    np.less(flags, 10, out=flags.view(bool))
+    alpha = points | 32
+    alpha -= 97
+    np.less(alpha, 26, out=alpha.view(bool))
+    alpha <<= 1
+    flags |= alpha
+    if not ascii_only:
+        flags |= (points >= 128).view(np.uint8) << 2
+    return flags
+
+
+def _row_flags(points, offsets, ascii_only=False):
+    """返回每条密码中出现过的字符类别（_DIGIT | _ALPHA | _NON_ASCII 的组合）"""
+    flags = _char_flags(points, ascii_only)
+    starts = offsets[:-1]
+    nonempty = offsets[1:] > starts
+    result = np.zeros(len(starts), dtype=np.uint8)
+    # 跳过空串后，相邻起点之间恰好是一条密码
+    if nonempty.all():
+        result = np.bitwise_or.reduceat(flags, starts)
+    elif nonempty.any():
+        result[nonempty] = np.bitwise_or.reduceat(flags, starts[nonempty])
+    return result
+
+
+def _codes_from_flags(lengths, flags, row_text):
+    """
+    :param lengths: 每条密码的长度
+    :param flags: 每条密码的字符类别位
+    :param row_text: 函数，i -> 第 i 条密码的字符串（含非 ASCII 字符时调用）
+    """
+    codes = _CODE_TABLE[np.minimum(lengths, 13) * 4 + (flags & (_DIGIT | _ALPHA))]
+    # Unicode 中还有很多数字和字母（如 "²"、汉字），这些密码逐条按 str.isdigit / str.isalpha 判断
+    for i in np.flatnonzero(flags & _NON_ASCII).tolist():
+        codes[i] = _password_code(row_text(i))
+    return codes == PW_OK, codes
+
+
+def validate_password_buffer(offsets, data):
+    """
+    批量验证 Arrow 风格字符串缓冲区中的密码
+    :param offsets: 长度为 n + 1 的整数数组
+    :param data: 所有密码 UTF-8 编码后拼接的字节（bytes 或 uint8 数组）
+    :return: (valid, codes)
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    points = np.frombuffer(data, dtype=np.uint8)
+    ascii_only = data.isascii() if isinstance(data, (bytes, bytearray)) else bool(points.max(initial=0) < 128)
+    # 对 ASCII 密码字节数就是字符数；含多字节字符的行会逐条解码重新判断
+    return _codes_from_flags(np.diff(offsets), _row_flags(points, offsets, ascii_only),
+                             lambda i: points[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8"))
+
+
+def validate_passwords(passwords):
+    """
+    批量验证密码
+    :param passwords: 字符串的序列（列表、元组等）或 NumPy 数组；(offsets, data) 缓冲区请用 validate_password_buffer
+    :return: (valid, codes) - valid 为布尔数组，codes 为 uint8 错误码数组（PW_*），多维数组保持原形状
+    """
+    if isinstance(passwords, np.ndarray):
+        if passwords.ndim != 1:
+            valid, codes = validate_passwords(passwords.ravel())
+            return valid.reshape(passwords.shape), codes.reshape(passwords.shape)
+        if passwords.dtype.kind == "U":
+            return _validate_fixed_width(passwords)
+
+    items = passwords if isinstance(passwords, list) else list(passwords)
+    if not items:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=np.uint8)
+    try:
+        # 用 "\0" 分隔拼接，分隔符的位置就是每条密码的边界，不必逐条求长度
+        joined = "\0".join(items)
+    except TypeError:
+        # 含非字符串：这些位置记为 PW_NOT_STRING，其余按字符串校验
+        strings = np.array([isinstance(p, str) for p in items], dtype=bool)
+        valid, codes = validate_passwords([p if ok else "" for p, ok in zip(items, strings.tolist())])
+        codes[~strings] = PW_NOT_STRING
+        return codes == PW_OK, codes
+
+    ascii_only = joined.isascii()
+    if ascii_only:
+        points = np.frombuffer(joined.encode("ascii"), dtype=np.uint8)
+    else:
+        points = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+    bounds = np.flatnonzero(points == 0)
+    if len(bounds) == len(items) - 1:
+        starts = np.concatenate(([0], bounds + 1))
+        ends = np.append(bounds, len(points))
+    else:
+        # 密码本身含有 "\0"，按长度计算边界
+        lengths = np.fromiter(map(len, items), dtype=np.int64, count=len(items))
+        starts = np.concatenate(([0], np.cumsum(lengths[:-1] + 1)))
+        ends = starts + lengths
+    offsets = np.append(starts, len(points))
+    # 分隔符不属于任何类别，可以和下一条密码的起点一起参与按行归约
+    return _codes_from_flags(ends - starts, _row_flags(points, offsets, ascii_only), items.__getitem__)
+
+
+def _validate_fixed_width(array):
+    """'<U' 定长字符串数组：直接把底层 UTF-32 缓冲区看成 (n, 宽度) 的码点矩阵"""
+    width = array.dtype.itemsize // 4
+    points = np.ascontiguousarray(array).view(np.uint32).reshape(len(array), width)
+    lengths = np.char.str_len(array)
+    ascii_only = points.size == 0 or points.max() < 128
+    if ascii_only:
+        # 全部是 ASCII 时先压成 uint8，按字节运算比 uint32 快得多
+        points = points.astype(np.uint8)
+    flags = np.bitwise_or.reduce(_char_flags(points, ascii_only), axis=1)
+    return _codes_from_flags(lengths, flags, lambda i: str(array[i]))
@@ -0,0 +1,72 @@
+"""
+批量校验 vs 逐条校验（100 万条记录）
+- 年龄：validate_age 逐个调用 vs validate_ages(整数数组 / 浮点数组 / Python 列表)
+- 密码：isValidPassword 逐个调用 vs validate_passwords(列表 / NumPy 字符串数组 / UTF-8 缓冲区)
+运行: python bench_batch_validation.py [记录数]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from age_validator import validate_age
+from batch_validation import age_results, validate_ages, validate_password_buffer, validate_passwords
+from test01 import isValidPassword
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def report(name, scalar, batch):
+    print(f"{name:<28}{scalar * 1000:>10.0f}{batch * 1000:>10.1f}{scalar / batch:>8.0f}x")
+
+
+def main():
+    rng = np.random.default_rng(0)
+    ints = rng.integers(-10, 100, N)
+    floats = np.where(rng.random(N) < 0.1, ints + 0.5, ints).astype(np.float64)
+    int_list = ints.tolist()
+    float_list = floats.tolist()
+
+    letters = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    r = random.Random(0)
+    passwords = ["".join(r.choices(letters, k=r.randint(4, 14))) for _ in range(N)]
+    encoded = [p.encode() for p in passwords]
+    offsets = np.concatenate(([0], np.cumsum([len(b) for b in encoded])))
+    data = b"".join(encoded)
+    fixed = np.array(passwords)
+
+    print(f"{N} 条记录")
+    print(f"{'':<28}{'逐条ms':>10}{'批量ms':>10}{'加速':>9}")
+
+    scalar, expected = timed(lambda: [validate_age(a) for a in int_list])
+    batch, (valid, codes) = timed(lambda: validate_ages(ints))
+    assert age_results(valid, codes) == expected
+    report("年龄（整数数组）", scalar, batch)
+    report("年龄（Python 列表）", scalar, timed(lambda: validate_ages(int_list))[0])
+
+    scalar, expected = timed(lambda: [validate_age(a) for a in float_list])
+    batch, (valid, codes) = timed(lambda: validate_ages(floats))
+    assert age_results(valid, codes) == expected
+    report("年龄（浮点数组）", scalar, batch)
+
+    scalar, expected = timed(lambda: [isValidPassword(p) for p in passwords])
+    batch, (valid, _) = timed(lambda: validate_passwords(passwords))
+    assert valid.tolist() == expected
+    report("密码（字符串列表）", scalar, batch)
+    batch, (valid, _) = timed(lambda: validate_passwords(fixed))
+    assert valid.tolist() == expected
+    report("密码（NumPy 字符串数组）", scalar, batch)
+    batch, (valid, _) = timed(lambda: validate_password_buffer(offsets, data))
+    assert valid.tolist() == expected
+    report("密码（UTF-8 缓冲区）", scalar, batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+批量校验测试 - 与逐条校验的结果逐一比较
+"""
+import random
+
+import numpy as np
+
+from age_validator import validate_age
+from batch_validation import (
+    AGE_NOT_FINITE, PW_NOT_STRING, age_results, validate_ages,
+    validate_password_buffer, validate_passwords,
+)
+from test01 import isValidPassword
+
+
+def random_passwords(n, seed=0):
+    rng = random.Random(seed)
+    alphabet = "abcXYZ0123456789_!@ 密码²٣"
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 15))) for _ in range(n)]
+
+
+def test_ages_match_scalar():
+    """测试1: 边界值、类型错误、负数、浮点数与 validate_age 一致"""
+    values = [17, 18, 19, 59, 60, 61, "abc", -5, 18.5, 18.0, 60.0, -0.5, 0, True, None, [1], 10 ** 30]
+    valid, codes = validate_ages(values)
+    assert age_results(valid, codes) == [validate_age(v) for v in values]
+
+    ints = np.arange(-100, 200)
+    floats = np.round(np.random.default_rng(0).uniform(-10, 80, 5000), 1)
+    for array in (ints, floats):
+        valid, codes = validate_ages(array)
+        assert age_results(valid, codes) == [validate_age(v) for v in array.tolist()]
+
+
+def test_ages_not_finite():
+    """测试2: nan / inf 单独给出错误码（逐条校验会抛出异常），-inf 与负数相同"""
+    valid, codes = validate_ages(np.array([np.nan, np.inf, -np.inf, 30.0]))
+    assert codes.tolist() == [AGE_NOT_FINITE, AGE_NOT_FINITE, 2, 0]
+    assert valid.tolist() == [False, False, False, True]
+
+
+def test_passwords_match_scalar():
+    """测试3: 列表、NumPy 字符串数组、UTF-8 缓冲区三种输入都与 isValidPassword 一致（含非 ASCII）"""
+    cases = ["123456", "abcdef", "abc123", "a1", "a1b2c3d4e5f6", "a1b2c3d4e5f6g", ""]
+    passwords = cases + random_passwords(5000)
+    expected = [isValidPassword(p) for p in passwords]
+
+    assert validate_passwords(passwords)[0].tolist() == expected
+    assert validate_passwords(np.array(passwords))[0].tolist() == expected
+    ascii_only = [p for p in passwords if p.isascii()]
+    assert validate_passwords(ascii_only)[0].tolist() == [isValidPassword(p) for p in ascii_only]
+    with_nul = ["ab\0cd12", "\0\0\0\0\0\0", "abc123"]
+    assert validate_passwords(with_nul)[0].tolist() == [isValidPassword(p) for p in with_nul]
+
+    encoded = [p.encode("utf-8") for p in passwords]
+    offsets = np.concatenate(([0], np.cumsum([len(b) for b in encoded])))
+    assert validate_password_buffer(offsets, b"".join(encoded))[0].tolist() == expected
+
+
+def test_password_codes():
+    """测试4: 错误码区分长度、缺少数字、缺少字母和非字符串"""
+    valid, codes = validate_passwords(["a1", "a1b2c3d4e5f6g", "abcdef", "123456", "abc123", None, 123456])
+    assert codes.tolist() == [1, 2, 3, 4, 0, PW_NOT_STRING, PW_NOT_STRING]
+    assert valid.tolist() == [False, False, False, False, True, False, False]
+    assert validate_passwords([])[0].tolist() == []
+
+
+def test_password_tuples_and_shapes():
+    """测试5: 两个密码的元组按普通序列校验；二维数组与 validate_ages 一样保持形状"""
+    pair = ("abc123", "x")
+    assert validate_passwords(pair)[0].tolist() == [True, False]
+    assert validate_passwords(tuple(["abcdef", "123456"]))[1].tolist() == [3, 4]
+
+    grid = np.array([["abc123", "abcdef"], ["a1", "x1y2z3"]])
+    valid, codes = validate_passwords(grid)
+    assert valid.shape == codes.shape == (2, 2)
+    assert valid.tolist() == [[True, False], [False, True]]
+    valid, codes = validate_ages(np.array([[17, 18], [60, 61]]))
+    assert valid.shape == (2, 2)
+    objects = np.array([["abc123", None], [1, "abcde1"]], dtype=object)
+    assert validate_passwords(objects)[1].tolist() == [[0, PW_NOT_STRING], [PW_NOT_STRING, 0]]
+
+
+def test_password_unicode_classes():
+    """测试6: 非 ASCII 的数字、字母（阿拉伯数字、上标、全角、汉字）与 isValidPassword 一致"""
+    passwords = ["٣٣٣٣٣a", "²²²²²²", "abcde²", "密码密码12", "密码密码密码", "１２３ａｂｃ",
+                 "１２３４５６", "ÀÉÎõü1", "٣٣٣٣٣٣", "αβγδεζ", "αβγδε5", "😀😀😀abc1"]
+    expected = [isValidPassword(p) for p in passwords]
+    assert validate_passwords(passwords)[0].tolist() == expected
+    assert validate_passwords(np.array(passwords))[0].tolist() == expected
+    encoded = [p.encode("utf-8") for p in passwords]
+    offsets = np.concatenate(([0], np.cumsum([len(b) for b in encoded])))
+    assert validate_password_buffer(offsets, b"".join(encoded))[0].tolist() == expected
+
+
+def test_password_embedded_nul():
+    """测试7: 密码中间含 "\\0" 时边界仍然正确（列表、定长数组、缓冲区）"""
+    passwords = ["ab\0cd12", "\0" * 6, "a" + "\0" * 10 + "1", "abc123", "\0a1", "\0ab\0" + "12", "abc12\0"]
+    expected = [isValidPassword(p) for p in passwords]
+    assert validate_passwords(passwords)[0].tolist() == expected
+    # '<U' 数组会去掉末尾的 "\0"，只比较中间含 "\0" 的密码
+    inner = [p for p in passwords if not p.endswith("\0")]
+    assert validate_passwords(np.array(inner))[0].tolist() == [isValidPassword(p) for p in inner]
+    encoded = [p.encode("utf-8") for p in passwords]
+    offsets = np.concatenate(([0], np.cumsum([len(b) for b in encoded])))
+    assert validate_password_buffer(offsets, b"".join(encoded))[0].tolist() == expected
+
+
+def test_password_mixed_non_strings():
+    """测试8: 列表中混有 None、数字、字节串、列表等非字符串时只有这些位置记为 PW_NOT_STRING"""
+    items = [None, "abc123", 1.5, b"abc123", ["abc123"], True, "密码12ab", "", 123456, "a\0b123"]
+    valid, codes = validate_passwords(items)
+    for item, ok, code in zip(items, valid.tolist(), codes.tolist()):
+        if isinstance(item, str):
+            assert ok == isValidPassword(item) and code != PW_NOT_STRING, item
+        else:
+            assert not ok and code == PW_NOT_STRING, item
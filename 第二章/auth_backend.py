@@ -0,0 +1,128 @@
+"""
+登录校验后端 - 复用连接 + 覆盖索引 + 常量时间比较 + 可选的用户缓存
+- 每个线程保持一个 SQLite 连接，同一条 SQL 由连接内部缓存的预编译语句执行，不再每次登录都打开数据库
+- 只按用户名查询，索引 (username, password_hash) 覆盖了需要的列，不回表
+- 密码以 "pbkdf2_sha256$迭代次数$盐$哈希" 保存，在 Python 中用 hmac.compare_digest 比较
+- 用户不存在时同样计算一次哈希，响应时间不暴露用户名是否存在
+"""
+import base64
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+ITERATIONS = 100000
+
+
+def hash_password(password, iterations=ITERATIONS, salt=None):
+    """生成保存用的密码哈希字符串"""
+    salt = os.urandom(16) if salt is None else salt
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${base64.b64encode(salt).decode()}${base64.b64encode(digest).decode()}"
+
+
+def check_password(password, encoded):
+    """校验密码与哈希字符串是否匹配（常量时间比较）"""
+    algorithm, iterations, salt, expected = encoded.split("$")
+    if algorithm != "pbkdf2_sha256":
+        raise ValueError(f"不支持的哈希算法: {algorithm}")
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(digest, base64.b64decode(expected))
+
+
+class AuthBackend:
+    """users 表上的登录校验"""
+
+    # username 上的 UNIQUE 自动索引不含 password_hash，SQLite 默认会选它再回表，这里指定覆盖索引
+    QUERY = "SELECT id, password_hash FROM users INDEXED BY idx_users_auth WHERE username=?"
+
+    def __init__(self, db_name, cache_size=0, iterations=ITERATIONS):
+        """
+        :param db_name: 数据库文件
+        :param cache_size: 缓存的用户记录数，0 表示不缓存
+        :param iterations: 新密码的 PBKDF2 迭代次数
+        """
+        self.db_name = db_name
+        self.cache_size = cache_size
+        self.iterations = iterations
+        self._local = threading.local()
+        self._connections = []
+        self._cache = OrderedDict()  # {用户名: (id, 密码哈希)}
+        self._lock = threading.Lock()
+        # 用户不存在时用来比较的哈希，保证耗时与用户存在时一致
+        self._dummy = hash_password("", iterations)
+        self.queries = 0
+        self.cache_hits = 0
+
+    def connection(self):
+        """当前线程的连接（首次使用时创建）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_name, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def ensure_schema(self):
+        """补充 password_hash 列和覆盖索引（旧数据库也能直接使用）"""
+        conn = self.connection()
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(users)")]
+        if "password_hash" not in columns:
+            conn.execute("ALTER TABLE users ADD COLUMN password_hash TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_users_auth ON users(username, password_hash)")
+        conn.commit()
+
+    def lookup(self, username):
+        """按用户名读取 (id, 密码哈希)，不存在返回 None；启用缓存时先查缓存"""
+        if self.cache_size:
+            with self._lock:
+                record = self._cache.get(username)
+                if record is not None:
+                    self._cache.move_to_end(username)
+                    self.cache_hits += 1
+                    return record
+        self.queries += 1
+        record = self.connection().execute(self.QUERY, (username,)).fetchone()
+        # 不存在的用户名不缓存，避免用随机用户名挤掉真实用户
+        if record is not None and self.cache_size:
+            with self._lock:
+                self._cache[username] = record
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return record
+
+    def verify(self, username, password):
+        """校验用户名和密码，成功返回用户 id，失败返回 None"""
+        record = self.lookup(username)
+        if record is None or record[1] is None:
+            check_password(password, self._dummy)
+            return None
+        return record[0] if check_password(password, record[1]) else None
+
+    def set_password(self, username, password):
+        """修改密码（同时写入哈希并清除缓存）"""
+        conn = self.connection()
+        conn.execute("UPDATE users SET password_hash=? WHERE username=?",
+                     (hash_password(password, self.iterations), username))
+        conn.commit()
+        self.invalidate(username)
+
+    def invalidate(self, username=None):
+        """清除缓存的用户记录（username 为 None 时全部清除）"""
+        with self._lock:
+            if username is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(username, None)
+
+    def close(self):
+        """关闭所有线程的连接"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._cache.clear()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
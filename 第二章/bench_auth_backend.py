@@ -0,0 +1,80 @@
+"""
+100 万用户下的每秒登录数
+- 原实现：每次登录新建连接，SELECT * 按用户名 + 明文密码查询
+- AuthBackend：每个线程复用连接，覆盖索引按用户名查询，Python 中比较哈希
+- AuthBackend + 缓存：热点用户的记录在内存中
+为了只比较查库路径，测试数据的 PBKDF2 迭代次数为 1；真实部署的慢哈希成本会让各方案都降到每秒几十次
+运行: python bench_auth_backend.py [用户数]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from auth_backend import AuthBackend, hash_password
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+LOGINS = 20000
+HOT_USERS = 1000
+
+
+def build(db_name):
+    conn = sqlite3.connect(db_name)
+    conn.execute("""CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        password_hash TEXT)""")
+    salt = os.urandom(16)
+    conn.executemany("INSERT INTO users (username, password, password_hash) VALUES (?, ?, ?)",
+                     ((f"user{i}", f"pw{i}", hash_password(f"pw{i}", 1, salt)) for i in range(USERS)))
+    conn.commit()
+    conn.close()
+
+
+def login_old(db_name, username, password):
+    """原 login_secure 的做法"""
+    conn = sqlite3.connect(db_name)
+    result = conn.execute("SELECT * FROM users WHERE username=? AND password=?", (username, password)).fetchone()
+    conn.close()
+    return result is not None
+
+
+def rate(login, logins):
+    start = time.perf_counter()
+    for username, password in logins:
+        assert login(username, password)
+    return len(logins) / (time.perf_counter() - start)
+
+
+def main():
+    db_name = os.path.join(tempfile.mkdtemp(), "bench_users.db")
+    start = time.perf_counter()
+    build(db_name)
+    backend = AuthBackend(db_name, iterations=1)
+    backend.ensure_schema()
+    print(f"{USERS} 个用户，建库 {time.perf_counter() - start:.1f} 秒")
+
+    pick = [random.randrange(USERS) for _ in range(LOGINS)]
+    logins = [(f"user{i}", f"pw{i}") for i in pick]
+    hot = [(f"user{i}", f"pw{i}") for i in random.sample(range(USERS), HOT_USERS)] * (LOGINS // HOT_USERS)
+
+    old = rate(lambda u, p: login_old(db_name, u, p), logins)
+    reused = rate(lambda u, p: backend.verify(u, p) is not None, logins)
+    cached = AuthBackend(db_name, cache_size=HOT_USERS * 2, iterations=1)
+    cached_rate = rate(lambda u, p: cached.verify(u, p) is not None, hot)
+
+    print(f"{'方案':<24}{'登录/秒':>10}")
+    print(f"{'每次新建连接':<24}{old:>10.0f}")
+    print(f"{'复用连接 + 覆盖索引':<24}{reused:>10.0f}  ({reused / old:.1f}x)")
+    print(f"{'+ 缓存（热点用户）':<24}{cached_rate:>10.0f}  ({cached_rate / old:.1f}x)")
+    print(f"缓存命中 {cached.cache_hits}，查库 {cached.queries}")
+    backend.close()
+    cached.close()
+    os.remove(db_name)
+
+
+if __name__ == "__main__":
+    main()
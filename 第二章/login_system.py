@@ -3,61 +3,75 @@
 """
 import sqlite3
 
+from auth_backend import ITERATIONS, AuthBackend, hash_password
+
 
 class LoginSystem:
-    def __init__(self, db_name="users.db"):
+    TEST_USERS = [('admin', 'admin123'), ('user1', 'password1')]
+    
+    def __init__(self, db_name="users.db", cache_size=0, iterations=ITERATIONS):
         self.db_name = db_name
+        # 登录校验后端：每个线程复用一个连接，可选缓存用户记录
+        self.backend = AuthBackend(db_name, cache_size=cache_size, iterations=iterations)
         self.init_database()
     
     def init_database(self):
         """初始化数据库"""
-        conn = sqlite3.connect(self.db_name)
+        self._init_tables(self.backend, self.TEST_USERS)
+    
+    @staticmethod
+    def _init_tables(backend, test_users):
+        """建表并写入测试用户"""
+        conn = backend.connection()
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL
+                password TEXT NOT NULL,
+                password_hash TEXT
             )
         ''')
-        test_users = [('admin', 'admin123'), ('user1', 'password1')]
+        backend.ensure_schema()
         for username, password in test_users:
             try:
                 cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
             except sqlite3.IntegrityError:
                 pass
+        # password 列保留明文供 login_vulnerable 演示，login_secure 只使用 password_hash
+        rows = cursor.execute("SELECT username, password FROM users WHERE password_hash IS NULL").fetchall()
+        cursor.executemany("UPDATE users SET password_hash=? WHERE username=?",
+                           [(hash_password(password, backend.iterations), username) for username, password in rows])
         conn.commit()
-        conn.close()
     
     def login_vulnerable(self, username, password):
         """不安全：直接拼接SQL"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        cursor = self._backend_for(username).connection().cursor()
         query = f"SELECT * FROM users WHERE username='{username}' AND password='{password}'"
         try:
             cursor.execute(query)
             result = cursor.fetchone()
-            conn.close()
             return {'success': bool(result), 'message': '登录成功' if result else '登录失败'}
         except Exception as e:
-            conn.close()
             return {'success': False, 'message': f'错误: {str(e)}'}
     
     def login_secure(self, username, password):
-        """安全：使用参数化查询"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        query = "SELECT * FROM users WHERE username=? AND password=?"
+        """安全：参数化查询只按用户名查找，在 Python 中常量时间比较密码哈希"""
         try:
-            cursor.execute(query, (username, password))
-            result = cursor.fetchone()
-            conn.close()
-            return {'success': bool(result), 'message': '登录成功' if result else '登录失败'}
+            result = self._verify(username, password)
+            return {'success': result is not None, 'message': '登录成功' if result is not None else '登录失败'}
         except Exception as e:
-            conn.close()
             return {'success': False, 'message': f'错误: {str(e)}'}
     
+    def _backend_for(self, username):
+        """用户名所在数据库的校验后端（分片时按用户名路由）"""
+        return self.backend
+    
+    def _verify(self, username, password):
+        return self.backend.verify(username, password)
+    
     def cleanup(self):
         import os
+        self.backend.close()
         if os.path.exists(self.db_name):
             os.remove(self.db_name)
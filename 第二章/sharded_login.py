@@ -0,0 +1,102 @@
+"""
+分片的登录系统 - 用户按用户名一致性哈希分布在多个数据库文件中
+- 路由与迁移使用第一章 sharding.py 中的 HashRing / migrate_rows
+- login_vulnerable / login_secure / cleanup 的参数和返回值与 LoginSystem 相同
+- reshard 在线迁移：迁移期间登录先查新分片，查不到再查旧分片
+"""
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from auth_backend import AuthBackend
+from login_system import LoginSystem
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "第一章", "classTest"))
+from sharding import HashRing, migrate_rows
+
+
+class ShardedLoginSystem(LoginSystem):
+    """多个数据库文件上的登录系统"""
+
+    def __init__(self, db_names, cache_size=0, vnodes=100, workers=None):
+        """
+        :param db_names: 各分片的数据库文件
+        :param cache_size: 每个分片缓存的用户记录数
+        :param vnodes: 每个分片的虚拟节点数
+        :param workers: 跨分片操作的线程数，默认等于分片数
+        """
+        self.cache_size = cache_size
+        self.vnodes = vnodes
+        self.backends = {name: AuthBackend(name, cache_size=cache_size) for name in db_names}
+        self.ring = HashRing(db_names, vnodes)
+        self._old_ring = None  # 迁移期间的旧环
+        self._executor = ThreadPoolExecutor(workers or len(db_names))
+        self._reshard_lock = threading.Lock()
+        self.init_database()
+
+    def _fan_out(self, fn, names=None):
+        """在线程池中对每个分片执行 fn(分片名)"""
+        return list(self._executor.map(fn, list(self.backends) if names is None else names))
+
+    def init_database(self):
+        """各分片建表，测试用户只写入所属分片"""
+        self._fan_out(lambda name: self._init_tables(
+            self.backends[name], [user for user in self.TEST_USERS if self.ring.node_for(user[0]) == name]))
+
+    def _backend_for(self, username):
+        return self.backends[self.ring.node_for(username)]
+
+    def _verify(self, username, password):
+        backend = self._backend_for(username)
+        old_ring = self._old_ring
+        if old_ring is not None and backend.lookup(username) is None:
+            backend = self.backends[old_ring.node_for(username)]
+        return backend.verify(username, password)
+
+    def count_users(self):
+        """所有分片的用户总数"""
+        return sum(self._fan_out(
+            lambda name: self.backends[name].connection().execute("SELECT COUNT(*) FROM users").fetchone()[0]))
+
+    def reshard(self, db_names, batch_size=1000):
+        """
+        在线重新分片，把用户流式迁移到新的所属分片
+        :return: 迁移的用户数
+        """
+        with self._reshard_lock:
+            for name in db_names:
+                if name not in self.backends:
+                    self.backends[name] = AuthBackend(name, cache_size=self.cache_size)
+                    self._init_tables(self.backends[name], [])
+            sources = list(self.ring.nodes)
+            self._old_ring, self.ring = self.ring, HashRing(db_names, self.vnodes)
+
+            def moved(source, target, usernames):
+                for username in usernames:
+                    self.backends[source].invalidate(username)
+                    self.backends[target].invalidate(username)
+
+            def connect(name):
+                return nullcontext(self.backends[name].connection())
+
+            try:
+                counts = self._fan_out(
+                    lambda name: migrate_rows(name, self.ring.node_for, connect,
+                                              ("username", "password", "password_hash"), batch_size, moved),
+                    sources)
+            finally:
+                self._old_ring = None
+            # 移出的分片已经清空，只关闭连接，不删除文件
+            for name in list(self.backends):
+                if name not in self.ring.nodes:
+                    self.backends.pop(name).close()
+            return sum(counts)
+
+    def cleanup(self):
+        for name, backend in self.backends.items():
+            backend.close()
+            if os.path.exists(name):
+                os.remove(name)
+        self._executor.shutdown()
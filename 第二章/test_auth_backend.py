@@ -0,0 +1,60 @@
+"""
+登录校验后端测试
+"""
+import threading
+
+from auth_backend import AuthBackend, check_password, hash_password
+from login_system import LoginSystem
+
+
+def test_hash_and_check():
+    """测试1: 哈希带随机盐，正确密码通过、错误密码失败"""
+    a, b = hash_password("admin123", 1000), hash_password("admin123", 1000)
+    assert a != b and a.startswith("pbkdf2_sha256$1000$")
+    assert check_password("admin123", a)
+    assert not check_password("admin124", a)
+
+
+def test_login_secure_uses_hash(tmp_path):
+    """测试2: login_secure 只比较哈希，注入与错误密码失败；漏洞演示保持不变"""
+    system = LoginSystem(str(tmp_path / "users.db"))
+    assert system.login_secure("admin", "admin123")['success']
+    assert not system.login_secure("admin", "' OR '1'='1")['success']
+    assert not system.login_secure("nobody", "admin123")['success']
+    assert system.login_vulnerable("admin", "' OR '1'='1")['success']
+    plan = system.backend.connection().execute("EXPLAIN QUERY PLAN " + AuthBackend.QUERY, ("admin",)).fetchall()
+    assert "COVERING INDEX idx_users_auth" in plan[0][-1]
+    system.cleanup()
+
+
+def test_cache_and_set_password(tmp_path):
+    """测试3: 缓存命中不查库，修改密码后缓存失效"""
+    system = LoginSystem(str(tmp_path / "users.db"), cache_size=10)
+    backend = system.backend
+    assert backend.verify("admin", "admin123")
+    assert backend.verify("admin", "admin123")
+    assert backend.queries == 1 and backend.cache_hits == 1
+    backend.verify("nobody", "x")
+    backend.verify("nobody", "x")
+    assert backend.queries == 3
+    backend.set_password("admin", "new-password")
+    assert backend.verify("admin", "admin123") is None
+    assert backend.verify("admin", "new-password")
+    system.cleanup()
+
+
+def test_connection_per_thread(tmp_path):
+    """测试4: 每个线程使用自己的连接，同一线程重复使用"""
+    system = LoginSystem(str(tmp_path / "users.db"))
+    backend = system.backend
+    assert backend.connection() is backend.connection()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        (backend.connection(), system.login_secure("user1", "password1")['success']))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(ok for _, ok in results)
+    assert len({id(conn) for conn, _ in results} | {id(backend.connection())}) == 5
+    system.cleanup()
@@ -0,0 +1,45 @@
+"""
+分片登录系统测试
+"""
+from auth_backend import hash_password
+from sharded_login import ShardedLoginSystem
+
+
+def add_users(system, count):
+    for name, backend in system.backends.items():
+        rows = [(f"u{i}", f"pw{i}", hash_password(f"pw{i}", 1)) for i in range(count)
+                if system.ring.node_for(f"u{i}") == name]
+        conn = backend.connection()
+        conn.executemany("INSERT INTO users (username, password, password_hash) VALUES (?, ?, ?)", rows)
+        conn.commit()
+
+
+def test_sharded_login(tmp_path):
+    """测试1: 测试用户只在所属分片中，登录结果与单库一致"""
+    system = ShardedLoginSystem([str(tmp_path / f"s{i}.db") for i in range(3)])
+    assert system.count_users() == 2
+    assert system.login_secure("admin", "admin123")['success']
+    assert not system.login_secure("admin", "' OR '1'='1")['success']
+    assert system.login_vulnerable("admin", "' OR '1'='1")['success']
+    assert not system.login_secure("nobody", "x")['success']
+    system.cleanup()
+
+
+def test_reshard(tmp_path):
+    """测试2: 增加分片后迁移约 1/4 的用户，所有用户仍能登录；缩容后全部迁回"""
+    names = [str(tmp_path / f"s{i}.db") for i in range(3)]
+    system = ShardedLoginSystem(names, cache_size=100)
+    add_users(system, 1000)
+    for i in range(0, 1000, 10):
+        assert system.login_secure(f"u{i}", f"pw{i}")['success']
+
+    moved = system.reshard(names + [str(tmp_path / "s3.db")], batch_size=64)
+    assert 150 < moved < 400
+    assert system.count_users() == 1002
+    for i in range(1000):
+        assert system.login_secure(f"u{i}", f"pw{i}")['success']
+
+    system.reshard(names[1:] + [str(tmp_path / "s3.db")])
+    assert len(system.backends) == 3 and system.count_users() == 1002
+    assert system.login_secure("admin", "admin123")['success']
+    system.cleanup()
@@ -0,0 +1,70 @@
+"""
+SQL注入模糊测试引擎测试
+"""
+import itertools
+import sqlite3
+
+from flask import Flask, jsonify, request
+
+from login_system import LoginSystem
+from sqli_fuzzer import expand, flask_target, fuzz, generate, login_target, normalize
+
+
+def test_generate():
+    """测试1: 语法展开的载荷超过 10 万个且不重复；同名槽位取相同的值"""
+    cases = list(generate())
+    assert len(cases) > 100000
+    assert len({(c.field, c.payload) for c in cases}) == len(cases)
+    assert {c.family for c in cases} == {"tautology", "union", "stacked", "comment", "expression"}
+    assert all(" " not in p or "/**/" not in p for p in expand("{q}{ws}OR{ws}1=1"))
+    assert normalize('near "OR": syntax error at 12') == "near ?: syntax error at N"
+
+
+def test_fuzz_login_system(tmp_path):
+    """测试2: 不安全方法找到绕过，安全方法没有"""
+    system = LoginSystem(str(tmp_path / "fuzz.db"), iterations=100)
+    cases = list(generate(families=["tautology", "union"], encodings=["plain"]))
+    report = fuzz(login_target(system, "login_vulnerable"), cases, workers=4)
+    assert report.total == len(cases) and report.rate > 0
+    assert len(report.bypasses) == 1
+    assert report.bypasses[0].families.keys() == {"tautology", "union"}
+
+    report = fuzz(login_target(system, "login_secure"), cases[:2000], workers=4)
+    assert report.bypasses == [] and len(report.findings) == 1
+    system.cleanup()
+
+
+def test_fuzz_flask_route(tmp_path):
+    """测试3: 通过 Flask 测试客户端请求 /login，并按状态码 + 消息去重"""
+    db = str(tmp_path / "users.db")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE users (username TEXT, password TEXT)")
+    conn.execute("INSERT INTO users VALUES ('admin', 'admin123')")
+    conn.commit()
+    conn.close()
+
+    app = Flask(__name__)
+
+    @app.route("/login", methods=["POST"])
+    def login():
+        data = request.get_json()
+        query = f"SELECT * FROM users WHERE username='{data['username']}' AND password='{data['password']}'"
+        try:
+            with sqlite3.connect(db) as c:
+                row = c.execute(query).fetchone()
+        except sqlite3.Error as e:
+            return jsonify({"message": str(e)}), 400
+        return (jsonify({"message": "ok"}), 200) if row else (jsonify({"message": "fail"}), 400)
+
+    cases = itertools.islice(generate(families=["tautology"], encodings=["plain"]), 3000)
+    report = fuzz(flask_target(app), cases, workers=4)
+    assert report.total == 3000
+    assert [f.signature for f in report.bypasses] == [(True, "200 ok")]
+    assert (False, "400 fail") in report.findings
+
+
+def test_generate_spaceless_breakouts():
+    """测试4: 语法能产出不带空格、带括号或比较运算的闭合载荷"""
+    payloads = {c.payload for c in generate(families=["tautology"], encodings=["plain"], fields=["username"])}
+    assert {"'or'1'='1", "'or(1)--", "'or'a'<'b", "'or(1)or'"} <= payloads
+
@@ -1,15 +1,26 @@
 from flask import Flask, request, jsonify
-import hashlib
+import os
+import sys
+
+from credentials import CredentialVerifier
+
+# 登录限流与第四章各服务共用
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "第四章", "classTest"))
+from common.rate_limit import LoginRateLimiter
 
 app = Flask(__name__)
 
-# 测试账户
+# 测试账户（scrypt 哈希，由 credentials.hash_password 生成）
 USERS = {
-    "admin": "0192023a7bbd73250516f069df18b500",      # admin123
-    "user1": "482c811da5d5b4bc6d497ffa98491e38",      # password123  
-    "test": "05a671c66aefea124cc08b76ea6d30bb"        # test123
+    "admin": "scrypt$16384$8$1$N7coZTADdWvIxfYbLoJmxA==$OXpvpSvyslHSaQ2DtXZGthIUj9tFI1VPR2W8nbIgwjI=",  # admin123
+    "user1": "scrypt$16384$8$1$Pv3wCc+K458Y6Qo9iMvKMw==$iXsk5PNCWQgD2fzyI4losPB86w5QYN+0/v2oIxhXGcc=",  # password123
+    "test": "scrypt$16384$8$1$H2gTMnSk7Uik/lVns1dLNQ==$+J7P/9kOCFMqXZcPR/Sc3vWhXZD7AnYO3RFiaPFkfkU="    # test123
 }
 
+verifier = CredentialVerifier(USERS)
+# 超限的请求在进入视图前返回 429，不会提交慢哈希任务
+limiter = LoginRateLimiter(paths=["/api/login"]).init_app(app)
+
 @app.route("/")
 def index():
     return """<h1>登录API</h1>
@@ -40,12 +51,12 @@ def login():
     if username not in USERS:
         return jsonify({"status": "error", "message": "用户名不存在"}), 401
     
-    # 验证密码
-    pwd_hash = hashlib.md5(password.encode()).hexdigest()
-    if USERS[username] != pwd_hash:
+    # 验证密码（慢哈希在进程池中计算，短时间内重复登录走缓存）
+    token = verifier.verify(username, password)
+    if token is None:
         return jsonify({"status": "error", "message": "密码错误"}), 401
     
-    return jsonify({"status": "success", "message": f"欢迎回来，{username}！", "user": username}), 200
+    return jsonify({"status": "success", "message": f"欢迎回来，{username}！", "user": username, "token": token}), 200
 
 if __name__ == "__main__":
     app.run(host='127.0.0.1', port=5000, debug=False, threaded=True)
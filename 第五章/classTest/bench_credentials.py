@@ -0,0 +1,56 @@
+"""
+登录校验吞吐量：不同 scrypt 成本下，16 个请求线程同时登录
+- 当前线程计算（workers=0） vs 进程池计算
+- 首次登录（必须计算慢哈希） vs 重复登录（命中缓存）
+运行: python bench_credentials.py
+"""
+import os
+import threading
+import time
+
+from credentials import CredentialVerifier, hash_password
+
+THREADS = 16
+LOGINS = 64
+COSTS = (2 ** 12, 2 ** 14, 2 ** 15)
+
+
+def run(verifier, passwords):
+    """THREADS 个线程共完成 len(passwords) 次登录，返回每秒登录数"""
+    chunks = [passwords[i::THREADS] for i in range(THREADS)]
+
+    def worker(chunk):
+        for username, password in chunk:
+            assert verifier.verify(username, password)
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(passwords) / (time.perf_counter() - start)
+
+
+def main():
+    workers = os.cpu_count()
+    print(f"{THREADS} 个请求线程，{LOGINS} 个不同用户，进程池 {workers} 个进程")
+    print(f"{'scrypt n':>10}{'单次ms':>10}{'当前线程/s':>14}{'进程池/s':>12}{'缓存命中/s':>14}")
+    for n in COSTS:
+        start = time.perf_counter()
+        users = {f"user{i}": hash_password(f"password{i}", n=n) for i in range(LOGINS)}
+        single_ms = (time.perf_counter() - start) / LOGINS * 1000
+        logins = [(f"user{i}", f"password{i}") for i in range(LOGINS)]
+
+        inline = run(CredentialVerifier(users, workers=0, session_ttl=0), logins)
+        pooled = CredentialVerifier(users, workers=workers)
+        pooled.verify(*logins[0])  # 预热：启动工作进程
+        pooled.invalidate()
+        pool_rate = run(pooled, logins)
+        cached = run(pooled, logins * 100)
+        pooled.close()
+        print(f"{n:>10}{single_ms:>10.1f}{inline:>14.0f}{pool_rate:>12.0f}{cached:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+密码校验 - 慢哈希（scrypt / PBKDF2）+ 进程池 + 登录缓存
+- 密码以 "scrypt$n$r$p$盐$哈希" 或 "pbkdf2_sha256$迭代次数$盐$哈希" 格式保存
+- 慢哈希每次要几十毫秒 CPU，放到进程池中计算，不占用请求线程的 GIL
+- 哈希比较使用 hmac.compare_digest（常量时间），不因比较提前结束泄露信息
+- 校验成功后在短时间内缓存，同一用户用同一密码重复登录不再计算慢哈希
+"""
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _b64(data):
+    return base64.b64encode(data).decode()
+
+
+def derive(algorithm, params, password, salt):
+    """计算慢哈希（在工作进程中执行）"""
+    if algorithm == "scrypt":
+        n, r, p = params
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r + 1024 * 1024, dklen=32)
+    if algorithm == "pbkdf2_sha256":
+        (iterations,) = params
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    raise ValueError(f"不支持的哈希算法: {algorithm}")
+
+
+def hash_password(password, algorithm="scrypt", n=2 ** 14, r=8, p=1, iterations=200000):
+    """生成保存用的密码哈希字符串"""
+    salt = os.urandom(16)
+    params = (n, r, p) if algorithm == "scrypt" else (iterations,)
+    digest = derive(algorithm, params, password, salt)
+    return "$".join([algorithm, *map(str, params), _b64(salt), _b64(digest)])
+
+
+def parse_hash(encoded):
+    """解析哈希字符串，返回 (算法, 参数, 盐, 哈希)"""
+    algorithm, *params, salt, digest = encoded.split("$")
+    return algorithm, tuple(int(x) for x in params), base64.b64decode(salt), base64.b64decode(digest)
+
+
+class CredentialVerifier:
+    """用户名 + 密码校验"""
+
+    def __init__(self, users, workers=None, session_ttl=300, max_sessions=100000):
+        """
+        :param users: {用户名: hash_password 生成的哈希}
+        :param workers: 计算慢哈希的进程数，默认 CPU 核数；0 表示在当前线程计算
+        :param session_ttl: 校验成功后缓存的秒数，0 表示不缓存
+        :param max_sessions: 缓存条数上限，超出时淘汰最早的
+        """
+        self.users = users
+        self.workers = os.cpu_count() if workers is None else workers
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        # 缓存键是带进程内随机密钥的 HMAC，内存中不保留明文密码
+        self._secret = secrets.token_bytes(32)
+        self._sessions = OrderedDict()  # {HMAC(用户名, 密码): (令牌, 过期时间, 用户名)}
+        self._tokens = {}  # {令牌: 缓存键}
+        self._lock = threading.Lock()
+        self._pool = None
+        self.kdf_calls = 0
+        self.cache_hits = 0
+
+    def _executor(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # spawn：Flask 多线程运行时 fork 子进程可能继承被其他线程持有的锁
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _session_key(self, username, password):
+        return hmac.new(self._secret, f"{username}\0{password}".encode(), hashlib.sha256).digest()
+
+    def verify(self, username, password):
+        """
+        校验密码
+        :return: 成功返回会话令牌，失败返回 None
+        """
+        encoded = self.users.get(username)
+        if encoded is None:
+            return None
+        key = self._session_key(username, password)
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and session[1] > now:
+                self.cache_hits += 1
+                return session[0]
+
+        algorithm, params, salt, expected = parse_hash(encoded)
+        self.kdf_calls += 1
+        if self.workers:
+            digest = self._executor().submit(derive, algorithm, params, password, salt).result()
+        else:
+            digest = derive(algorithm, params, password, salt)
+        if not hmac.compare_digest(digest, expected):
+            return None
+
+        token = secrets.token_urlsafe(24)
+        if self.session_ttl:
+            with self._lock:
+                self._drop(key)
+                self._sessions[key] = (token, now + self.session_ttl, username)
+                self._tokens[token] = key
+                while len(self._sessions) > self.max_sessions:
+                    self._drop(next(iter(self._sessions)))
+        return token
+
+    def _drop(self, key):
+        """删除一条缓存（调用方持有锁）"""
+        session = self._sessions.pop(key, None)
+        if session is not None:
+            self._tokens.pop(session[0], None)
+
+    def check_token(self, token):
+        """会话令牌有效时返回用户名，否则返回 None"""
+        with self._lock:
+            key = self._tokens.get(token)
+            session = self._sessions.get(key) if key is not None else None
+            if session is None or session[1] <= time.monotonic():
+                return None
+            return session[2]
+
+    def invalidate(self, username=None):
+        """修改密码后清除该用户的缓存（username 为 None 时全部清除）"""
+        with self._lock:
+            for key, session in list(self._sessions.items()):
+                if username is None or session[2] == username:
+                    self._drop(key)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,60 @@
+"""密码校验模块测试（不需要启动服务）"""
+import time
+import pytest
+from credentials import CredentialVerifier, hash_password, parse_hash
+
+# 测试中使用较低的哈希成本
+FAST = {"n": 2 ** 10}
+
+@pytest.fixture
+def users():
+    return {"admin": hash_password("admin123", **FAST),
+            "user1": hash_password("password123", algorithm="pbkdf2_sha256", iterations=1000)}
+
+def test_hash_format():
+    """测试1: 哈希带随机盐，参数写在哈希字符串中"""
+    a, b = hash_password("admin123", **FAST), hash_password("admin123", **FAST)
+    assert a != b
+    algorithm, params, salt, digest = parse_hash(a)
+    assert algorithm == "scrypt" and params == (1024, 8, 1) and len(salt) == 16 and len(digest) == 32
+
+def test_verify(users):
+    """测试2: scrypt 与 PBKDF2 哈希的正确/错误密码、不存在的用户"""
+    v = CredentialVerifier(users, workers=0)
+    assert v.verify("admin", "admin123")
+    assert v.verify("user1", "password123")
+    assert v.verify("admin", "admin124") is None
+    assert v.verify("nobody", "admin123") is None
+
+def test_session_cache_skips_kdf(users):
+    """测试3: 重复登录走缓存，错误密码不进入缓存，过期后重新计算"""
+    v = CredentialVerifier(users, workers=0, session_ttl=0.1)
+    token = v.verify("admin", "admin123")
+    assert v.verify("admin", "admin123") == token
+    assert v.check_token(token) == "admin"
+    assert v.kdf_calls == 1 and v.cache_hits == 1
+    v.verify("admin", "wrong-password")
+    v.verify("admin", "wrong-password")
+    assert v.kdf_calls == 3
+    time.sleep(0.15)
+    assert v.check_token(token) is None
+    assert v.verify("admin", "admin123") != token
+    assert v.kdf_calls == 4
+
+def test_invalidate(users):
+    """测试4: 修改密码后清除该用户的缓存"""
+    v = CredentialVerifier(users, workers=0)
+    token = v.verify("admin", "admin123")
+    other = v.verify("user1", "password123")
+    v.invalidate("admin")
+    assert v.check_token(token) is None
+    assert v.check_token(other) == "user1"
+
+def test_process_pool(users):
+    """测试5: 在进程池中计算慢哈希"""
+    v = CredentialVerifier(users, workers=2)
+    try:
+        assert v.verify("admin", "admin123")
+        assert v.verify("admin", "bad-password") is None
+    finally:
+        v.close()
@@ -0,0 +1,212 @@
+"""
+价格目录 - 服务端按 SKU 定价，不再信任客户端传来的 price
+- 目录从 JSON 文件或 SQLite 数据库加载为内存索引，文件变化后自动热加载
+- 促销规则（满量特价 / 买 N 送 M / 折扣）按 (SKU, 数量) 计算，结果放入 LRU 缓存
+- price_lines 对一批商品只取一次当前索引，热加载进行中也不会出现新旧价格混用
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+from .pricing import _MAX_PRICE, PricingError, _batch_total, to_cents
+
+RULE_TYPES = ("bulk", "buy_x_get_y", "percent")
+
+
+class CatalogSnapshot:
+    """某一时刻的目录：{sku: 单价分} 与 {sku: [规则]}，加载后不再修改"""
+
+    def __init__(self, prices, rules, cache_size):
+        self.prices = prices
+        self.rules = rules
+        self.line_total = lru_cache(maxsize=cache_size)(self._line_total)
+
+    def _line_total(self, sku, quantity):
+        """按促销规则计算一行的金额（分）：先满量特价，再买 N 送 M，最后折扣"""
+        unit = self.prices[sku]
+        payable = quantity
+        percent = 0
+        for rule in self.rules[sku]:
+            kind = rule["type"]
+            if kind == "bulk" and quantity >= rule["min_qty"]:
+                unit = min(unit, rule["price"])
+            elif kind == "buy_x_get_y":
+                group = rule["buy"] + rule["free"]
+                payable = min(payable, quantity - quantity // group * rule["free"])
+            elif kind == "percent":
+                percent = max(percent, rule["value"])
+        line = unit * payable
+        if percent:
+            discount = (Decimal(line) * Decimal(percent) / 100).quantize(Decimal(1), ROUND_HALF_UP)
+            line -= int(discount)
+        return line
+
+
+def _positive_int(rule, key):
+    """规则中的件数字段必须是正整数（不接受字符串、小数和布尔值）"""
+    value = rule.get(key)
+    if type(value) is not int or value <= 0:
+        raise ValueError(f"促销规则的 {key} 必须是正整数: {value!r}")
+    return value
+
+
+def _parse_rule(rule):
+    """校验并规范化一条促销规则，金额换算为分；类型不对的规则在加载时拒绝，不留到请求时才出错"""
+    rule = dict(rule)
+    kind = rule.get("type")
+    if kind not in RULE_TYPES:
+        raise ValueError(f"未知的促销类型: {kind}")
+    if kind == "bulk":
+        rule["price"] = to_cents(rule.get("price"))
+        rule["min_qty"] = _positive_int(rule, "min_qty")
+    elif kind == "buy_x_get_y":
+        rule["buy"], rule["free"] = _positive_int(rule, "buy"), _positive_int(rule, "free")
+    else:
+        value = rule.get("value")
+        if type(value) not in (int, Decimal) or not 0 < value <= 100:
+            raise ValueError(f"折扣百分比必须是 (0, 100] 之间的数: {value!r}")
+    return rule
+
+
+def _check_price(sku, cents):
+    """SQLite 目录中的一行：SKU 为字符串，单价为不超过上限的非负整数分"""
+    if not isinstance(sku, str) or type(cents) is not int or not 0 <= cents < _MAX_PRICE * 100:
+        raise ValueError(f"商品价格不合法: {sku!r} = {cents!r}")
+    return sku, cents
+
+
+def load_json(path):
+    """
+    JSON 目录：{"products": {"SKU1": 19.99, ...},
+               "promotions": [{"sku": "SKU1", "type": "percent", "value": 10}, ...]}
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f, parse_float=Decimal)
+    prices = {sku: to_cents(price) for sku, price in data["products"].items()}
+    return prices, data.get("promotions", [])
+
+
+def load_sqlite(path):
+    """SQLite 目录：products(sku, price_cents)，promotions(sku, rule) 其中 rule 为 JSON 文本"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT sku, price_cents FROM products")
+        prices = dict(_check_price(sku, cents) for sku, cents in rows)
+        promotions = []
+        has_promotions = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'promotions'").fetchone()
+        if has_promotions:
+            for sku, rule in conn.execute("SELECT sku, rule FROM promotions"):
+                promotions.append(dict(json.loads(rule, parse_float=Decimal), sku=sku))
+    finally:
+        conn.close()
+    return prices, promotions
+
+
+class Catalog:
+    """价格目录"""
+
+    def __init__(self, path, check_interval=1.0, cache_size=65536):
+        """
+        :param path: .json 文件或 SQLite 数据库（.db / .sqlite）
+        :param check_interval: 两次检查文件是否变化的最小间隔秒数
+        :param cache_size: 促销计算 LRU 缓存的条目数
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.cache_size = cache_size
+        self.last_error = None
+        self._signature = None
+        self._checked = 0.0
+        self._reload_lock = threading.Lock()
+        self._snapshot = None
+        self.reload()
+
+    def _file_signature(self):
+        """文件（及 SQLite 的 WAL 文件）的修改时间与大小"""
+        signature = []
+        for path in (self.path, self.path + "-wal"):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def reload(self):
+        """重新加载目录；加载失败时保留旧目录并抛出异常"""
+        with self._reload_lock:
+            signature = self._file_signature()
+            loader = load_json if self.path.endswith(".json") else load_sqlite
+            prices, promotions = loader(self.path)
+            rules = {}
+            for rule in promotions:
+                if rule["sku"] not in prices:
+                    raise ValueError(f"促销规则引用了不存在的商品: {rule['sku']}")
+                rules.setdefault(rule["sku"], []).append(_parse_rule(rule))
+            # 整体替换引用，正在计算的请求继续使用旧目录
+            self._snapshot = CatalogSnapshot(prices, rules, self.cache_size)
+            self._signature = signature
+            self._checked = time.monotonic()
+            self.last_error = None
+
+    def maybe_reload(self):
+        """距上次检查超过 check_interval 且文件有变化时热加载；返回是否重新加载"""
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        if self._file_signature() == self._signature:
+            return False
+        try:
+            self.reload()
+        except (OSError, ValueError, KeyError, sqlite3.Error, PricingError) as e:
+            # 文件写到一半或内容有误：继续使用旧目录，下次检查再试
+            self.last_error = e
+            return False
+        return True
+
+    def __len__(self):
+        return len(self._snapshot.prices)
+
+    def resolve(self, skus):
+        """一次查询多个 SKU 的单价（分），返回 {sku: 单价分}"""
+        prices = self._snapshot.prices
+        try:
+            return {sku: prices[sku] for sku in skus}
+        except KeyError as e:
+            raise PricingError(f"未知商品: {e.args[0]}")
+        except TypeError:
+            raise PricingError("SKU 不合法")
+
+    def price_lines(self, skus, quantities):
+        """一批商品行的总金额（分）；有促销的行走 LRU 缓存，其余行按数组整批计算"""
+        snapshot = self._snapshot
+        prices, rules = snapshot.prices, snapshot.rules
+        try:
+            units = [prices[sku] for sku in skus]
+        except KeyError as e:
+            raise PricingError(f"未知商品: {e.args[0]}")
+        except TypeError:
+            raise PricingError("SKU 不合法")
+        if not rules:
+            return _batch_total(units, quantities)
+        total = 0
+        plain_units, plain_quantities = [], []
+        for sku, unit, quantity in zip(skus, units, quantities):
+            if sku in rules:
+                total += snapshot.line_total(sku, quantity)
+            else:
+                plain_units.append(unit)
+                plain_quantities.append(quantity)
+        if plain_units:
+            total += _batch_total(plain_units, plain_quantities)
+        return total
+
+    def cache_info(self):
+        """当前目录的促销缓存统计"""
+        return self._snapshot.line_total.cache_info()
@@ -1,16 +1,47 @@
 """购物车结算微服务"""
+import io
+import os
+import sys
+
 from flask import Flask, request, jsonify
 
+from .catalog import Catalog
+from .pricing import PricingError, format_total, price_stream
+
+# 幂等键与第四章的 /order 服务共用
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "第四章", "classTest"))
+from common.idempotency import HEADER, IdempotencyStore, idempotent
+
+# 随代码提供的默认价格目录
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+
 app = Flask(__name__)
+# 始终按 SKU 定价：CATALOG_PATH=catalog.json 指定目录文件，或 app.config["CATALOG"] = Catalog(...)
+app.config["CATALOG"] = Catalog(os.environ.get("CATALOG_PATH") or DEFAULT_CATALOG)
+idempotency = IdempotencyStore()
 
 @app.route("/checkout", methods=["POST"])
+@idempotent(idempotency)
 def checkout():
-    """结算接口: 计算购物车总价"""
-    items = request.get_json().get("items", [])
-    if not items:
+    """结算接口: 计算购物车总价（金额按分精确计算，请求体增量解析）"""
+    catalog = app.config.get("CATALOG")
+    if catalog is None:
+        return jsonify({"error": "价格目录未配置"}), 503
+    catalog.maybe_reload()
+    # 带幂等键的请求体已整体读入内存计算摘要，request.stream 已读完，改为解析缓存的请求体
+    stream = io.BytesIO(request.get_data()) if request.headers.get(HEADER) else request.stream
+    try:
+        cents, count = price_stream(stream, catalog=catalog)
+    except PricingError as e:
+        return jsonify({"error": str(e)}), 400
+    if not count:
         return jsonify({"error": "empty cart"}), 400
-    total = sum(i["price"] * i["quantity"] for i in items)
-    return jsonify({"total": total, "status": "ok"}), 200
+    return jsonify({"total": format_total(cents), "total_cents": cents, "status": "ok"}), 200
+
+@app.route("/idempotency/stats", methods=["GET"])
+def idempotency_stats():
+    """幂等缓存命中率与内存"""
+    return jsonify(idempotency.stats()), 200
 
 if __name__ == "__main__":
     app.run(port=5000, debug=False)
@@ -0,0 +1,246 @@
+"""
+购物车计价引擎 - 不依赖 Flask，可单独调用
+- 金额一律换算为整数“分”计算，JSON 中的小数按 Decimal 解析，不产生浮点误差
+- 大购物车按批计算：每批价格、数量转成数组后做乘法求和（有 numpy 时向量化）
+- iter_items 增量解析请求体，不必把几十 MB 的 JSON 一次读入内存
+"""
+import codecs
+import json
+import re
+from decimal import Decimal
+from itertools import islice
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:  # 没有 numpy 时逐行用 Python 整数计算
+    np = None
+
+# 单批乘积之和不超过该值时用 int64 计算不会溢出
+_INT64_SAFE = 2 ** 62
+
+# 直接使用 C 实现的 scan_once，省去 raw_decode 每次调用的包装开销
+_scan_once = json.JSONDecoder(parse_float=Decimal).scan_once
+_skip_ws = re.compile(r"[ \t\n\r]*").match
+
+
+class PricingError(ValueError):
+    """购物车数据不合法"""
+
+
+# 单价上限 10^12 元：更大的数按 Decimal 精确换算成分数（as_integer_ratio / int）要算上百万位，
+# 一个 "price": 1e10000000 就能占满 CPU 十几秒
+_MAX_ADJUSTED = 11
+_MAX_PRICE = 10 ** (_MAX_ADJUSTED + 1)
+# 单行数量上限：单价与数量都有上限，整单金额才不会被一个超大的 quantity 撑成上百位的整数
+MAX_QUANTITY = 10 ** 6
+
+
+def to_cents(price):
+    """价格（元）-> 整数分，超过两位小数或不小于 10^12 元视为不合法"""
+    kind = type(price)
+    if kind is int:
+        if 0 <= price < _MAX_PRICE:
+            return price * 100
+        raise PricingError(f"价格不合法: {price!r}")
+    value = price
+    if kind is not Decimal:
+        if isinstance(price, bool) or not isinstance(price, (int, Decimal, float, str)):
+            raise PricingError(f"价格不合法: {price!r}")
+        try:
+            value = Decimal(price if not isinstance(price, float) else repr(price))
+        except ArithmeticError:
+            raise PricingError(f"价格不合法: {price!r}")
+    # 先用数量级（最高位的指数，O(1)）排除过大、过小的数，再做精确换算；
+    # 非零的合法价格至少 0.01 元，数量级不小于 -2
+    if value.is_finite() and -3 < value.adjusted() <= _MAX_ADJUSTED:
+        # 约分后的分母整除 100 即不超过两位小数
+        num, den = value.as_integer_ratio()
+        if num >= 0 and 100 % den == 0:
+            return num * (100 // den)
+    elif value.is_zero():
+        return 0
+    raise PricingError(f"价格不合法: {price!r}")
+
+
+_get_price = itemgetter("price")
+_get_sku = itemgetter("sku")
+_get_quantity = itemgetter("quantity")
+
+
+def _batch_total(prices, quantities):
+    """一批商品的小计（分）"""
+    if np is not None and max(prices) * max(quantities) * len(prices) < _INT64_SAFE:
+        return int(np.dot(np.array(prices, dtype=np.int64), np.array(quantities, dtype=np.int64)))
+    return sum(p * q for p, q in zip(prices, quantities))
+
+
+def total_cents(items, batch_size=8192, catalog=None):
+    """
+    计算总价（分）
+    :param items: 商品可迭代对象，每项 {"price": 单价(元), "quantity": 数量}
+    :param catalog: 价格目录（见 catalog.Catalog）；给出时每项为 {"sku": ..., "quantity": ...}，
+                    单价与促销由服务端按 SKU 计算，带有 price 的商品行视为不合法
+    :return: (总价分, 商品行数)
+    """
+    key = "price" if catalog is None else "sku"
+    total = count = 0
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return total, count
+        try:
+            quantities = list(map(_get_quantity, batch))
+            if catalog is None:
+                prices = list(map(to_cents, map(_get_price, batch)))
+            else:
+                skus = list(map(_get_sku, batch))
+        except (KeyError, TypeError):
+            _raise_missing(batch, count, key)
+        if catalog is not None and any("price" in item for item in batch):
+            index = next(i for i, item in enumerate(batch, count + 1) if "price" in item)
+            raise PricingError(f"第 {index} 项带有客户端价格，价格由服务端按 SKU 计算")
+        # 整批检查数量类型与范围（bool 是 int 的子类，type 比较可以排除）
+        if set(map(type, quantities)) != {int} or min(quantities) <= 0 or max(quantities) > MAX_QUANTITY:
+            bad = next(q for q in quantities if type(q) is not int or not 0 < q <= MAX_QUANTITY)
+            raise PricingError(f"数量不合法: {bad!r}")
+        if catalog is None:
+            total += _batch_total(prices, quantities)
+        else:
+            total += catalog.price_lines(skus, quantities)
+        count += len(batch)
+
+
+def _raise_missing(batch, offset, key="price"):
+    for index, item in enumerate(batch, offset + 1):
+        if not isinstance(item, dict) or key not in item or "quantity" not in item:
+            raise PricingError(f"第 {index} 项缺少 {key} 或 quantity")
+    raise PricingError("购物车数据不合法")
+
+
+def format_total(cents):
+    """分 -> JSON 中的金额字符串，固定两位小数（如 "59.98"）；不转成浮点数，任意大小的金额都能原样还原"""
+    sign = "-" if cents < 0 else ""
+    yuan, fen = divmod(abs(cents), 100)
+    return f"{sign}{yuan}.{fen:02d}"
+
+
+class _Reader:
+    """按块读取并解码文本，提供跨块的 JSON 值解析"""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        if isinstance(chunk, bytes):
+            chunk = self.decoder.decode(chunk, final=self.eof)
+        # 丢弃已解析的部分，缓冲区只保留未处理的数据
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """跳过空白，返回下一个字符（结束时返回空串）"""
+        while True:
+            self.pos = _skip_ws(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise PricingError(f"请求体不是合法的JSON：期望 {char!r}")
+        self.pos += 1
+
+    def end(self):
+        """读过顶层对象的 "}"，之后只允许空白"""
+        self.pos += 1
+        if self.peek():
+            raise PricingError("请求体不是合法的JSON：结尾有多余内容")
+
+    def value(self):
+        """解析下一个 JSON 值；数字后必须还有字符或已到结尾，防止把被截断的数字当成完整值"""
+        self.peek()
+        while True:
+            try:
+                value, end = _scan_once(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except (StopIteration, ValueError):
+                if self.eof:
+                    raise PricingError("请求体不是合法的JSON")
+            self._fill()
+
+    def items(self):
+        """
+        逐个产出数组元素（已读过 "["）
+        缓冲区中最后一个 "}," 之前的元素拼成 "[...]" 一次解析；只有切分点恰好在元素边界时
+        这段文本才是合法的数组，否则（切在字符串或嵌套对象中）解析失败，退回逐个解析
+        """
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        failed = None
+        while True:
+            buf, pos = self.buf, self.pos
+            cut = buf.rfind("},", pos)
+            if cut > pos and buf is not failed:
+                try:
+                    values, _ = _scan_once("[" + buf[pos:cut + 1] + "]", 0)
+                except (StopIteration, ValueError):
+                    failed = buf
+                else:
+                    self.pos = cut + 2
+                    yield from values
+                    self.peek()
+                    continue
+            yield self.value()
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            self.expect(",")
+            self.peek()
+
+
+def iter_items(stream, chunk_size=65536):
+    """
+    增量解析 {"items": [...], ...} 请求体，逐个产出商品
+    :param stream: 二进制或文本文件对象（如 request.stream）
+    """
+    reader = _Reader(stream, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.end()
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise PricingError("请求体不是合法的JSON")
+        reader.expect(":")
+        if key == "items":
+            reader.expect("[")
+            yield from reader.items()
+        else:
+            reader.value()
+        if reader.peek() == "}":
+            reader.end()
+            return
+        reader.expect(",")
+
+
+def price_stream(stream, batch_size=8192, chunk_size=65536, catalog=None):
+    """解析请求体并计算总价，返回 (总价分, 商品行数)"""
+    return total_cents(iter_items(stream, chunk_size), batch_size, catalog)
@@ -0,0 +1,66 @@
+"""
+价格目录压测：不同目录规模下 /checkout 的延迟分位数
+- 目录 1 千 / 10 万 / 100 万个 SKU，其中 1% 带促销规则
+- 每次结算一个 50 行的购物车，通过 Flask 测试客户端发送
+运行: python bench_catalog.py
+"""
+import json
+import os
+import random
+import tempfile
+import time
+
+from app.catalog import Catalog
+from app.checkout_service import app
+
+SIZES = (1000, 100000, 1000000)
+REQUESTS = 2000
+CART_LINES = 50
+
+
+def build_catalog(path, size):
+    products = {f"SKU{i}": random.randint(100, 99999) / 100 for i in range(size)}
+    promotions = [{"sku": f"SKU{i}", "type": "percent", "value": 10} for i in range(0, size, 100)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"products": products, "promotions": promotions}, f)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    random.seed(1)
+    client = app.test_client()
+    print(f"每种规模 {REQUESTS} 次结算，每单 {CART_LINES} 行")
+    print(f"{'SKU 数':>10}{'加载s':>8}{'p50 ms':>10}{'p99 ms':>10}{'缓存命中率':>12}")
+    default = app.config["CATALOG"]
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            path = os.path.join(tmp, f"catalog{size}.json")
+            build_catalog(path, size)
+            start = time.perf_counter()
+            app.config["CATALOG"] = catalog = Catalog(path)
+            load_s = time.perf_counter() - start
+
+            # 热门商品占大部分订单
+            hot = [f"SKU{i}" for i in range(0, min(size, 2000))]
+            latencies = []
+            for _ in range(REQUESTS):
+                items = [{"sku": random.choice(hot) if random.random() < 0.8 else f"SKU{random.randrange(size)}",
+                          "quantity": random.randint(1, 5)} for _ in range(CART_LINES)]
+                body = json.dumps({"items": items})
+                start = time.perf_counter()
+                res = client.post("/checkout", data=body, content_type="application/json")
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert res.status_code == 200
+            info = catalog.cache_info()
+            hit_rate = info.hits / max(1, info.hits + info.misses)
+            print(f"{size:>10}{load_s:>8.2f}{percentile(latencies, 50):>10.3f}"
+                  f"{percentile(latencies, 99):>10.3f}{hit_rate:>12.1%}")
+    app.config["CATALOG"] = default
+
+
+if __name__ == "__main__":
+    main()
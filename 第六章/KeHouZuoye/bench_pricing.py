@@ -0,0 +1,50 @@
+"""
+计价引擎压测：原实现（整体 json.loads + 浮点求和） vs 计价引擎（增量解析 + 整数分 + 分批数组计算）
+运行: python bench_pricing.py
+"""
+import io
+import json
+import random
+import time
+import tracemalloc
+
+from app.pricing import price_stream, format_total
+
+LINES = 200000
+
+
+def float_total(body):
+    """原 checkout() 的计算方式"""
+    items = json.loads(body).get("items", [])
+    return sum(i["price"] * i["quantity"] for i in items)
+
+
+def measure(func, body, repeat=3):
+    """耗时取 repeat 次最小值；内存单独测一次（tracemalloc 会明显拖慢执行）"""
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(body)
+        elapsed.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, min(elapsed) * 1000, peak / 1024 / 1024
+
+
+def main():
+    random.seed(1)
+    items = [{"sku": f"SKU{i}", "price": random.randint(1, 99999) / 100, "quantity": random.randint(1, 50)}
+             for i in range(LINES)]
+    body = json.dumps({"items": items}).encode()
+    print(f"{LINES} 行购物车，请求体 {len(body) / 1024 / 1024:.1f} MB")
+
+    total, ms, mb = measure(float_total, body)
+    print(f"原实现      {ms:8.1f} ms  峰值内存 {mb:6.1f} MB  total={total!r}")
+    (cents, _), ms, mb = measure(lambda b: price_stream(io.BytesIO(b)), body)
+    print(f"计价引擎    {ms:8.1f} ms  峰值内存 {mb:6.1f} MB  total={format_total(cents)!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""价格目录测试"""
+import json
+import os
+import sqlite3
+import pytest
+from app.catalog import Catalog
+from app.checkout_service import app
+from app.pricing import PricingError, total_cents
+
+CATALOG = {
+    "products": {"PEN": 2.5, "BOOK": 39.9, "BAG": 120},
+    "promotions": [
+        {"sku": "PEN", "type": "bulk", "min_qty": 10, "price": 2},
+        {"sku": "BOOK", "type": "buy_x_get_y", "buy": 2, "free": 1},
+        {"sku": "BAG", "type": "percent", "value": 15}
+    ]
+}
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = str(tmp_path / "catalog.json")
+    write_json(path, CATALOG)
+    return Catalog(path, check_interval=0)
+
+@pytest.fixture
+def client(catalog):
+    """使用价格目录的Flask测试客户端"""
+    app.config['TESTING'] = True
+    default, app.config['CATALOG'] = app.config['CATALOG'], catalog
+    yield app.test_client()
+    app.config['CATALOG'] = default
+
+def test_resolve_and_promotions(catalog):
+    """测试1: 批量查询单价与三种促销规则"""
+    assert catalog.resolve(["PEN", "BOOK"]) == {"PEN": 250, "BOOK": 3990}
+    assert catalog.price_lines(["PEN"], [9]) == 2250
+    assert catalog.price_lines(["PEN"], [10]) == 2000
+    assert catalog.price_lines(["BOOK"], [3]) == 7980
+    assert catalog.price_lines(["BAG"], [1]) == 10200
+    with pytest.raises(PricingError):
+        catalog.resolve(["PEN", "NOPE"])
+
+def test_lru_cache_hits(catalog):
+    """测试2: 相同 (SKU, 数量) 的促销计算命中缓存"""
+    items = [{"sku": "PEN", "quantity": 12}, {"sku": "BAG", "quantity": 1}] * 50
+    assert total_cents(items, catalog=catalog) == ((24 + 102) * 100 * 50, 100)
+    info = catalog.cache_info()
+    assert info.misses == 2 and info.hits == 98
+
+def test_hot_reload(catalog, tmp_path):
+    """测试3: 文件变化后热加载，写坏的文件不影响旧目录"""
+    write_json(catalog.path, {"products": {"PEN": 3}})
+    os.utime(catalog.path, ns=(1, 1))
+    assert catalog.maybe_reload()
+    assert catalog.resolve(["PEN"]) == {"PEN": 300}
+    with open(catalog.path, "w") as f:
+        f.write('{"products": {"PEN": 4')
+    assert not catalog.maybe_reload()
+    assert catalog.last_error is not None
+    assert catalog.resolve(["PEN"]) == {"PEN": 300}
+
+def test_sqlite_catalog(tmp_path):
+    """测试4: 从 SQLite 加载目录"""
+    path = str(tmp_path / "catalog.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE products (sku TEXT PRIMARY KEY, price_cents INTEGER)")
+    conn.execute("CREATE TABLE promotions (sku TEXT, rule TEXT)")
+    conn.executemany("INSERT INTO products VALUES (?, ?)", [("PEN", 250), ("BOOK", 3990)])
+    conn.execute("INSERT INTO promotions VALUES ('BOOK', ?)", (json.dumps({"type": "percent", "value": 10}),))
+    conn.commit()
+    conn.close()
+    catalog = Catalog(path)
+    assert len(catalog) == 2
+    assert catalog.price_lines(["PEN", "BOOK"], [2, 1]) == 500 + 3591
+
+def test_checkout_uses_server_price(client):
+    """测试5: 结算按目录定价，带客户端价格的商品行与未知 SKU 返回400"""
+    res = client.post('/checkout', json={"items": [{"sku": "PEN", "quantity": 2},
+                                                   {"sku": "BOOK", "quantity": 1}]})
+    assert res.status_code == 200
+    assert res.json["total_cents"] == 500 + 3990
+    res = client.post('/checkout', json={"items": [{"sku": "PEN", "quantity": 2, "price": 0.01}]})
+    assert res.status_code == 400
+    assert "价格" in res.json["error"]
+    res = client.post('/checkout', json={"items": [{"sku": "GHOST", "quantity": 1}]})
+    assert res.status_code == 400
+    assert "GHOST" in res.json["error"]
+
+def test_default_catalog():
+    """测试6: 未配置目录时使用随代码提供的默认目录，客户端只传 price 的请求被拒绝"""
+    client = app.test_client()
+    assert len(app.config['CATALOG']) > 0
+    res = client.post('/checkout', json={"items": [{"sku": "BAG", "quantity": 1}]})
+    assert res.status_code == 200
+    assert res.json["total_cents"] == 10200
+    res = client.post('/checkout', json={"items": [{"price": 0.01, "quantity": 100}]})
+    assert res.status_code == 400
+
+def test_invalid_catalog(tmp_path):
+    """测试7: 促销规则或 SQLite 单价类型不对时加载即失败，不留到结算时出错"""
+    path = str(tmp_path / "catalog.json")
+    for rule in ({"type": "percent", "value": "15"}, {"type": "percent", "value": True},
+                 {"type": "bulk", "min_qty": "10", "price": 2}, {"type": "buy_x_get_y", "buy": 2.5, "free": 1}):
+        write_json(path, {"products": {"PEN": 2.5}, "promotions": [dict(rule, sku="PEN")]})
+        with pytest.raises(ValueError):
+            Catalog(path)
+
+    for i, price in enumerate(("250", 2.5, -1, 10 ** 14)):
+        path = str(tmp_path / f"catalog{i}.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE products (sku TEXT PRIMARY KEY, price_cents)")
+        conn.execute("INSERT INTO products VALUES ('PEN', ?)", (price,))
+        conn.commit()
+        conn.close()
+        with pytest.raises(ValueError):
+            Catalog(path)
@@ -1,18 +1,24 @@
 """购物车结算微服务测试"""
+import json
 import pytest
+from app.catalog import Catalog
 from app.checkout_service import app
 
 @pytest.fixture
-def client():
-    """Flask测试客户端"""
+def client(tmp_path):
+    """Flask测试客户端，使用只有三种商品、没有促销的测试目录"""
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps({"products": {"A": 20, "B": 15, "C": 10}}), encoding="utf-8")
     app.config['TESTING'] = True
-    return app.test_client()
+    default, app.config['CATALOG'] = app.config['CATALOG'], Catalog(str(path))
+    yield app.test_client()
+    app.config['CATALOG'] = default
 
 def test_checkout_total(client):
     """测试1: 单商品结算"""
-    res = client.post('/checkout', json={"items": [{"price": 20, "quantity": 3}]})
+    res = client.post('/checkout', json={"items": [{"sku": "A", "quantity": 3}]})
     assert res.status_code == 200
-    assert res.json["total"] == 60
+    assert res.json["total"] == "60.00"
     assert res.json["status"] == "ok"
 
 def test_checkout_empty_cart(client):
@@ -23,7 +29,19 @@ def test_checkout_empty_cart(client):
 
 def test_checkout_multiple_items(client):
     """测试3: 多商品结算"""
-    data = {"items": [{"price": 20, "quantity": 3}, {"price": 15, "quantity": 2}, {"price": 10, "quantity": 1}]}
+    data = {"items": [{"sku": "A", "quantity": 3}, {"sku": "B", "quantity": 2}, {"sku": "C", "quantity": 1}]}
     res = client.post('/checkout', json=data)
     assert res.status_code == 200
-    assert res.json["total"] == 100
+    assert res.json["total"] == "100.00"
+
+def test_checkout_idempotency_key(client):
+    """测试4: 相同幂等键的重试直接返回第一次的结果，同一个键换了购物车返回422"""
+    headers = {"Idempotency-Key": "checkout-001"}
+    data = {"items": [{"sku": "A", "quantity": 2}]}
+    first = client.post('/checkout', json=data, headers=headers)
+    again = client.post('/checkout', json=data, headers=headers)
+    assert first.status_code == again.status_code == 200
+    assert again.json == first.json and again.json["total_cents"] == 4000
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert client.post('/checkout', json={"items": [{"sku": "B", "quantity": 1}]}, headers=headers).status_code == 422
+    assert client.get('/idempotency/stats').json["hits"] >= 1
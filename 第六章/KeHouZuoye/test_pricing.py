@@ -0,0 +1,103 @@
+"""计价引擎测试"""
+import io
+import json
+from decimal import Decimal
+import pytest
+from app.catalog import Catalog
+from app.checkout_service import app
+from app.pricing import MAX_QUANTITY, PricingError, format_total, iter_items, price_stream, to_cents, total_cents
+
+@pytest.fixture
+def client(tmp_path):
+    """Flask测试客户端，使用带小数单价的测试目录"""
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps({"products": {"PEN": 19.99, "CLIP": 0.01}}), encoding="utf-8")
+    app.config['TESTING'] = True
+    default, app.config['CATALOG'] = app.config['CATALOG'], Catalog(str(path))
+    yield app.test_client()
+    app.config['CATALOG'] = default
+
+def test_exact_decimal_total():
+    """测试1: 小数金额按分精确累加，没有浮点误差"""
+    items = [{"price": 0.1, "quantity": 1}] * 3
+    assert sum(i["price"] * i["quantity"] for i in items) != 0.3
+    cents, count = total_cents(items)
+    assert (cents, count) == (30, 3)
+    assert format_total(cents) == "0.30"
+    assert to_cents("19.99") == 1999
+
+def test_invalid_items():
+    """测试2: 非法价格与数量"""
+    for item in ({"price": 1.999, "quantity": 1}, {"price": -1, "quantity": 1},
+                 {"price": 1, "quantity": 0}, {"price": 1, "quantity": 1.5}, {"quantity": 1}):
+        with pytest.raises(PricingError):
+            total_cents([item])
+
+def test_streaming_parser_small_chunks():
+    """测试3: 按很小的块增量解析，结果与一次解析相同"""
+    body = json.dumps({"coupon": {"code": "A"}, "items": [
+        {"price": 12.34, "quantity": 100}, {"price": 5, "quantity": 7, "name": "笔"}
+    ], "note": "x"}).encode()
+    items = list(iter_items(io.BytesIO(body), chunk_size=3))
+    assert [i["quantity"] for i in items] == [100, 7]
+    assert price_stream(io.BytesIO(body), chunk_size=1) == (123400 + 3500, 2)
+    with pytest.raises(PricingError):
+        price_stream(io.BytesIO(body[:-5]), chunk_size=3)
+
+def test_streaming_parser_tricky_items():
+    """测试4: 商品中含嵌套对象和 "}," 文本时仍能正确切分"""
+    items = [{"price": 1, "quantity": 1, "meta": {"tag": "a},{b"}, "note": "},"}] * 300
+    body = json.dumps({"items": items}).encode()
+    for chunk_size in (7, 100, 65536):
+        assert price_stream(io.BytesIO(body), chunk_size=chunk_size) == (30000, 300)
+
+def test_large_cart_batches():
+    """测试5: 大购物车分批计算与逐行计算一致"""
+    items = [{"price": (i % 997) / 100, "quantity": i % 13 + 1} for i in range(50000)]
+    expected = sum((i % 997) * (i % 13 + 1) for i in range(50000))
+    assert total_cents(items, batch_size=1000) == (expected, 50000)
+    body = json.dumps({"items": items}).encode()
+    assert price_stream(io.BytesIO(body)) == (expected, 50000)
+
+def test_checkout_decimal_and_errors(client):
+    """测试6: 接口返回精确金额，非法请求返回400"""
+    res = client.post('/checkout', json={"items": [{"sku": "PEN", "quantity": 3}, {"sku": "CLIP", "quantity": 1}]})
+    assert res.status_code == 200
+    assert res.json["total"] == "59.98"
+    assert res.json["total_cents"] == 5998
+    assert client.post('/checkout', json={}).json["error"] == "empty cart"
+    assert client.post('/checkout', data="{bad", content_type="application/json").status_code == 400
+    assert client.post('/checkout', json={"items": [{"sku": "PEN"}]}).status_code == 400
+
+def test_price_magnitude_limit():
+    """测试7: 过大 / 过小的数量级直接拒绝，不做精确换算（否则 1e10000000 要算十几秒）"""
+    for price in ("1e10000000", "1e-10000000", "1000000000000", "-1e10000000"):
+        with pytest.raises(PricingError):
+            price_stream(io.BytesIO(('{"items": [{"price": %s, "quantity": 1}]}' % price).encode()))
+    with pytest.raises(PricingError):
+        to_cents(10 ** 40)
+    assert to_cents("999999999999.99") == 99999999999999
+    assert price_stream(io.BytesIO(b'{"items": [{"price": 0E-10000000, "quantity": 2}]}')) == (0, 1)
+
+def test_exact_total_and_strict_body():
+    """测试8: 大额总价以字符串精确返回；请求体结尾的多余内容和超大数量返回错误"""
+    cents = (10 ** 12 - 1) * 100 + 99
+    assert format_total(cents) == "999999999999.99"
+    assert format_total(5) == "0.05" and format_total(0) == "0.00"
+    cents = total_cents([{"price": "999999999999.99", "quantity": MAX_QUANTITY}])[0]
+    assert Decimal(format_total(cents)) * 100 == cents
+    assert round(cents / 100 * 100) != cents  # 浮点数表示不了这么多位，末位已经不准
+    for body in (b'{"items": [{"price": 1, "quantity": 1}]} garbage', b'{"items": []}{}', b'{} x'):
+        with pytest.raises(PricingError):
+            price_stream(io.BytesIO(body), chunk_size=4)
+    assert price_stream(io.BytesIO(b'{"items": [{"price": 1, "quantity": 1}]}  \n')) == (100, 1)
+    with pytest.raises(PricingError):
+        total_cents([{"price": 1, "quantity": 10 ** 30}])
+    assert total_cents([{"price": 1, "quantity": MAX_QUANTITY}]) == (MAX_QUANTITY * 100, 1)
+
+def test_checkout_rejects_trailing_garbage(client):
+    """测试9: 接口对 JSON 之后带多余内容的请求体返回400，与 get_json 一致"""
+    body = '{"items": [{"sku": "PEN", "quantity": 1}]} garbage'
+    assert client.post('/checkout', data=body, content_type="application/json").status_code == 400
+    res = client.post('/checkout', json={"items": [{"sku": "PEN", "quantity": 10 ** 30}]})
+    assert res.status_code == 400
@@ -1,4 +1,5 @@
 # 初始化 app 包
-from .seat_lock import SeatLockSystem
+from .seat_lock import SeatLockSystem, AsyncSeatLockSystem
+from .seat_map import VenueLayout, DenseSeatMap, SparseSeatMap
 
-__all__ = ['SeatLockSystem']
+__all__ = ['SeatLockSystem', 'AsyncSeatLockSystem', 'VenueLayout', 'DenseSeatMap', 'SparseSeatMap']
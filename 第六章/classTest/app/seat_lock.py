@@ -1,37 +1,240 @@
 """座位锁定系统"""
+import asyncio
+import heapq
+import threading
 import time
 
 class SeatLockSystem:
-    """座位锁定系统 - 支持座位锁定、解锁和超时功能"""
-    
-    def __init__(self, timeout=60):
-        self.locked_seats = {}  # {seat_id: {"user": user, "expire": timestamp}}
+    """座位锁定系统 - 支持座位锁定、解锁和超时功能（线程安全）"""
+
+    def __init__(self, timeout=60, stripes=64, store=None):
+        """
+        :param timeout: 锁定超时秒数
+        :param stripes: 分段锁数量，座位按哈希分配到不同的段，不同段的座位可并行操作
+        :param store: 持久化存储（见 seat_store），启动时从中恢复未过期的锁；None 表示只在内存中
+        """
+        self.locked_seats = {}  # {seat_id: {"user": user, "expire": timestamp[, "token": 防护令牌]}}
         self.timeout = timeout
-    
-    def lock(self, seat_id, user):
-        """锁定座位，返回True表示成功，False表示已被锁定"""
+        self.store = store
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._expiry_heap = []  # 过期索引：[(expire, seat_id)]，解锁/重锁留下的旧条目在弹出时跳过
+        self._heap_lock = threading.Lock()
+        self._reaper = None
+        self._reaper_stop = threading.Event()
+        if store is not None:
+            now = time.time()
+            for seat_id, (user, expire) in store.load().items():
+                if expire > now:
+                    self._set(seat_id, user, expire)
+
+    def _stripe(self, seat_id):
+        """座位对应的分段锁"""
+        return self._stripes[hash(seat_id) % len(self._stripes)]
+
+    def lock(self, seat_id, user, token=None):
+        """
+        锁定座位，返回True表示成功，False表示已被锁定
+        :param token: 防护令牌，与锁记录一起保存；锁被释放、过期或被别人重新锁定后随记录一起失效
+        """
         now = time.time()
-        if seat_id in self.locked_seats and self.locked_seats[seat_id]["expire"] > now:
-            return False
-        self.locked_seats[seat_id] = {"user": user, "expire": now + self.timeout}
-        return True
-    
+        self._sweep(now, limit=64)
+        with self._stripe(seat_id):
+            if seat_id in self.locked_seats and self.locked_seats[seat_id]["expire"] > now:
+                return False
+            expire = now + self.timeout
+            self._log([{"op": "lock", "seat": seat_id, "user": user, "expire": expire}])
+            self._set(seat_id, user, expire, token)
+            return True
+
+    def try_lock_many(self, seat_ids, user):
+        """原子地锁定一组座位：全部成功返回True；任一座位已被锁定则一个都不锁，返回False"""
+        seat_ids = list(dict.fromkeys(seat_ids))
+        now = time.time()
+        self._sweep(now, limit=64)
+        # 按分段下标顺序加锁，避免与其他批量操作互相等待造成死锁
+        stripes = sorted({hash(seat_id) % len(self._stripes) for seat_id in seat_ids})
+        for index in stripes:
+            self._stripes[index].acquire()
+        try:
+            for seat_id in seat_ids:
+                info = self.locked_seats.get(seat_id)
+                if info is not None and info["expire"] > now:
+                    return False
+            expire = now + self.timeout
+            self._log([{"op": "lock", "seat": seat_id, "user": user, "expire": expire} for seat_id in seat_ids])
+            for seat_id in seat_ids:
+                self._set(seat_id, user, expire)
+            return True
+        finally:
+            for index in reversed(stripes):
+                self._stripes[index].release()
+
+    def _log(self, events, durable=True):
+        """先写持久化存储，成功后调用方再修改内存"""
+        if self.store is not None:
+            self.store.append(events, durable)
+
+    def _set(self, seat_id, user, expire, token=None):
+        """写入锁记录并登记过期索引（调用方需持有分段锁）"""
+        info = {"user": user, "expire": expire}
+        if token is not None:
+            info["token"] = token
+        self.locked_seats[seat_id] = info
+        with self._heap_lock:
+            heapq.heappush(self._expiry_heap, (expire, seat_id))
+
     def is_locked(self, seat_id):
         """检查座位是否锁定，自动清理过期锁"""
-        if seat_id not in self.locked_seats:
-            return False
-        if self.locked_seats[seat_id]["expire"] <= time.time():
-            del self.locked_seats[seat_id]
+        with self._stripe(seat_id):
+            if seat_id not in self.locked_seats:
+                return False
+            if self.locked_seats[seat_id]["expire"] <= time.time():
+                # 过期事件不必等待落盘：重放时过期的锁本来就会被丢弃
+                self._log([{"op": "expire", "seat": seat_id}], durable=False)
+                del self.locked_seats[seat_id]
+                return False
+            return True
+
+    def unlock(self, seat_id, token=None):
+        """解锁座位；给出令牌时只有令牌属于当前未过期的锁才解锁，避免旧持有者释放别人的锁"""
+        with self._stripe(seat_id):
+            if token is not None and not self._holds(seat_id, token):
+                return False
+            if seat_id in self.locked_seats:
+                self._log([{"op": "unlock", "seat": seat_id}])
+                del self.locked_seats[seat_id]
+                return True
             return False
-        return True
-    
-    def unlock(self, seat_id):
-        """解锁座位"""
-        if seat_id in self.locked_seats:
-            del self.locked_seats[seat_id]
+
+    def renew(self, seat_id, user, token=None):
+        """
+        续期：座位仍由 user 持有且未过期时把过期时间延长到 now + timeout，返回是否成功
+        :param token: 带防护令牌的锁必须给出同一个令牌；同一用户的旧持有者（令牌已过期作废）不能续上新锁
+        """
+        now = time.time()
+        with self._stripe(seat_id):
+            info = self.locked_seats.get(seat_id)
+            if info is None or info["user"] != user or info["expire"] <= now or info.get("token") != token:
+                return False
+            expire = now + self.timeout
+            self._log([{"op": "lock", "seat": seat_id, "user": user, "expire": expire}])
+            self._set(seat_id, user, expire, info.get("token"))
             return True
-        return False
-    
+
+    def validate(self, seat_id, token):
+        """令牌是否属于座位当前未过期的锁"""
+        with self._stripe(seat_id):
+            return self._holds(seat_id, token)
+
+    def _holds(self, seat_id, token):
+        """调用方需持有分段锁"""
+        info = self.locked_seats.get(seat_id)
+        return info is not None and info["expire"] > time.time() and info.get("token") == token
+
     def get_lock_info(self, seat_id):
         """获取座位锁定信息"""
-        return self.locked_seats.get(seat_id, {}).copy() if seat_id in self.locked_seats else None
+        with self._stripe(seat_id):
+            return self.locked_seats.get(seat_id, {}).copy() if seat_id in self.locked_seats else None
+
+    def sweep_expired(self, now=None):
+        """清理所有已过期的锁，返回清理数量（每个过期锁 O(log n)）"""
+        return self._sweep(time.time() if now is None else now)
+
+    def _sweep(self, now, limit=None):
+        """
+        从堆顶弹出到期条目；只删除当前确实已过期的锁
+        :param limit: 最多处理的条目数（lock 中顺带清理时限制单次耗时）
+        """
+        heap = self._expiry_heap
+        removed = 0
+        while limit is None or limit > 0:
+            # 查看堆顶和弹出都在堆锁内，其他线程并发弹出时不会读到空堆
+            with self._heap_lock:
+                if not heap or heap[0][0] > now:
+                    break
+                _, seat_id = heapq.heappop(heap)
+            # 不在持有堆锁时获取分段锁，保持“分段锁 -> 堆锁”的唯一加锁顺序
+            with self._stripe(seat_id):
+                info = self.locked_seats.get(seat_id)
+                if info is not None and info["expire"] <= now:
+                    self._log([{"op": "expire", "seat": seat_id}], durable=False)
+                    del self.locked_seats[seat_id]
+                    removed += 1
+            if limit is not None:
+                limit -= 1
+        # 大量解锁后堆中旧条目过多时重建，保证内存与当前锁数量成正比
+        if len(heap) > 2 * len(self.locked_seats) + 1024:
+            with self._heap_lock:
+                heap[:] = [(info["expire"], seat_id) for seat_id, info in list(self.locked_seats.items())]
+                heapq.heapify(heap)
+        return removed
+
+    def start_reaper(self, interval=1.0):
+        """启动后台清理线程，每 interval 秒清理一次过期锁"""
+        if self._reaper is not None:
+            return
+        self._reaper_stop.clear()
+
+        def run():
+            while not self._reaper_stop.wait(interval):
+                self.sweep_expired()
+
+        self._reaper = threading.Thread(target=run, name="seat-lock-reaper", daemon=True)
+        self._reaper.start()
+
+    def stop_reaper(self):
+        """停止后台清理线程"""
+        if self._reaper is not None:
+            self._reaper_stop.set()
+            self._reaper.join()
+            self._reaper = None
+
+    def close(self):
+        """停止后台清理线程并关闭持久化存储"""
+        self.stop_reaper()
+        if self.store is not None:
+            self.store.close()
+
+
+class AsyncSeatLockSystem:
+    """asyncio 接口 - 包装同一个 SeatLockSystem，可与线程代码共享座位状态"""
+
+    def __init__(self, system=None, **kwargs):
+        """
+        :param system: 已有的 SeatLockSystem，默认新建
+        :param kwargs: 新建时传给 SeatLockSystem 的参数
+        """
+        self.system = system if system is not None else SeatLockSystem(**kwargs)
+
+    async def _run(self, method, *args):
+        """
+        只在内存中时分段锁只持有微秒级，直接在事件循环中调用；
+        有持久化存储时每次加锁 / 解锁要写盘（可能 fsync），放到线程池执行，不阻塞其他协程
+        """
+        if self.system.store is None:
+            return method(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+    async def lock(self, seat_id, user, token=None):
+        return await self._run(self.system.lock, seat_id, user, token)
+
+    async def try_lock_many(self, seat_ids, user):
+        return await self._run(self.system.try_lock_many, seat_ids, user)
+
+    async def is_locked(self, seat_id):
+        return await self._run(self.system.is_locked, seat_id)
+
+    async def unlock(self, seat_id, token=None):
+        return await self._run(self.system.unlock, seat_id, token)
+
+    async def renew(self, seat_id, user, token=None):
+        return await self._run(self.system.renew, seat_id, user, token)
+
+    async def validate(self, seat_id, token):
+        return await self._run(self.system.validate, seat_id, token)
+
+    async def get_lock_info(self, seat_id):
+        return await self._run(self.system.get_lock_info, seat_id)
+
+    async def sweep_expired(self, now=None):
+        return await self._run(self.system.sweep_expired, now)
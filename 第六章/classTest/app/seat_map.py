@@ -0,0 +1,281 @@
+"""
+紧凑座位图 - 面向按编号排列的场馆（如 5 万座体育场）
+- VenueLayout: 分区 -> 连续的整数下标，座位号如 "B12"（B 区第 12 座）
+- DenseSeatMap: 用平行数组保存占用者编号和过期时间，整区查询用向量化扫描
+- SparseSeatMap: 锁定座位很少时只保存 __slots__ 记录，内存与锁数量成正比
+两者接口与 SeatLockSystem 一致（lock / unlock / is_locked / get_lock_info），
+另外提供 free_seats / count_locked 等整区查询。
+"""
+import re
+import threading
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # 没有 numpy 时退回标准库 array + 逐个比较
+    np = None
+
+_SEAT_ID = re.compile(r"^(.*?)(\d+)$")
+
+
+class SeatLock:
+    """稀疏存储中的一条锁记录"""
+
+    __slots__ = ("user", "expire")
+
+    def __init__(self, user, expire):
+        self.user = user
+        self.expire = expire
+
+    def __repr__(self):
+        return f"SeatLock(user={self.user!r}, expire={self.expire})"
+
+
+class VenueLayout:
+    """场馆布局：按顺序排列的分区，每区座位从 1 开始编号"""
+
+    def __init__(self, sections):
+        """
+        :param sections: {分区名: 座位数}，如 {"A": 500, "B": 800}
+        """
+        self.sections = {}  # {分区名: (起始下标, 结束下标)}
+        start = 0
+        for name, count in sections.items():
+            self.sections[name] = (start, start + count)
+            start += count
+        self.size = start
+
+    def index(self, seat_id):
+        """座位号 -> 下标，整数直接视为下标"""
+        if isinstance(seat_id, int):
+            if not 0 <= seat_id < self.size:
+                raise KeyError(seat_id)
+            return seat_id
+        m = _SEAT_ID.match(seat_id)
+        if m is None or m.group(1) not in self.sections:
+            raise KeyError(seat_id)
+        start, end = self.sections[m.group(1)]
+        number = int(m.group(2))
+        if not 1 <= number <= end - start:
+            raise KeyError(seat_id)
+        return start + number - 1
+
+    def seat_id(self, index):
+        """下标 -> 座位号"""
+        for name, (start, end) in self.sections.items():
+            if start <= index < end:
+                return f"{name}{index - start + 1}"
+        raise KeyError(index)
+
+    def bounds(self, section=None):
+        """分区的下标范围 [start, end)，None 表示全场"""
+        if section is None:
+            return 0, self.size
+        return self.sections[section]
+
+
+class _SeatMap:
+    """两种存储共用的部分：布局、加锁、接口"""
+
+    def __init__(self, layout, timeout=60):
+        self.layout = layout if isinstance(layout, VenueLayout) else VenueLayout(layout)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def lock(self, seat_id, user):
+        """锁定座位，返回True表示成功，False表示已被锁定"""
+        return self.try_lock_many([seat_id], user)
+
+    def try_lock_many(self, seat_ids, user):
+        """原子地锁定一组座位：全部成功返回True，否则一个都不锁"""
+        indexes = [self.layout.index(s) for s in seat_ids]
+        now = time.time()
+        with self._lock:
+            if any(self._expire_at(i) > now for i in indexes):
+                return False
+            for i in indexes:
+                self._set(i, user, now + self.timeout)
+            return True
+
+    def is_locked(self, seat_id):
+        """检查座位是否锁定（过期视为未锁定）"""
+        return self._expire_at(self.layout.index(seat_id)) > time.time()
+
+    def unlock(self, seat_id):
+        """解锁座位"""
+        i = self.layout.index(seat_id)
+        with self._lock:
+            if self._expire_at(i) <= time.time():
+                return False
+            self._clear(i)
+            return True
+
+    def get_lock_info(self, seat_id):
+        """获取座位锁定信息 {"user": ..., "expire": ...}（与 SeatLockSystem 相同的新字典），未锁定或已过期返回None"""
+        i = self.layout.index(seat_id)
+        with self._lock:
+            return self._record(i, time.time())
+
+    def free_seat_ids(self, section=None, now=None):
+        """空闲座位号列表"""
+        return [self.layout.seat_id(i) for i in self.free_seats(section, now)]
+
+
+class DenseSeatMap(_SeatMap):
+    """平行数组存储：owner[i] 为占用者编号（0 表示无人），expire[i] 为过期时间"""
+
+    def __init__(self, layout, timeout=60):
+        super().__init__(layout, timeout)
+        size = self.layout.size
+        if np is not None:
+            self.owner = np.zeros(size, dtype=np.int32)
+            self.expire = np.zeros(size, dtype=np.float64)
+        else:
+            self.owner = array("i", bytes(4 * size))
+            self.expire = array("d", bytes(8 * size))
+        # 占用者编号按引用计数回收：没有座位（包括已过期未清理的座位）引用时释放，编号留给新用户复用，
+        # 所以编号表的大小不超过座位数，不会随长期运行中出现过的用户数增长
+        self._users = [None]  # 占用者编号 -> 用户
+        self._refs = [0]      # 占用者编号 -> 引用它的座位数
+        self._user_ids = {}   # 用户 -> 占用者编号
+        self._free_uids = []  # 已释放、可复用的编号
+
+    def _expire_at(self, i):
+        return float(self.expire[i])
+
+    def _acquire_uid(self, user):
+        uid = self._user_ids.get(user)
+        if uid is None:
+            if self._free_uids:
+                uid = self._free_uids.pop()
+                self._users[uid] = user
+            else:
+                uid = len(self._users)
+                self._users.append(user)
+                self._refs.append(0)
+            self._user_ids[user] = uid
+        self._refs[uid] += 1
+        return uid
+
+    def _release_uid(self, uid, count=1):
+        if not uid:
+            return
+        self._refs[uid] -= count
+        if self._refs[uid] == 0:
+            del self._user_ids[self._users[uid]]
+            self._users[uid] = None
+            self._free_uids.append(uid)
+
+    def _set(self, i, user, expire):
+        old = int(self.owner[i])
+        self.owner[i] = self._acquire_uid(user)
+        self.expire[i] = expire
+        self._release_uid(old)
+
+    def _clear(self, i):
+        old = int(self.owner[i])
+        self.owner[i] = 0
+        self.expire[i] = 0.0
+        self._release_uid(old)
+
+    def _record(self, i, now):
+        expire = float(self.expire[i])
+        return {"user": self._users[self.owner[i]], "expire": expire} if expire > now else None
+
+    def free_seats(self, section=None, now=None):
+        """空闲座位下标（未锁定或已过期）"""
+        start, end = self.layout.bounds(section)
+        now = time.time() if now is None else now
+        if np is not None:
+            return (np.flatnonzero(self.expire[start:end] <= now) + start).tolist()
+        return [i for i in range(start, end) if self.expire[i] <= now]
+
+    def count_locked(self, section=None, now=None):
+        """锁定中的座位数"""
+        start, end = self.layout.bounds(section)
+        now = time.time() if now is None else now
+        if np is not None:
+            return int(np.count_nonzero(self.expire[start:end] > now))
+        return sum(1 for i in range(start, end) if self.expire[i] > now)
+
+    def seats_of(self, user, now=None):
+        """某用户锁定中的座位下标"""
+        uid = self._user_ids.get(user)
+        if uid is None:
+            return []
+        now = time.time() if now is None else now
+        if np is not None:
+            return np.flatnonzero((self.owner == uid) & (self.expire > now)).tolist()
+        return [i for i in range(self.layout.size) if self.owner[i] == uid and self.expire[i] > now]
+
+    def sweep_expired(self, now=None):
+        """把过期座位的占用者清零，返回清理数量（过期座位本就视为空闲，这里只是整理数据）"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if np is not None:
+                expired = (self.expire <= now) & (self.owner != 0)
+                uids, counts = np.unique(self.owner[expired], return_counts=True)
+                self.owner[expired] = 0
+                self.expire[expired] = 0.0
+                for uid, count in zip(uids.tolist(), counts.tolist()):
+                    self._release_uid(uid, count)
+                return int(counts.sum())
+            removed = 0
+            for i in range(self.layout.size):
+                if self.owner[i] and self.expire[i] <= now:
+                    self._clear(i)
+                    removed += 1
+            return removed
+
+
+class SparseSeatMap(_SeatMap):
+    """稀疏存储：{下标: SeatLock}，适合锁定座位远少于总座位的场馆"""
+
+    def __init__(self, layout, timeout=60):
+        super().__init__(layout, timeout)
+        self.locked = {}
+
+    def _expire_at(self, i):
+        record = self.locked.get(i)
+        return record.expire if record is not None else 0.0
+
+    def _set(self, i, user, expire):
+        self.locked[i] = SeatLock(user, expire)
+
+    def _clear(self, i):
+        self.locked.pop(i, None)
+
+    def _record(self, i, now):
+        record = self.locked.get(i)
+        if record is None or record.expire <= now:
+            return None
+        return {"user": record.user, "expire": record.expire}
+
+    def _locked_in(self, start, end, now):
+        return {i for i, r in list(self.locked.items()) if start <= i < end and r.expire > now}
+
+    def free_seats(self, section=None, now=None):
+        """空闲座位下标（未锁定或已过期）"""
+        start, end = self.layout.bounds(section)
+        locked = self._locked_in(start, end, time.time() if now is None else now)
+        return [i for i in range(start, end) if i not in locked]
+
+    def count_locked(self, section=None, now=None):
+        """锁定中的座位数"""
+        start, end = self.layout.bounds(section)
+        return len(self._locked_in(start, end, time.time() if now is None else now))
+
+    def seats_of(self, user, now=None):
+        """某用户锁定中的座位下标"""
+        now = time.time() if now is None else now
+        return sorted(i for i, r in list(self.locked.items()) if r.user == user and r.expire > now)
+
+    def sweep_expired(self, now=None):
+        """删除过期记录，返回清理数量"""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [i for i, r in self.locked.items() if r.expire <= now]
+            for i in expired:
+                del self.locked[i]
+            return len(expired)
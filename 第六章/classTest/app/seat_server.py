@@ -0,0 +1,307 @@
+"""
+座位锁服务 - 多个订票进程共享同一份座位锁
+- SeatLockServer: asyncio 服务，通过本地 TCP 或 Unix socket 提供 SeatLockSystem 的接口
+- SeatLockClient: 同步客户端，可直接替换 SeatLockSystem
+- 协议为一行一个 JSON：{"id": 1, "op": "lock", "args": [...]} -> {"id": 1, "result": ...}
+  同一连接上可连续发送多个请求（流水线），服务端按顺序返回
+- 续期：renew 延长仍由自己持有的锁；带令牌的锁按令牌续期
+- 防护令牌（fencing token）：lock_with_token 返回单调递增的令牌，下游用 validate 拒绝已失去锁的旧持有者
+
+运行方式：
+    python -m app.seat_server --port 7070 --store seats.log
+    python -m app.seat_server --unix /tmp/seat_lock.sock
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import socket
+import threading
+import time
+
+from .seat_lock import SeatLockSystem
+
+
+class SeatLockServer:
+    """座位锁服务端"""
+
+    def __init__(self, system=None, host="127.0.0.1", port=0, path=None):
+        """
+        :param system: 共享的 SeatLockSystem，默认新建
+        :param port: TCP 端口，0 表示自动分配
+        :param path: Unix socket 路径，给出时忽略 host/port
+        """
+        self.system = system if system is not None else SeatLockSystem()
+        self.host = host
+        self.port = port
+        self.path = path
+        # 令牌从启动时刻的微秒数开始递增，服务重启后仍大于之前发出的令牌；
+        # 有持久化存储时请求在线程池中执行，count 的 next 不会被线程打断，令牌不会重复
+        self._tokens = itertools.count(time.time_ns() // 1000 + 1)
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._ops = {
+            "lock": self.system.lock,
+            "try_lock_many": self.system.try_lock_many,
+            "is_locked": self.system.is_locked,
+            "unlock": self.system.unlock,
+            "renew": self.system.renew,
+            "get_lock_info": self.system.get_lock_info,
+            "sweep_expired": self.system.sweep_expired,
+            "lock_with_token": self.lock_with_token,
+            "validate": self.system.validate,
+        }
+
+    def lock_with_token(self, seat_id, user):
+        """
+        加锁成功返回防护令牌，失败返回None
+        令牌保存在锁记录中：解锁、过期或别人重新加锁（包括普通 lock）都会让旧令牌失效
+        """
+        token = next(self._tokens)
+        return token if self.system.lock(seat_id, user, token) else None
+
+    def _dispatch(self, line):
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            return {"id": None, "error": "请求必须是JSON对象"}
+        response = {"id": request.get("id")}
+        op = self._ops.get(request.get("op"))
+        if op is None:
+            response["error"] = f"未知操作: {request.get('op')}"
+            return response
+        try:
+            response["result"] = op(*request.get("args", []))
+        except Exception as e:
+            response["error"] = f"{type(e).__name__}: {e}"
+        return response
+
+    async def _run(self, line):
+        """
+        只在内存中时直接在事件循环中处理；有持久化存储时放到线程池，
+        不同连接的写入可以同时等待落盘（组提交合并 fsync），也不会阻塞事件循环
+        """
+        if self.system.store is None:
+            return self._dispatch(line)
+        return await asyncio.get_running_loop().run_in_executor(None, self._dispatch, line)
+
+    async def _handle(self, reader, writer):
+        """逐行处理请求，客户端可以不等响应连续发送（流水线）；同一连接上的请求按顺序执行"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self._run(line)
+                except ValueError:
+                    response = {"id": None, "error": "请求不是合法的JSON"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        """在当前事件循环中启动监听，返回地址"""
+        if self.path:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        return self.address
+
+    @property
+    def address(self):
+        """TCP 为 (host, port)，Unix socket 为路径"""
+        if self.path:
+            return self.path
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self):
+        """在后台线程中运行服务（测试或单进程内使用），返回地址"""
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="seat-lock-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.address
+
+    def stop(self):
+        """停止后台线程中的服务"""
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+
+class SeatLockError(Exception):
+    """服务端返回的错误"""
+
+
+class SeatLockClient:
+    """座位锁客户端，接口与 SeatLockSystem 相同"""
+
+    def __init__(self, address, timeout=5.0):
+        """
+        :param address: (host, port) 或 Unix socket 路径
+        """
+        if isinstance(address, str):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock.settimeout(timeout)
+        self._sock.connect(address if isinstance(address, str) else tuple(address))
+        self._file = self._sock.makefile("rb")
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def _call_many(self, calls, batch=512):
+        """
+        连续发送多个请求再按顺序读取结果
+        :param batch: 每批请求数，读完一批响应再发下一批，避免双方发送缓冲区都写满而互相等待
+        """
+        responses = []
+        with self._lock:
+            if self._sock.fileno() == -1:
+                raise ConnectionError("连接已关闭")
+            try:
+                for start in range(0, len(calls), batch):
+                    chunk = calls[start:start + batch]
+                    first = self._next_id + 1
+                    data = b"".join(
+                        json.dumps({"id": first + i, "op": op, "args": list(args)}).encode() + b"\n"
+                        for i, (op, args) in enumerate(chunk)
+                    )
+                    self._next_id += len(chunk)
+                    self._sock.sendall(data)
+                    for i in range(len(chunk)):
+                        line = self._file.readline()
+                        if not line:
+                            raise ConnectionError("座位锁服务已断开")
+                        response = json.loads(line)
+                        if response.get("id") != first + i:
+                            raise ConnectionError(f"响应编号不匹配: 期望 {first + i}，收到 {response.get('id')}")
+                        responses.append(response)
+            except (OSError, ValueError):
+                # 超时或响应错位后，连接上可能还有迟到的响应，继续使用会把结果交给错误的调用，直接断开
+                self.close()
+                raise
+        results = []
+        for response in responses:
+            if "error" in response:
+                raise SeatLockError(response["error"])
+            results.append(response["result"])
+        return results
+
+    def _call(self, op, *args):
+        return self._call_many([(op, args)])[0]
+
+    def lock(self, seat_id, user):
+        return self._call("lock", seat_id, user)
+
+    def try_lock_many(self, seat_ids, user):
+        return self._call("try_lock_many", list(seat_ids), user)
+
+    def is_locked(self, seat_id):
+        return self._call("is_locked", seat_id)
+
+    def unlock(self, seat_id, token=None):
+        return self._call("unlock", seat_id, token)
+
+    def renew(self, seat_id, user, token=None):
+        return self._call("renew", seat_id, user, token)
+
+    def get_lock_info(self, seat_id):
+        return self._call("get_lock_info", seat_id)
+
+    def sweep_expired(self):
+        return self._call("sweep_expired")
+
+    def lock_with_token(self, seat_id, user):
+        return self._call("lock_with_token", seat_id, user)
+
+    def validate(self, seat_id, token):
+        return self._call("validate", seat_id, token)
+
+    def pipeline(self):
+        """批量请求：pipe = client.pipeline(); pipe.lock(...); pipe.is_locked(...); pipe.execute()"""
+        return _Pipeline(self)
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Pipeline:
+    """收集请求，execute 时一次发送"""
+
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, op):
+        def queue(*args):
+            self._calls.append((op, args))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return self._client._call_many(calls) if calls else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="座位锁服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7070)
+    parser.add_argument("--unix", help="Unix socket 路径")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--store", help="持久化日志路径")
+    args = parser.parse_args()
+
+    store = None
+    if args.store:
+        from .seat_store import LogSeatStore
+        # 请求在线程池中执行，多个连接同时加锁时组提交把它们的 fsync 合并为一次
+        store = LogSeatStore(args.store, sync="group")
+    system = SeatLockSystem(timeout=args.timeout, store=store)
+    system.start_reaper()
+    server = SeatLockServer(system, args.host, args.port, args.unix)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        system.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+座位锁持久化存储 - 进程重启后恢复未过期的锁
+- LogSeatStore: 追加写日志（每行一个 lock/unlock/expire 事件），定期压缩为快照，启动时重放
+- SQLiteSeatStore: 每个锁一行的 SQLite 表
+SeatLockSystem(store=...) 在修改内存之前先写存储（先写日志），写失败时内存状态不变。
+座位号与用户保持原类型恢复：整数仍是整数，元组座位号如 ("A", 12) 仍是元组（JSON 中记为 {"__tuple__": [...]}）。
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def _to_json(value):
+    """元组 -> {"__tuple__": [...]}，JSON 默认会把元组写成列表，重放后无法再作为字典键"""
+    if type(value) is tuple:
+        return {"__tuple__": [_to_json(v) for v in value]}
+    return value
+
+
+def _from_json(value):
+    if type(value) is dict and "__tuple__" in value:
+        return tuple(_from_json(v) for v in value["__tuple__"])
+    return value
+
+
+def _encode_event(event):
+    """日志中的一行"""
+    if type(event["seat"]) is tuple or type(event.get("user")) is tuple:
+        event = dict(event, seat=_to_json(event["seat"]))
+        if "user" in event:
+            event["user"] = _to_json(event["user"])
+    return json.dumps(event).encode() + b"\n"
+
+
+def _decode_event(line):
+    event = json.loads(line)
+    event["seat"] = _from_json(event["seat"])
+    if "user" in event:
+        event["user"] = _from_json(event["user"])
+    return event
+
+
+class LogSeatStore:
+    """追加写日志 + 快照"""
+
+    def __init__(self, path, sync="group", snapshot_every=10000):
+        """
+        :param path: 日志文件路径，快照保存在 path + ".snap"
+        :param sync: "always" 每次写入都 fsync；"group" 并发写入共享一次 fsync（组提交）；
+                     "none" 只写入操作系统缓冲，进程崩溃不丢、断电可能丢
+        :param snapshot_every: 日志累计多少条事件后压缩为快照
+        """
+        if sync not in ("always", "group", "none"):
+            raise ValueError(f"未知的同步方式: {sync}")
+        self.path = path
+        self.snapshot_path = path + ".snap"
+        self.sync = sync
+        self.snapshot_every = snapshot_every
+        self.state = {}  # {seat_id: (user, expire)}，与日志内容一致，压缩时直接写出
+        self._cond = threading.Condition()
+        self._written = 0   # 已写入的事件批次序号
+        self._synced = 0    # 已落盘的批次序号
+        self._syncing = False
+        self._log_size = 0
+        self._file = None
+
+    def load(self):
+        """读取快照并重放日志，返回 {seat_id: (user, expire)}"""
+        self.state = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                for seat_id, user, expire in json.load(f)["seats"]:
+                    self.state[_from_json(seat_id)] = (_from_json(user), expire)
+        good = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        self._apply(_decode_event(line))
+                    except ValueError:
+                        break  # 崩溃时写了一半的最后一行，丢弃
+                    good += len(line)
+                    self._log_size += 1
+        self._file = open(self.path, "ab")
+        self._file.truncate(good)
+        return dict(self.state)
+
+    def _apply(self, event):
+        op, seat_id = event["op"], event["seat"]
+        if op == "lock":
+            self.state[seat_id] = (event["user"], event["expire"])
+        elif op in ("unlock", "expire"):
+            self.state.pop(seat_id, None)
+        else:
+            raise ValueError(f"未知的日志事件: {op}")
+
+    def append(self, events, durable=True):
+        """
+        追加一批事件，返回时已按 sync 方式落盘
+        :param events: [{"op": "lock", "seat": ..., "user": ..., "expire": ...}, {"op": "unlock", "seat": ...}]
+        :param durable: False 时不等待 fsync（用于过期清理，重放时过期锁本来就会被丢弃）
+        """
+        data = b"".join(map(_encode_event, events))
+        with self._cond:
+            self._file.write(data)
+            self._file.flush()
+            for event in events:
+                self._apply(event)
+            self._log_size += len(events)
+            self._written += 1
+            ticket = self._written
+            if self._log_size >= self.snapshot_every:
+                self._compact()
+                return
+            if not durable or self.sync == "none":
+                return
+            if self.sync == "always":
+                os.fsync(self._file.fileno())
+                self._synced = ticket
+                return
+            self._wait_synced(ticket)
+
+    def _wait_synced(self, ticket):
+        """组提交：没有线程在 fsync 时自己负责 fsync，一次覆盖此前所有已写入的批次"""
+        while self._synced < ticket:
+            if self._syncing:
+                self._cond.wait()
+                continue
+            self._syncing = True
+            target = self._written
+            fd = self._file.fileno()
+            self._cond.release()
+            try:
+                os.fsync(fd)
+            finally:
+                self._cond.acquire()
+                self._syncing = False
+            self._synced = max(self._synced, target)
+            self._cond.notify_all()
+
+    def _compact(self):
+        """把当前状态写成快照并清空日志（调用方持有 _cond）"""
+        now = time.time()
+        seats = [[seat_id, user, expire] for seat_id, (user, expire) in self.state.items() if expire > now]
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seats": [[_to_json(seat_id), _to_json(user), expire] for seat_id, user, expire in seats]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # 快照已落盘后再清空日志；两步之间崩溃时日志会在快照上重放一遍，结果相同
+        self._file.truncate(0)
+        self._file.seek(0)
+        os.fsync(self._file.fileno())
+        self.state = {seat_id: (user, expire) for seat_id, user, expire in seats}
+        self._log_size = 0
+        self._synced = self._written
+        self._cond.notify_all()
+
+    def compact(self):
+        """立即压缩"""
+        with self._cond:
+            self._compact()
+
+    def close(self):
+        if self._file is not None:
+            with self._cond:
+                self._file.flush()
+                if self.sync != "none":
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+
+def _encode(value):
+    """SQLite 列值：元组编码为 JSON 字节串（BLOB 与整数 / 字符串键不会冲突）"""
+    if type(value) is tuple:
+        return json.dumps(_to_json(value)).encode()
+    return value
+
+
+def _decode(value):
+    if type(value) is bytes:
+        return _from_json(json.loads(value))
+    return value
+
+
+class SQLiteSeatStore:
+    """SQLite 存储：seat_locks 表每个锁一行"""
+
+    def __init__(self, path, synchronous="FULL"):
+        """
+        :param synchronous: FULL 每次提交都落盘；NORMAL 在 WAL 模式下由检查点落盘，更快但断电可能丢最近的提交
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        # seat_id、user 不声明类型，整数与字符串按原类型保存；元组编码为 JSON 存成 BLOB
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seat_locks (seat_id PRIMARY KEY, user, expire REAL)")
+
+    def load(self):
+        """删除已过期的行并返回 {seat_id: (user, expire)}"""
+        with self._lock:
+            self._conn.execute("DELETE FROM seat_locks WHERE expire <= ?", (time.time(),))
+            rows = self._conn.execute("SELECT seat_id, user, expire FROM seat_locks").fetchall()
+        return {_decode(seat_id): (_decode(user), expire) for seat_id, user, expire in rows}
+
+    def append(self, events, durable=True):
+        """在一个事务中应用一批事件"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for e in events:
+                    if e["op"] == "lock":
+                        self._conn.execute("INSERT OR REPLACE INTO seat_locks VALUES (?, ?, ?)",
+                                           (_encode(e["seat"]), _encode(e["user"]), e["expire"]))
+                    else:
+                        self._conn.execute("DELETE FROM seat_locks WHERE seat_id = ?", (_encode(e["seat"]),))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def compact(self):
+        """清理过期行"""
+        with self._lock:
+            self._conn.execute("DELETE FROM seat_locks WHERE expire <= ?", (time.time(),))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,65 @@
+"""
+座位锁并发压测
+- 多线程同时抢同一批座位：验证每个座位只有一个赢家
+- 对比 stripes=1（相当于一把全局锁）与分段锁的吞吐量
+运行: python bench_seat_lock.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.seat_lock import SeatLockSystem
+
+THREADS = 8
+SEATS = 2000
+ROUNDS = 5
+
+
+def contend(system, threads=THREADS, seats=SEATS):
+    """所有线程按相同顺序抢同一批座位，返回 (每个座位的赢家数, 耗时秒)"""
+    winners = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        user = f"user{index}"
+        barrier.wait()
+        for seat in range(seats):
+            if system.lock(f"S{seat}", user):
+                winners[index].append(seat)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    counts = [0] * seats
+    for won in winners:
+        for seat in won:
+            counts[seat] += 1
+    return counts, elapsed
+
+
+def bench(stripes):
+    ops, seconds = 0, 0.0
+    for _ in range(ROUNDS):
+        counts, elapsed = contend(SeatLockSystem(stripes=stripes))
+        assert all(c == 1 for c in counts), "出现重复锁定或漏锁"
+        ops += THREADS * SEATS
+        seconds += elapsed
+    return ops / seconds
+
+
+def main():
+    print(f"{THREADS} 线程 x {SEATS} 座位 x {ROUNDS} 轮，每个座位恰好一个赢家")
+    for stripes in (1, 64):
+        print(f"stripes={stripes:<3} {bench(stripes):>12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
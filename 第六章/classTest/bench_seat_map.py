@@ -0,0 +1,68 @@
+"""
+5 万座场馆压测：SeatLockSystem vs DenseSeatMap vs SparseSeatMap
+- 内存：锁定一半座位后的内存占用（tracemalloc）
+- 整区查询：某分区的空闲座位 / 全场锁定数量
+运行: python bench_seat_map.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.seat_lock import SeatLockSystem
+from app.seat_map import VenueLayout, DenseSeatMap, SparseSeatMap
+
+LAYOUT = VenueLayout({name: 10000 for name in "ABCDE"})
+REPEAT = 20
+
+
+def build(factory):
+    """锁定一半座位，返回 (系统, 占用内存MB)"""
+    tracemalloc.start()
+    system = factory()
+    for i in range(0, LAYOUT.size, 2):
+        system.lock(LAYOUT.seat_id(i), f"user{i % 1000}")
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return system, size / 1024 / 1024
+
+
+def free_in_b_dict(system):
+    """SeatLockSystem 只能逐个座位查询"""
+    start, end = LAYOUT.bounds("B")
+    return [i for i in range(start, end) if not system.is_locked(LAYOUT.seat_id(i))]
+
+
+def count_locked_dict(system):
+    return sum(1 for i in range(LAYOUT.size) if system.is_locked(LAYOUT.seat_id(i)))
+
+
+def timed(func):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func()
+    return result, (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    print(f"{LAYOUT.size} 座位，锁定一半；查询耗时为 {REPEAT} 次平均")
+    print(f"{'实现':<16}{'内存MB':>10}{'B区空闲ms':>14}{'锁定总数ms':>14}")
+    cases = [
+        ("SeatLockSystem", SeatLockSystem, free_in_b_dict, count_locked_dict),
+        ("DenseSeatMap", lambda: DenseSeatMap(LAYOUT),
+         lambda s: s.free_seats("B"), lambda s: s.count_locked()),
+        ("SparseSeatMap", lambda: SparseSeatMap(LAYOUT),
+         lambda s: s.free_seats("B"), lambda s: s.count_locked()),
+    ]
+    for name, factory, free_query, count_query in cases:
+        system, memory = build(factory)
+        free, free_ms = timed(lambda: free_query(system))
+        count, count_ms = timed(lambda: count_query(system))
+        assert len(free) == 5000 and count == LAYOUT.size // 2
+        print(f"{name:<16}{memory:>10.2f}{free_ms:>14.3f}{count_ms:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
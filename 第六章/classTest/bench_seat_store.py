@@ -0,0 +1,60 @@
+"""
+持久化座位锁压测：每秒加锁次数
+- 纯内存 / 日志不 fsync / 日志每次 fsync / 日志组提交 / SQLite
+- 单线程与多线程分别测试（组提交只有在并发写入时才能合并 fsync）
+运行: python bench_seat_store.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.seat_lock import SeatLockSystem
+from app.seat_store import LogSeatStore, SQLiteSeatStore
+
+OPS = 2000
+
+
+def run(store, threads):
+    """threads 个线程共加锁 OPS 个不同座位，返回 locks/s"""
+    system = SeatLockSystem(store=store)
+    per_thread = OPS // threads
+
+    def worker(t):
+        for i in range(per_thread):
+            system.lock(f"T{t}-{i}", f"user{t}")
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    system.close()
+    return per_thread * threads / elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [
+            ("内存", lambda n: None),
+            ("日志 sync=none", lambda n: LogSeatStore(os.path.join(tmp, f"none{n}.log"), sync="none")),
+            ("日志 sync=always", lambda n: LogSeatStore(os.path.join(tmp, f"always{n}.log"), sync="always")),
+            ("日志 sync=group", lambda n: LogSeatStore(os.path.join(tmp, f"group{n}.log"), sync="group")),
+            ("SQLite FULL", lambda n: SQLiteSeatStore(os.path.join(tmp, f"full{n}.db"))),
+            ("SQLite NORMAL", lambda n: SQLiteSeatStore(os.path.join(tmp, f"normal{n}.db"), synchronous="NORMAL")),
+        ]
+        print(f"每种方式加锁 {OPS} 次")
+        print(f"{'存储':<20}{'1 线程 locks/s':>16}{'16 线程 locks/s':>18}")
+        for name, factory in cases:
+            single = run(factory(1), 1)
+            multi = run(factory(16), 16)
+            print(f"{name:<20}{single:>16,.0f}{multi:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
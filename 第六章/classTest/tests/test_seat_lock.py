@@ -1,5 +1,7 @@
 """座位锁定系统测试"""
-from app.seat_lock import SeatLockSystem
+from app.seat_lock import SeatLockSystem, AsyncSeatLockSystem
+import asyncio
+import threading
 import time
 
 def test_lock_and_expire():
@@ -40,3 +42,124 @@ def test_multiple_seats():
     assert s.is_locked("A1") and s.is_locked("B2") and s.is_locked("C3")
     s.unlock("B2")
     assert s.is_locked("A1") and not s.is_locked("B2") and s.is_locked("C3")
+
+def test_sweep_expired():
+    """测试6: 批量清理过期锁，不影响未过期的锁"""
+    s = SeatLockSystem(timeout=60)
+    for i in range(100):
+        s.lock(f"S{i}", "user1")
+    s.lock("VIP", "user2")
+    s.unlock("S0")
+    assert s.sweep_expired(now=time.time() + 30) == 0
+    assert s.sweep_expired(now=time.time() + 61) == 100
+    assert s.locked_seats == {}
+
+def test_expiry_heap_bounded():
+    """测试7: 反复锁定/解锁时过期索引不会无限增长"""
+    s = SeatLockSystem(timeout=60)
+    for i in range(20000):
+        s.lock("A1", f"user{i}")
+        s.unlock("A1")
+    assert len(s._expiry_heap) <= 2 * len(s.locked_seats) + 1025
+
+def test_background_reaper():
+    """测试8: 后台线程自动清理无人查询的过期锁"""
+    s = SeatLockSystem(timeout=0.05)
+    s.lock("A1", "user1")
+    s.lock("B2", "user2")
+    s.start_reaper(interval=0.02)
+    try:
+        deadline = time.time() + 2
+        while s.locked_seats and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        s.stop_reaper()
+    assert s.locked_seats == {}
+
+def test_concurrent_lock_single_winner():
+    """测试9: 多线程抢同一批座位，每个座位只有一个用户成功"""
+    s = SeatLockSystem(stripes=8)
+    winners = {}
+    guard = threading.Lock()
+    start = threading.Barrier(8)
+
+    def worker(n):
+        start.wait()
+        for i in range(200):
+            if s.lock(f"S{i}", f"user{n}"):
+                with guard:
+                    winners.setdefault(f"S{i}", []).append(n)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(winners) == 200
+    assert all(len(users) == 1 for users in winners.values())
+
+def test_try_lock_many_all_or_none():
+    """测试10: 批量锁定要么全部成功，要么一个都不锁"""
+    s = SeatLockSystem()
+    assert s.lock("A2", "user1")
+    assert not s.try_lock_many(["A1", "A2", "A3"], "user2")
+    assert not s.is_locked("A1") and not s.is_locked("A3")
+    assert s.try_lock_many(["A1", "A3", "A4"], "user2")
+    assert all(s.get_lock_info(seat)["user"] == "user2" for seat in ["A1", "A3", "A4"])
+
+def test_async_api_shares_state():
+    """测试11: asyncio 接口与同步接口共享座位状态"""
+    s = SeatLockSystem()
+    a = AsyncSeatLockSystem(s)
+
+    async def scenario():
+        results = await asyncio.gather(*(a.lock("B1", f"user{i}") for i in range(50)))
+        assert results.count(True) == 1
+        assert await a.try_lock_many(["B2", "B3"], "user9")
+        assert await a.is_locked("B2")
+        assert await a.unlock("B2")
+
+    asyncio.run(scenario())
+    assert s.is_locked("B1") and s.is_locked("B3") and not s.is_locked("B2")
+
+def test_concurrent_sweep():
+    """测试12: 多个线程同时清理同一批过期锁，不抛异常，每个锁只清理一次"""
+    s = SeatLockSystem(timeout=60)
+    for i in range(20000):
+        s.lock(f"S{i}", "user1")
+    removed, errors = [], []
+
+    def sweeper():
+        try:
+            removed.append(s.sweep_expired(time.time() + 120))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=sweeper) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert sum(removed) == 20000 and s.locked_seats == {}
+
+def test_async_durable_store_off_loop(tmp_path):
+    """测试13: 有持久化存储时异步接口在线程池中写盘，不在事件循环线程上 fsync；lock 支持令牌"""
+    from app.seat_store import LogSeatStore
+    s = SeatLockSystem(store=LogSeatStore(str(tmp_path / "seats.log"), sync="always"))
+    a = AsyncSeatLockSystem(s)
+    writers = []
+    append = s.store.append
+    s.store.append = lambda events, durable=True: writers.append(threading.get_ident()) or append(events, durable)
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        assert await a.lock("C1", "user1", token=7)
+        assert await a.validate("C1", 7) and not await a.unlock("C1", 8)
+        assert await a.renew("C1", "user1", 7)
+        assert await a.unlock("C1", 7)
+        return loop_thread
+
+    loop_thread = asyncio.run(scenario())
+    assert len(writers) == 3 and loop_thread not in writers
+    s.close()
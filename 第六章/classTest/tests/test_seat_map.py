@@ -0,0 +1,90 @@
+"""紧凑座位图测试"""
+from app.seat_map import VenueLayout, DenseSeatMap, SparseSeatMap
+import time
+import pytest
+
+SECTIONS = {"A": 10, "B": 20, "VIP": 5}
+
+@pytest.fixture(params=[DenseSeatMap, SparseSeatMap])
+def seat_map(request):
+    return request.param(SECTIONS)
+
+def test_layout_index_roundtrip():
+    """测试1: 座位号与下标互相转换"""
+    layout = VenueLayout(SECTIONS)
+    assert layout.size == 35
+    assert layout.index("A1") == 0
+    assert layout.index("B1") == 10
+    assert layout.index("VIP5") == 34
+    assert all(layout.index(layout.seat_id(i)) == i for i in range(layout.size))
+    for bad in ("A0", "A11", "C1", 35):
+        with pytest.raises(KeyError):
+            layout.index(bad)
+
+def test_lock_unlock_compatible(seat_map):
+    """测试2: 与 SeatLockSystem 相同的单座位接口"""
+    assert seat_map.lock("B3", "user1")
+    assert not seat_map.lock("B3", "user2")
+    assert seat_map.is_locked("B3")
+    assert seat_map.get_lock_info("B3")["user"] == "user1"
+    assert seat_map.unlock("B3")
+    assert not seat_map.is_locked("B3")
+    assert seat_map.get_lock_info("B3") is None
+    assert not seat_map.unlock("B3")
+
+def test_section_queries(seat_map):
+    """测试3: 按分区查询空闲座位与锁定数量"""
+    assert seat_map.try_lock_many(["B1", "B2", "B20"], "user1")
+    assert seat_map.lock("A5", "user2")
+    assert seat_map.count_locked() == 4
+    assert seat_map.count_locked("B") == 3
+    free = seat_map.free_seat_ids("B")
+    assert len(free) == 17
+    assert "B1" not in free and "B3" in free
+    assert seat_map.free_seats("VIP") == [30, 31, 32, 33, 34]
+    assert seat_map.seats_of("user1") == [10, 11, 29]
+
+def test_try_lock_many_all_or_none(seat_map):
+    """测试4: 批量锁定全部成功或全部不锁"""
+    assert seat_map.lock("A2", "user1")
+    assert not seat_map.try_lock_many(["A1", "A2", "A3"], "user2")
+    assert seat_map.count_locked("A") == 1
+
+def test_expired_seats_are_free(seat_map):
+    """测试5: 过期座位视为空闲，可被重新锁定并被清理"""
+    seat_map.try_lock_many(["A1", "A2"], "user1")
+    later = time.time() + seat_map.timeout + 1
+    assert seat_map.count_locked(now=later) == 0
+    assert len(seat_map.free_seats(now=later)) == 35
+    assert seat_map.sweep_expired(now=later) == 2
+    assert seat_map.lock("A1", "user2")
+    info = seat_map.get_lock_info("A1")
+    assert type(info) is dict and info.get("user") == "user2" and info.copy() == info
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_dense_user_ids_recycled(monkeypatch, use_numpy):
+    """测试6: 长期运行中不断有新用户加锁、解锁，占用者编号表不会随用户数增长"""
+    import app.seat_map as seat_map_module
+    if not use_numpy:
+        monkeypatch.setattr(seat_map_module, "np", None)
+    m = DenseSeatMap(SECTIONS, timeout=60)
+    for n in range(1000):
+        assert m.try_lock_many(["A1", "A2"], f"user{n}")
+        assert m.unlock("A1") and m.unlock("A2")
+    assert len(m._users) <= 2 and m._user_ids == {}
+
+    m.timeout = 0.01
+    for n in range(200):
+        if n % 20 == 0:
+            time.sleep(0.02)
+        assert m.lock(f"B{n % 20 + 1}", f"guest{n}")  # 覆盖已过期的锁也会释放旧编号
+    time.sleep(0.02)
+    m.sweep_expired()
+    assert m._user_ids == {} and len(m._users) <= 41
+
+    m.timeout = 60
+    assert m.lock("VIP1", "alice") and m.lock("VIP2", "alice") and m.lock("VIP3", "bob")
+    assert m.unlock("VIP1")
+    assert m.get_lock_info("VIP2")["user"] == "alice" and m.get_lock_info("VIP3")["user"] == "bob"
+    assert m.seats_of("alice") == [m.layout.index("VIP2")]
+    assert set(m._user_ids) == {"alice", "bob"}
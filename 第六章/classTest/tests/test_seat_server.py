@@ -0,0 +1,166 @@
+"""座位锁服务测试（服务端在测试进程内的后台线程中运行）"""
+import json
+from app.seat_lock import SeatLockSystem
+from app.seat_server import SeatLockServer, SeatLockClient, SeatLockError
+import threading
+import time
+import pytest
+
+@pytest.fixture(params=["tcp", "unix"])
+def server(request, tmp_path):
+    path = str(tmp_path / "seat.sock") if request.param == "unix" else None
+    srv = SeatLockServer(SeatLockSystem(timeout=60), path=path)
+    srv.start_in_thread()
+    yield srv
+    srv.stop()
+
+def test_client_drop_in(server):
+    """测试1: 客户端接口与 SeatLockSystem 相同，多个客户端共享锁"""
+    with SeatLockClient(server.address) as c1, SeatLockClient(server.address) as c2:
+        assert c1.lock("A1", "user1")
+        assert not c2.lock("A1", "user2")
+        assert c2.is_locked("A1")
+        assert c2.get_lock_info("A1")["user"] == "user1"
+        assert c2.try_lock_many(["A2", "A3"], "user2")
+        assert not c1.try_lock_many(["A3", "A4"], "user1")
+        assert c1.unlock("A1")
+        assert c2.lock("A1", "user2")
+        assert c1.get_lock_info("B9") is None
+
+def test_pipeline(server):
+    """测试2: 流水线请求按顺序返回结果"""
+    with SeatLockClient(server.address) as c:
+        pipe = c.pipeline()
+        for i in range(1000):
+            pipe.lock(f"S{i}", "user1")
+        pipe.lock("S0", "user2").is_locked("S999")
+        results = pipe.execute()
+        assert results[:1000] == [True] * 1000
+        assert results[1000:] == [False, True]
+
+def test_renew_lease(server):
+    """测试3: 只有当前持有者可以续期"""
+    server.system.timeout = 0.2
+    with SeatLockClient(server.address) as c:
+        assert c.lock("A1", "user1")
+        expire = c.get_lock_info("A1")["expire"]
+        time.sleep(0.05)
+        assert not c.renew("A1", "user2")
+        assert c.renew("A1", "user1")
+        assert c.get_lock_info("A1")["expire"] > expire
+        time.sleep(0.25)
+        assert not c.renew("A1", "user1")
+
+def test_fencing_token(server):
+    """测试4: 锁过期后旧令牌失效，旧持有者不能释放新持有者的锁"""
+    server.system.timeout = 0.05
+    with SeatLockClient(server.address) as c:
+        old = c.lock_with_token("A1", "user1")
+        assert c.validate("A1", old)
+        time.sleep(0.1)
+        new = c.lock_with_token("A1", "user2")
+        assert new > old
+        assert not c.validate("A1", old)
+        assert not c.unlock("A1", old)
+        assert c.get_lock_info("A1")["token"] == new
+        assert c.unlock("A1", new)
+
+def test_fencing_token_plain_lock(server):
+    """测试5: 锁过期后别人用普通 lock 抢到座位，旧令牌同样失效"""
+    server.system.timeout = 0.05
+    with SeatLockClient(server.address) as c:
+        old = c.lock_with_token("A1", "user1")
+        time.sleep(0.1)
+        server.system.timeout = 60
+        assert c.lock("A1", "user2")
+        assert not c.validate("A1", old)
+        assert not c.unlock("A1", old)
+        assert c.get_lock_info("A1")["user"] == "user2"
+        assert "token" not in c.get_lock_info("A1")
+        token = c.lock_with_token("B1", "user1")
+        assert c.renew("B1", "user1", token) and c.validate("B1", token)
+        assert c.unlock("B1") and not c.validate("B1", token)
+
+def test_client_drops_connection_on_timeout(server):
+    """测试6: 读响应超时后客户端断开连接，迟到的响应不会交给后面的调用"""
+    with SeatLockClient(server.address, timeout=0.05) as c:
+        original = server.system.is_locked
+        server.system.is_locked = lambda seat_id: time.sleep(0.2) or original(seat_id)
+        server._ops["is_locked"] = server.system.is_locked
+        with pytest.raises(OSError):
+            c.is_locked("A1")
+        with pytest.raises(ConnectionError):
+            c.lock("A1", "user1")
+
+def test_concurrent_clients_single_winner(server):
+    """测试7: 多个客户端并发抢座，每个座位只有一个赢家"""
+    winners = []
+
+    def worker(i):
+        with SeatLockClient(server.address) as c:
+            won = [seat for seat in range(200) if c.lock(f"S{seat}", f"user{i}")]
+            winners.extend(won)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(winners) == list(range(200))
+
+def test_server_error(server):
+    """测试8: 服务端异常以 SeatLockError 返回，连接仍可继续使用"""
+    with SeatLockClient(server.address) as c:
+        with pytest.raises(SeatLockError):
+            c._call("lock", "A1")
+        with pytest.raises(SeatLockError):
+            c._call("drop_all")
+        assert c.lock("A1", "user1")
+
+def test_renew_by_token(server):
+    """测试9: 带令牌的锁按令牌续期，同一用户的旧令牌续不上新锁"""
+    server.system.timeout = 0.05
+    with SeatLockClient(server.address) as c:
+        old = c.lock_with_token("A1", "user1")
+        time.sleep(0.1)
+        server.system.timeout = 60
+        new = c.lock_with_token("A1", "user1")
+        assert not c.renew("A1", "user1", old)
+        assert not c.renew("A1", "user1")
+        assert c.renew("A1", "user1", new)
+
+def test_non_object_request(server):
+    """测试10: 合法 JSON 但不是对象的请求返回错误，连接继续可用"""
+    with SeatLockClient(server.address) as c:
+        for line in (b"[]\n", b"1\n", b'"x"\n', b"null\n"):
+            c._sock.sendall(line)
+            response = json.loads(c._file.readline())
+            assert response["id"] is None and "error" in response
+        assert c.lock("A1", "user1")
+
+def test_durable_store_off_loop(tmp_path):
+    """测试11: 带持久化存储时请求在线程池中执行，多个连接的写入可以合并落盘，重启后锁仍在"""
+    from app.seat_store import LogSeatStore
+    path = str(tmp_path / "seats.log")
+    srv = SeatLockServer(SeatLockSystem(store=LogSeatStore(path, sync="group")))
+    srv.start_in_thread()
+    writers = set()
+    append = srv.system.store.append
+    srv.system.store.append = lambda events, durable=True: writers.add(threading.get_ident()) or append(events, durable)
+
+    def worker(i):
+        with SeatLockClient(srv.address) as c:
+            for seat in range(20):
+                assert c.lock(f"S{i}-{seat}", f"user{i}")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert srv._thread.ident not in writers and len(writers) > 1
+    srv.stop()
+    srv.system.close()
+    restored = SeatLockSystem(store=LogSeatStore(path))
+    assert len(restored.locked_seats) == 160
+    restored.close()
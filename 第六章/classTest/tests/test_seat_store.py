@@ -0,0 +1,116 @@
+"""座位锁持久化测试"""
+from app.seat_lock import SeatLockSystem
+from app.seat_store import LogSeatStore, SQLiteSeatStore
+import threading
+import time
+import pytest
+
+@pytest.fixture(params=["log", "sqlite"])
+def make_store(request, tmp_path):
+    def factory():
+        if request.param == "log":
+            return LogSeatStore(str(tmp_path / "seats.log"))
+        return SQLiteSeatStore(str(tmp_path / "seats.db"))
+    return factory
+
+def test_restart_recovers_locks(make_store):
+    """测试1: 重启后恢复锁，解锁的座位不会恢复"""
+    s = SeatLockSystem(store=make_store())
+    assert s.lock("A1", "user1")
+    assert s.try_lock_many(["A2", "A3"], "user2")
+    assert s.unlock("A2")
+    s.close()
+
+    s = SeatLockSystem(store=make_store())
+    assert s.get_lock_info("A1")["user"] == "user1"
+    assert s.get_lock_info("A3")["user"] == "user2"
+    assert not s.is_locked("A2")
+    assert not s.lock("A1", "user3")
+    s.close()
+
+def test_expired_locks_not_restored(make_store):
+    """测试2: 重启时丢弃已过期的锁"""
+    s = SeatLockSystem(timeout=0.05, store=make_store())
+    s.lock("A1", "user1")
+    s.close()
+    time.sleep(0.1)
+    s = SeatLockSystem(store=make_store())
+    assert s.locked_seats == {}
+    assert s.lock("A1", "user2")
+    s.close()
+
+def test_torn_last_line_ignored(tmp_path):
+    """测试3: 崩溃时写了一半的日志行被丢弃，之前的事件保留"""
+    path = str(tmp_path / "seats.log")
+    s = SeatLockSystem(store=LogSeatStore(path))
+    s.lock("A1", "user1")
+    s.close()
+    with open(path, "ab") as f:
+        f.write(b'{"op": "lock", "seat": "A2", "us')
+
+    s = SeatLockSystem(store=LogSeatStore(path))
+    assert s.is_locked("A1") and not s.is_locked("A2")
+    s.lock("A3", "user3")
+    s.close()
+    assert set(LogSeatStore(path).load()) == {"A1", "A3"}
+
+def test_snapshot_compaction(tmp_path):
+    """测试4: 日志达到阈值后压缩为快照，重放结果不变"""
+    path = str(tmp_path / "seats.log")
+    store = LogSeatStore(path, snapshot_every=10)
+    s = SeatLockSystem(store=store)
+    for i in range(25):
+        s.lock(f"S{i}", "user1")
+    for i in range(0, 25, 2):
+        s.unlock(f"S{i}")
+    s.close()
+    with open(path, "rb") as f:
+        assert len(f.readlines()) < 10
+    restored = SeatLockSystem(store=LogSeatStore(path))
+    assert sorted(restored.locked_seats) == sorted(f"S{i}" for i in range(1, 25, 2))
+
+def test_group_commit_concurrent(tmp_path):
+    """测试5: 组提交下并发加锁全部持久化"""
+    path = str(tmp_path / "seats.log")
+    s = SeatLockSystem(store=LogSeatStore(path, sync="group"))
+
+    def worker(t):
+        for i in range(50):
+            assert s.lock(f"T{t}-{i}", f"user{t}")
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    s.close()
+    assert len(LogSeatStore(path).load()) == 400
+
+def test_value_types_round_trip(make_store):
+    """测试6: 整数用户与元组座位号重启后保持原类型"""
+    s = SeatLockSystem(store=make_store())
+    assert s.lock(("A", 12), 42)
+    assert s.lock(7, "user1")
+    assert s.try_lock_many([("B", 1), ("B", 2)], 43)
+    assert s.unlock(("B", 1))
+    s.close()
+
+    s = SeatLockSystem(store=make_store())
+    assert s.get_lock_info(("A", 12))["user"] == 42
+    assert s.get_lock_info(7)["user"] == "user1"
+    assert s.get_lock_info(("B", 2))["user"] == 43
+    assert not s.is_locked(("B", 1))
+    assert not s.lock(("A", 12), 99)
+    s.close()
+
+def test_tuple_seats_in_snapshot(tmp_path):
+    """测试7: 压缩为快照后元组座位号与整数用户仍能恢复"""
+    path = str(tmp_path / "seats.log")
+    s = SeatLockSystem(store=LogSeatStore(path, snapshot_every=5))
+    for i in range(12):
+        s.lock(("C", i), i)
+    s.close()
+    restored = SeatLockSystem(store=LogSeatStore(path))
+    assert restored.get_lock_info(("C", 11))["user"] == 11
+    assert len(restored.locked_seats) == 12
+    restored.close()
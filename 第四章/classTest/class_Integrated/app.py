@@ -2,12 +2,22 @@
 订单系统 - 集成测试案例
 包含：下单模块 + 库存模块 + 支付模块
 """
+import os
+import sys
+
 from flask import Flask, request, jsonify
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.idempotency import IdempotencyStore, idempotent
+from common.inventory_store import ShardedInventoryStore
+
 app = Flask(__name__)
 
-# 模拟库存
-inventory = {"book": 10, "pen": 20, "notebook": 15}
+# 幂等键缓存：客户端超时重试同一个订单时不会重复扣库存和余额
+idempotency = IdempotencyStore()
+
+# 模拟库存（分片加锁，扣减原子执行）
+inventory = ShardedInventoryStore({"book": 10, "pen": 20, "notebook": 15})
 
 # 模拟用户余额
 user_balance = {"user1": 1000, "user2": 500}
@@ -27,10 +37,14 @@ class InventoryModule:
         return True, "库存充足"
     
     @staticmethod
-    def reduce_stock(item, qty):
-        """减少库存"""
-        inventory[item] -= qty
-        return inventory[item]
+    def reserve_stock(item, qty):
+        """原子地检查并扣减库存，返回 (是否成功, 剩余库存或错误信息)"""
+        return inventory.try_reserve(item, qty)
+    
+    @staticmethod
+    def release_stock(item, qty):
+        """归还库存（支付失败时回滚）"""
+        return inventory.release(item, qty)
 
 
 # 支付模块
@@ -55,6 +69,7 @@ class PaymentModule:
 
 # 下单模块
 @app.route("/order", methods=["POST"])
+@idempotent(idempotency)
 def order():
     """下单接口"""
     item = request.json.get("item")
@@ -62,21 +77,19 @@ def order():
     user = request.json.get("user", "user1")
     price = request.json.get("price", 10)
     
-    # 1. 检查库存
-    stock_ok, stock_msg = InventoryModule.check_stock(item, qty)
+    # 1. 检查并扣除库存（原子操作）
+    stock_ok, remaining_stock = InventoryModule.reserve_stock(item, qty)
     if not stock_ok:
-        return jsonify({"error": stock_msg}), 400
+        return jsonify({"error": remaining_stock}), 400
     
-    # 2. 检查余额
+    # 2. 检查余额，失败时归还库存
     total_amount = price * qty
     balance_ok, balance_msg = PaymentModule.check_balance(user, total_amount)
     if not balance_ok:
+        InventoryModule.release_stock(item, qty)
         return jsonify({"error": balance_msg}), 400
     
-    # 3. 扣除库存
-    remaining_stock = InventoryModule.reduce_stock(item, qty)
-    
-    # 4. 扣除余额
+    # 3. 扣除余额
     remaining_balance = PaymentModule.deduct_balance(user, total_amount)
     
     return jsonify({
@@ -86,6 +99,12 @@ def order():
     })
 
 
+@app.route("/idempotency/stats", methods=["GET"])
+def idempotency_stats():
+    """幂等缓存命中率与内存"""
+    return jsonify(idempotency.stats()), 200
+
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
 
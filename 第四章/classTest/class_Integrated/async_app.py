@@ -0,0 +1,184 @@
+"""
+订单系统（异步版）- 原生 ASGI 应用
+包含：下单模块 + 异步库存模块 + 异步支付模块
+接口契约与 app.py 相同：POST /order
+
+启动方式（需安装 uvicorn）：
+    uvicorn async_app:app --port 5000
+"""
+import asyncio
+import json
+
+# 锁分段数：商品名 / 用户名由客户端提交，按哈希映射到固定数量的锁，内存不随键的数量增长
+LOCK_STRIPES = 64
+
+
+class AsyncInventoryModule:
+    """异步库存模块 - 商品按哈希分段加锁"""
+
+    def __init__(self, inventory, stripes=LOCK_STRIPES):
+        self.inventory = dict(inventory)
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+
+    def lock(self, item):
+        """返回该商品所在分段的锁"""
+        return self._locks[hash(item) % len(self._locks)]
+
+    async def check_stock(self, item, qty):
+        """检查库存（调用方需持有商品锁）"""
+        if item not in self.inventory:
+            return False, "商品不存在"
+        if self.inventory[item] < qty:
+            return False, "库存不足"
+        return True, "库存充足"
+
+    async def reduce_stock(self, item, qty):
+        """减少库存（调用方需持有商品锁）"""
+        self.inventory[item] -= qty
+        return self.inventory[item]
+
+
+class AsyncPaymentModule:
+    """异步支付模块 - 用户按哈希分段加锁"""
+
+    def __init__(self, user_balance, stripes=LOCK_STRIPES):
+        self.user_balance = dict(user_balance)
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+
+    def lock(self, user):
+        """返回该用户所在分段的锁"""
+        return self._locks[hash(user) % len(self._locks)]
+
+    async def check_balance(self, user, amount):
+        """检查余额（调用方需持有用户锁）"""
+        if user not in self.user_balance:
+            return False, "用户不存在"
+        if self.user_balance[user] < amount:
+            return False, "余额不足"
+        return True, "余额充足"
+
+    async def deduct_balance(self, user, amount):
+        """扣除余额（调用方需持有用户锁）"""
+        self.user_balance[user] -= amount
+        return self.user_balance[user]
+
+
+class OrderService:
+    """下单模块 - 串联库存与支付"""
+
+    def __init__(self, inventory, user_balance):
+        self.inventory = AsyncInventoryModule(inventory)
+        self.payment = AsyncPaymentModule(user_balance)
+
+    async def order(self, item, qty, user, price):
+        """
+        下单流程，返回 (状态码, 响应体)
+        固定按“商品锁 -> 用户锁”的顺序加锁，检查与扣减在锁内完成，避免超卖和死锁
+        两组分段锁相互独立，每组只取一把，分段冲突只会多等待，不会死锁
+        """
+        async with self.inventory.lock(item), self.payment.lock(user):
+            # 1. 检查库存
+            stock_ok, stock_msg = await self.inventory.check_stock(item, qty)
+            if not stock_ok:
+                return 400, {"error": stock_msg}
+
+            # 2. 检查余额
+            total_amount = price * qty
+            balance_ok, balance_msg = await self.payment.check_balance(user, total_amount)
+            if not balance_ok:
+                return 400, {"error": balance_msg}
+
+            # 3. 扣除库存
+            remaining_stock = await self.inventory.reduce_stock(item, qty)
+
+            # 4. 扣除余额
+            remaining_balance = await self.payment.deduct_balance(user, total_amount)
+
+        return 200, {
+            "success": True,
+            "剩余库存": remaining_stock,
+            "剩余余额": remaining_balance
+        }
+
+
+async def _read_body(receive):
+    """读取完整请求体"""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def _send_json(send, status, payload):
+    """发送 JSON 响应"""
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send):
+    """处理 ASGI lifespan 事件"""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def create_app(inventory=None, user_balance=None):
+    """创建 ASGI 应用，默认数据与 app.py 相同"""
+    service = OrderService(
+        inventory if inventory is not None else {"book": 10, "pen": 20, "notebook": 15},
+        user_balance if user_balance is not None else {"user1": 1000, "user2": 500}
+    )
+
+    async def asgi_app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            await _lifespan(receive, send)
+            return
+
+        if scope["path"] != "/order":
+            await _send_json(send, 404, {"error": "Not Found"})
+            return
+        if scope["method"] != "POST":
+            await _send_json(send, 405, {"error": "Method Not Allowed"})
+            return
+
+        try:
+            data = json.loads(await _read_body(receive))
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            await _send_json(send, 400, {"error": "无效请求"})
+            return
+
+        status, payload = await service.order(
+            data.get("item"),
+            data.get("qty", 1),
+            data.get("user", "user1"),
+            data.get("price", 10)
+        )
+        await _send_json(send, status, payload)
+
+    asgi_app.service = service
+    return asgi_app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, port=5000)
@@ -0,0 +1,70 @@
+"""
+吞吐量对比 - Flask 同步版 (app.py) vs ASGI 异步版 (async_app.py)
+两者都在进程内调用，不经过网络，只比较请求处理本身的开销
+运行: python bench_async_order.py [请求数] [并发数]
+"""
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as flask_app
+from async_app import create_app
+from test_async_order import call
+
+PAYLOAD = {"item": "book", "qty": 1, "user": "user1", "price": 1}
+
+
+def bench_flask(total, concurrency):
+    """Flask 测试客户端 + 线程池"""
+    flask_app.inventory["book"] = total
+    flask_app.user_balance["user1"] = total
+    client = flask_app.app.test_client()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(lambda _: client.post("/order", json=PAYLOAD).status_code, range(total)))
+    elapsed = time.perf_counter() - start
+    return total / elapsed, statuses.count(200)
+
+
+def bench_asgi(total, concurrency):
+    """ASGI 应用 + asyncio 并发"""
+    app = create_app({"book": total}, {"user1": total})
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                return (await call(app, PAYLOAD))[0]
+
+        return await asyncio.gather(*(one() for _ in range(total)))
+
+    start = time.perf_counter()
+    statuses = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    return total / elapsed, statuses.count(200)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    print("=" * 60)
+    print("吞吐量对比 - 订单系统")
+    print("=" * 60)
+    print(f"请求数: {total}  并发数: {concurrency}")
+
+    flask_rps, flask_ok = bench_flask(total, min(concurrency, 64))
+    print(f"\nFlask 同步版: {flask_rps:,.0f} req/s (成功 {flask_ok})")
+
+    asgi_rps, asgi_ok = bench_asgi(total, concurrency)
+    print(f"ASGI 异步版:  {asgi_rps:,.0f} req/s (成功 {asgi_ok})")
+
+    print(f"\n提升倍数: {asgi_rps / flask_rps:.2f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
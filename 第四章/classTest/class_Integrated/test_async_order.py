@@ -0,0 +1,82 @@
+"""
+集成测试 - 异步订单系统
+在进程内直接调用 ASGI 应用，无需启动服务
+"""
+import asyncio
+import json
+
+from async_app import LOCK_STRIPES, create_app
+
+
+async def call(app, payload, method="POST", path="/order"):
+    """模拟一次 HTTP 请求，返回 (状态码, JSON)"""
+    scope = {"type": "http", "method": method, "path": path}
+    body = json.dumps(payload).encode()
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def test_order_success():
+    """测试1：正常下单成功"""
+    app = create_app()
+    status, data = asyncio.run(call(app, {"item": "book", "qty": 2, "user": "user1", "price": 10}))
+    assert status == 200
+    assert data == {"success": True, "剩余库存": 8, "剩余余额": 980}
+
+
+def test_stock_and_balance_errors():
+    """测试2：商品不存在 / 库存不足 / 余额不足"""
+    app = create_app()
+    assert asyncio.run(call(app, {"item": "car", "qty": 1})) == (400, {"error": "商品不存在"})
+    assert asyncio.run(call(app, {"item": "book", "qty": 100})) == (400, {"error": "库存不足"})
+    status, data = asyncio.run(call(app, {"item": "book", "qty": 2, "user": "user2", "price": 300}))
+    assert status == 400 and "余额不足" in data["error"]
+
+
+def test_invalid_requests():
+    """测试3：非法请求体与未知路由"""
+    app = create_app()
+    assert asyncio.run(call(app, ["book"]))[0] == 400
+    assert asyncio.run(call(app, {}, path="/unknown"))[0] == 404
+    assert asyncio.run(call(app, {}, method="GET"))[0] == 405
+
+
+def test_concurrent_orders_never_oversell():
+    """测试4：大量并发下单，库存与余额不会被扣成负数"""
+    app = create_app({"book": 50}, {"user1": 300, "user2": 10000})
+
+    async def burst():
+        orders = [call(app, {"item": "book", "qty": 1, "user": f"user{i % 2 + 1}", "price": 10})
+                  for i in range(2000)]
+        return await asyncio.gather(*orders)
+
+    results = asyncio.run(burst())
+    success = [data for status, data in results if status == 200]
+    assert len(success) == 50
+    assert app.service.inventory.inventory["book"] == 0
+    balances = app.service.payment.user_balance
+    assert balances["user1"] >= 0
+    assert (300 - balances["user1"]) + (10000 - balances["user2"]) == 50 * 10
+
+
+def test_lock_count_bounded_by_stripes():
+    """测试5：大量不同的商品名 / 用户名不会让锁的数量无限增长"""
+    app = create_app()
+
+    async def burst():
+        orders = [call(app, {"item": f"ghost{i}", "qty": 1, "user": f"nobody{i}", "price": 10})
+                  for i in range(5000)]
+        return await asyncio.gather(*orders)
+
+    results = asyncio.run(burst())
+    assert all(status == 400 for status, _ in results)
+    assert len(app.service.inventory._locks) == LOCK_STRIPES
+    assert len(app.service.payment._locks) == LOCK_STRIPES
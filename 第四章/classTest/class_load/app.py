@@ -1,30 +1,47 @@
 """
 订单系统 - 用于负载测试
 """
+import os
+import sys
+
 from flask import Flask, request, jsonify
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.idempotency import IdempotencyStore, idempotent
+from common.inventory_store import ShardedInventoryStore
+
 app = Flask(__name__)
+idempotency = IdempotencyStore()
+
+# 模拟库存（大量库存用于负载测试），分片加锁保证并发扣减不超卖
+inventory = ShardedInventoryStore({"book": 100000})
+
 
-# 模拟库存（大量库存用于负载测试）
-inventory = {"book": 100000}
+@app.route("/health", methods=["GET"])
+def health():
+    """健康检查"""
+    return jsonify({"status": "healthy"}), 200
 
 
 @app.route("/order", methods=["POST"])
+@idempotent(idempotency)
 def order():
     """下单接口"""
     item = request.json.get("item")
     qty = request.json.get("qty", 1)
     
-    if item not in inventory:
-        return jsonify({"error": "商品不存在"}), 400
+    ok, result = inventory.try_reserve(item, qty)
+    if not ok:
+        return jsonify({"error": result}), 400
     
-    if inventory[item] < qty:
-        return jsonify({"error": "库存不足"}), 400
-    
-    inventory[item] -= qty
-    return jsonify({"success": True, "remaining": inventory[item]}), 200
+    return jsonify({"success": True, "remaining": result}), 200
+
+
+@app.route("/idempotency/stats", methods=["GET"])
+def idempotency_stats():
+    """幂等缓存命中率与内存"""
+    return jsonify(idempotency.stats()), 200
 
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8089, debug=False)
-
@@ -0,0 +1,328 @@
+"""
+异步负载测试引擎
+- 基于 asyncio，单进程即可驱动上万虚拟用户
+- 内置 HTTP/1.1 keep-alive 连接池，不再每个请求新建连接
+- 支持闭环（固定用户数 + 思考时间）与开环（固定到达速率）两种模式
+- 支持分阶段爬坡（ramp-up）
+"""
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from latency_histogram import RunStats
+
+
+class HttpConnectionPool:
+    """HTTP/1.1 keep-alive 连接池"""
+
+    def __init__(self, host, size=100, timeout=5):
+        """
+        :param host: 目标地址，如 http://127.0.0.1:5000
+        :param size: 最大连接数
+        :param timeout: 单个请求超时秒数
+        """
+        url = urlsplit(host)
+        self.hostname = url.hostname
+        self.ssl = url.scheme == "https"
+        self.port = url.port or (443 if self.ssl else 80)
+        self.timeout = timeout
+        self._idle = []
+        self._semaphore = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def _open(self):
+        """建立新连接"""
+        self.opened += 1
+        return await asyncio.open_connection(self.hostname, self.port, ssl=self.ssl or None)
+
+    async def request(self, method, path, payload=None, body=None):
+        """
+        发送请求，返回 (状态码, 响应体bytes)
+        payload 为要序列化的 JSON 对象；body 为已编码好的请求体（优先使用）
+        复用的空闲连接可能已被服务端关闭，此时换新连接重试一次
+        """
+        if body is None:
+            body = b"" if payload is None else json.dumps(payload).encode()
+        async with self._semaphore:
+            reused = bool(self._idle)
+            conn = self._idle.pop() if reused else await self._open()
+            try:
+                status, body, keep_alive = await self._exchange(conn, method, path, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                conn = await self._open()
+                status, body, keep_alive = await self._exchange(conn, method, path, body)
+
+            if keep_alive:
+                self._idle.append(conn)
+            else:
+                conn[1].close()
+            return status, body
+
+    async def _exchange(self, conn, method, path, body):
+        """带超时地完成一次请求/响应，出错时关闭连接"""
+        try:
+            return await asyncio.wait_for(self._send(conn, method, path, body), self.timeout)
+        except BaseException:
+            conn[1].close()
+            raise
+
+    async def _send(self, conn, method, path, body):
+        """写请求并解析响应"""
+        reader, writer = conn
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.hostname}:{self.port}\r\n"
+            "Connection: keep-alive\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("连接已被服务端关闭")
+        version, status = status_line.split()[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        keep_alive = headers.get("connection") != "close"
+        if version == b"HTTP/1.0":
+            keep_alive = headers.get("connection") == "keep-alive"
+
+        if "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            data = await self._read_chunked(reader)
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return int(status), data, keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader):
+        """读取 chunked 编码的响应体"""
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await reader.readline()
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+    def close(self):
+        """关闭所有空闲连接"""
+        for _, writer in self._idle:
+            writer.close()
+        self._idle = []
+
+
+class AsyncLoadTester:
+    """异步负载测试器，接口与原 LoadTester 相同：run() / print_results()"""
+
+    def __init__(self, host, users=100, duration=10, mode="closed", rate=None,
+                 ramp_up=0, stages=None, think_time=1.0, connections=100, timeout=5):
+        """
+        :param host: 目标地址
+        :param users: 闭环模式的虚拟用户数；开环模式下为最大在途请求数
+        :param duration: 测试时长（秒），传入 stages 时以 stages 总时长为准
+        :param mode: "closed" 闭环 / "open" 开环
+        :param rate: 开环模式的到达速率（请求/秒），默认 users / think_time
+        :param ramp_up: 从 0 线性爬坡到目标值所用秒数
+        :param stages: 分阶段计划 [(秒数, 目标值), ...]，目标值为用户数（闭环）或速率（开环）
+        :param think_time: 闭环模式下每个用户两次请求之间的思考时间（秒）
+        :param connections: 连接池大小
+        :param timeout: 单个请求超时秒数
+        """
+        if mode not in ("closed", "open"):
+            raise ValueError("mode 只能是 closed 或 open")
+        self.host = host
+        self.users = users
+        self.mode = mode
+        self.think_time = think_time
+        self.rate = rate if rate is not None else users / max(think_time, 0.001)
+        self.connections = connections
+        self.timeout = timeout
+        self.path = "/order"
+        self.payload = {"item": "book", "qty": 1}
+
+        target = users if mode == "closed" else self.rate
+        if stages is None:
+            stages = [(ramp_up, target), (max(duration - ramp_up, 0), target)]
+        self.stages = stages
+        self.duration = sum(seconds for seconds, _ in stages)
+        self.stats = RunStats()
+        self._start = time.perf_counter()
+
+    @property
+    def results(self):
+        """汇总结果（与原 LoadTester.results 的计数字段兼容）"""
+        return {
+            "total": self.stats.total,
+            "success": self.stats.success,
+            "failed": self.stats.failed,
+            "latency": self.stats.latency,
+            "status_codes": self.stats.status_codes
+        }
+
+    def target_at(self, elapsed):
+        """按阶段计划线性插值，返回当前时刻的目标用户数/速率"""
+        start_value, start_time = 0, 0.0
+        for seconds, value in self.stages:
+            if elapsed < start_time + seconds:
+                return start_value + (value - start_value) * (elapsed - start_time) / seconds
+            start_value, start_time = value, start_time + seconds
+        return start_value
+
+    def record(self, ok, elapsed_ms, status="error"):
+        """记录一次请求结果（事件循环单线程执行，无需加锁）"""
+        second = int(time.perf_counter() - self._start)
+        self.stats.record(ok, elapsed_ms, status, second)
+
+    async def request_order(self, pool, scheduled):
+        """发送一次订单请求，响应时间从计划发送时刻算起（避免协调遗漏）"""
+        try:
+            status, _ = await pool.request("POST", self.path, self.payload)
+        except Exception:
+            self.record(False, None)
+            return
+        self.record(status == 200, (time.perf_counter() - scheduled) * 1000, status)
+
+    async def run_iteration(self, pool, scheduled, user):
+        """一个虚拟用户的一次迭代，子类可重写（默认发送一次订单请求）"""
+        await self.request_order(pool, scheduled)
+
+    def next_think_time(self):
+        """下一次思考时间（秒），子类可重写为随机分布"""
+        return self.think_time
+
+    async def _virtual_user(self, pool, stop, deadline, user):
+        """闭环虚拟用户：请求 -> 思考 -> 请求"""
+        if self.think_time:
+            # 随机错开首个请求，避免所有用户同时发起
+            await asyncio.sleep(random.uniform(0, self.think_time))
+        while not stop.is_set() and time.perf_counter() < deadline:
+            await self.run_iteration(pool, time.perf_counter(), user)
+            think_time = self.next_think_time()
+            if think_time:
+                await asyncio.sleep(think_time)
+
+    async def _run_closed(self, pool, start):
+        """闭环模式：按计划增减虚拟用户"""
+        deadline = start + self.duration
+        active = []
+        while (now := time.perf_counter()) < deadline:
+            target = int(self.target_at(now - start))
+            while len(active) < target:
+                stop = asyncio.Event()
+                user = len(active)
+                active.append((asyncio.create_task(self._virtual_user(pool, stop, deadline, user)), stop))
+            while len(active) > target:
+                active.pop()[1].set()
+            await asyncio.sleep(0.05)
+        for _, stop in active:
+            stop.set()
+        await asyncio.gather(*(task for task, _ in active), return_exceptions=True)
+
+    async def _run_open(self, pool, start):
+        """开环模式：按到达速率发起请求，不等待前一个请求完成"""
+        deadline = start + self.duration
+        in_flight = set()
+        arrivals = 0
+        next_time = start
+        while (now := time.perf_counter()) < deadline:
+            rate = self.target_at(now - start)
+            if rate <= 0:
+                await asyncio.sleep(0.01)
+                next_time = time.perf_counter()
+                continue
+            if now < next_time:
+                await asyncio.sleep(next_time - now)
+                continue
+            if len(in_flight) >= self.users:
+                # 在途请求已达上限，本次到达记为失败
+                self.record(False, None, "dropped")
+            else:
+                task = asyncio.create_task(self.run_iteration(pool, next_time, arrivals))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            arrivals += 1
+            next_time += 1 / rate
+            # 落后于计划时会连续补发，每次都让出事件循环，已发起的请求才能推进
+            await asyncio.sleep(0)
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def run_async(self, offset=0.0):
+        """
+        在当前事件循环中运行测试
+        :param offset: 时间序列从第 offset 秒开始计（分布式运行时与协调者的开始时刻对齐）
+        """
+        pool = HttpConnectionPool(self.host, self.connections, self.timeout)
+        start = time.perf_counter()
+        self._start = start - offset
+        try:
+            if self.mode == "closed":
+                await self._run_closed(pool, start)
+            else:
+                await self._run_open(pool, start)
+        finally:
+            pool.close()
+
+    def run(self):
+        """运行负载测试"""
+        print("="*60)
+        print("负载测试 - 订单系统")
+        print("="*60)
+        print(f"目标: {self.host}")
+        if self.mode == "closed":
+            print(f"模式: 闭环  用户数: {self.users}")
+        else:
+            print(f"模式: 开环  到达速率: {self.rate:.0f} req/s")
+        print(f"持续时间: {self.duration}秒")
+        print(f"开始时间: {datetime.now().strftime('%H:%M:%S')}")
+
+        asyncio.run(self.run_async())
+
+        # 输出结果
+        self.print_results()
+
+    def print_results(self):
+        """打印测试结果"""
+        print("\n" + "="*60)
+        print("测试结果")
+        print("="*60)
+        print(f"结束时间: {datetime.now().strftime('%H:%M:%S')}")
+        print(f"\n总请求数: {self.results['total']}")
+        print(f"成功: {self.results['success']}")
+        print(f"失败: {self.results['failed']}")
+
+        latency = self.stats.latency
+        if latency.total:
+            print(f"\n响应时间:")
+            print(f"  平均: {latency.mean:.2f} ms")
+            print(f"  最小: {latency.min_ms:.2f} ms")
+            print(f"  最大: {latency.max_ms_seen:.2f} ms")
+            for name, value in latency.percentiles().items():
+                print(f"  {name}: {value:.2f} ms")
+
+            rps = self.results['total'] / self.duration
+            print(f"\n吞吐量: {rps:.2f} RPS")
+
+        errors = self.stats.error_breakdown()
+        if errors:
+            print(f"\n失败分布:")
+            for status, count in errors.items():
+                print(f"  {status}: {count} ({count / self.stats.total * 100:.1f}%)")
+
+        print("="*60)
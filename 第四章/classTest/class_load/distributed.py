@@ -0,0 +1,264 @@
+"""
+分布式负载测试 - 协调者 / 工作者模式
+- 协调者启动 N 个本地工作进程（也可以等待其他主机上的工作者连接）
+- 按比例把目标用户数分给各工作者，工作者定期回传统计增量
+- 协调者合并增量，实时输出汇总，结束后打印完整报告
+
+运行方式：
+    python distributed.py coordinator --host http://127.0.0.1:8089 --users 10000 --workers 4
+    python distributed.py worker 192.168.1.10:5557     # 其他主机上的工作者
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import time
+
+from async_load import AsyncLoadTester
+from latency_histogram import RunStats
+
+
+async def _send(writer, message):
+    """发送一行 JSON 消息"""
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+async def worker_main(address, interval=1.0, name=None):
+    """
+    工作者：连接协调者，接收配置后执行压测，每 interval 秒回传一次统计增量
+    :param address: 协调者地址 (host, port)
+    :param name: 工作者名称，协调者等待超时时据此报告缺少哪些工作者
+    """
+    reader, writer = await asyncio.open_connection(*address)
+    await _send(writer, {"type": "hello", "name": name or f"{socket.gethostname()}:{os.getpid()}"})
+    line = await reader.readline()
+    if not line:
+        # 协调者等待其他工作者超时后已关闭连接
+        writer.close()
+        return
+    message = json.loads(line)
+    tester = AsyncLoadTester(**message["config"])
+
+    async def flush(message_type):
+        # 交换统计对象，把上一段的增量发给协调者
+        delta, tester.stats = tester.stats, RunStats()
+        await _send(writer, {"type": message_type, "data": delta.to_dict()})
+
+    # 按协调者的开始时刻对齐每秒时间序列，合并后同一秒的桶来自同一时间段
+    run = asyncio.create_task(tester.run_async(message.get("offset", 0.0)))
+    while not run.done():
+        await asyncio.wait({run}, timeout=interval)
+        if not run.done():
+            await flush("stats")
+    await run
+    await flush("done")
+    writer.close()
+
+
+def run_worker(address, interval=1.0, name=None):
+    """工作进程入口"""
+    asyncio.run(worker_main(tuple(address), interval, name))
+
+
+class Coordinator(AsyncLoadTester):
+    """协调者：接口与 LoadTester 相同（run / print_results），负载由工作者产生"""
+
+    def __init__(self, host, users=100, duration=10, workers=2, remote_workers=0,
+                 bind=("127.0.0.1", 0), live=True, connect_timeout=60, stall_timeout=10, **options):
+        """
+        :param workers: 本地启动的工作进程数
+        :param remote_workers: 额外等待连接的远程工作者数量
+        :param bind: 监听地址，端口为0时自动分配
+        :param connect_timeout: 等待所有工作者连接的秒数，超时抛出 TimeoutError 并列出缺少的工作者
+        :param stall_timeout: 工作者超过这么多秒没有回传统计，或压测结束后这么多秒仍未完成，记为失败
+        :param live: 是否每秒打印实时汇总
+        :param options: 传给 AsyncLoadTester 的其他参数（mode / rate / think_time / ramp_up ...）
+        """
+        super().__init__(host, users=users, duration=duration, **options)
+        self.workers = workers
+        self.remote_workers = remote_workers
+        self.bind = bind
+        self.live = live
+        self.connect_timeout = connect_timeout
+        self.stall_timeout = stall_timeout
+        self.options = options
+        self.failed_workers = []
+        self._sock = None
+
+    @property
+    def address(self):
+        """协调者实际监听的地址"""
+        return self._sock.getsockname()[:2]
+
+    def listen(self):
+        """绑定监听端口（远程工作者需要提前知道地址时可先调用）"""
+        if self._sock is None:
+            self._sock = socket.create_server(self.bind)
+        return self.address
+
+    def _worker_config(self, index, count):
+        """按比例拆分用户数、速率与阶段计划"""
+        users = self.users // count + (1 if index < self.users % count else 0)
+        share = users / self.users if self.users else 1 / count
+        config = dict(self.options)
+        config.update(
+            host=self.host,
+            users=users,
+            stages=[(seconds, target * share) for seconds, target in self.stages],
+            connections=max(1, self.connections // count),
+        )
+        if self.mode == "open":
+            config["rate"] = self.rate * share
+        return config
+
+    async def run_async(self):
+        """启动工作者、分配任务并汇总统计"""
+        self.listen()
+        expected = self.workers + self.remote_workers
+        connected = []
+        all_connected = asyncio.Event()
+
+        names = []
+
+        async def handle(reader, writer):
+            hello = json.loads(await reader.readline() or b"{}")
+            names.append(hello.get("name"))
+            connected.append((reader, writer))
+            if len(connected) == expected:
+                all_connected.set()
+
+        server = await asyncio.start_server(handle, sock=self._sock)
+        ctx = multiprocessing.get_context("spawn")
+        processes = [ctx.Process(target=run_worker, args=(self.address, 1.0, f"local-{i}"), daemon=True)
+                     for i in range(self.workers)]
+        for process in processes:
+            process.start()
+
+        try:
+            try:
+                await asyncio.wait_for(all_connected.wait(), self.connect_timeout)
+            except asyncio.TimeoutError:
+                for _, writer in connected:
+                    writer.close()
+                for process in processes:
+                    process.terminate()
+                raise TimeoutError(self._missing_workers(processes, names)) from None
+            self._start = time.perf_counter()
+            for index, (_, writer) in enumerate(connected):
+                await _send(writer, {"type": "start", "config": self._worker_config(index, expected),
+                                     "offset": time.perf_counter() - self._start})
+
+            reporter = asyncio.create_task(self._report_live()) if self.live else None
+            await asyncio.gather(*(self._collect(name, reader, writer)
+                                   for name, (reader, writer) in zip(names, connected)))
+            if reporter:
+                reporter.cancel()
+        finally:
+            server.close()
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    def _missing_workers(self, processes, names):
+        """等待超时时的说明：哪些本地工作进程没有连上（及其退出码），还差几个远程工作者"""
+        missing = []
+        for i, process in enumerate(processes):
+            if f"local-{i}" not in names:
+                state = "仍在运行" if process.exitcode is None else f"已退出，退出码 {process.exitcode}"
+                missing.append(f"local-{i}（{state}）")
+        remote = self.remote_workers - sum(1 for name in names if not str(name).startswith("local-"))
+        if remote > 0:
+            missing.append(f"远程工作者 {remote} 个")
+        expected = self.workers + self.remote_workers
+        return (f"{self.connect_timeout} 秒内只有 {len(names)}/{expected} 个工作者连接，"
+                f"缺少: {', '.join(missing)}")
+
+    async def _collect(self, name, reader, writer):
+        """
+        接收某个工作者的统计增量并合并
+        工作者卡住、断开或压测结束后迟迟不完成时记入 failed_workers，已收到的统计照常保留
+        """
+        deadline = self._start + self.duration + self.stall_timeout
+        while True:
+            timeout = min(self.stall_timeout, deadline - time.perf_counter())
+            try:
+                line = await asyncio.wait_for(reader.readline(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                reason = (f"压测结束 {self.stall_timeout} 秒后仍未完成" if time.perf_counter() >= deadline
+                          else f"{self.stall_timeout} 秒内没有回传统计")
+                self._fail_worker(name, writer, reason)
+                return
+            if not line:
+                self._fail_worker(name, writer, "连接在完成前断开")
+                return
+            message = json.loads(line)
+            self.stats.merge(RunStats.from_dict(message["data"]))
+            if message["type"] == "done":
+                return
+
+    def _fail_worker(self, name, writer, reason):
+        """记录失败的工作者并断开它的连接"""
+        self.failed_workers.append(f"{name}（{reason}）")
+        print(f"[警告] 工作者 {name} 失败: {reason}")
+        writer.close()
+
+    def print_results(self):
+        """打印汇总报告，并列出中途失败的工作者"""
+        super().print_results()
+        if self.failed_workers:
+            print(f"\n失败的工作者（统计只包含失败前回传的部分）: {', '.join(self.failed_workers)}")
+
+    async def _report_live(self):
+        """每秒打印一次实时汇总"""
+        last_total = 0
+        while True:
+            await asyncio.sleep(1)
+            total = self.stats.total
+            p99 = self.stats.latency.percentile(99)
+            print(f"[实时] 总请求: {total} | RPS: {total - last_total} | "
+                  f"失败: {self.stats.failed} | p99: {p99:.2f} ms")
+            last_total = total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分布式负载测试")
+    sub = parser.add_subparsers(dest="role", required=True)
+
+    coord = sub.add_parser("coordinator", help="协调者")
+    coord.add_argument("--host", default="http://127.0.0.1:8089")
+    coord.add_argument("--users", type=int, default=1000)
+    coord.add_argument("--duration", type=float, default=10)
+    coord.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    coord.add_argument("--remote-workers", type=int, default=0)
+    coord.add_argument("--bind", default="127.0.0.1:5557")
+    coord.add_argument("--connect-timeout", type=float, default=60, help="等待工作者连接的秒数")
+    coord.add_argument("--stall-timeout", type=float, default=10, help="工作者多少秒没有回传统计记为失败")
+
+    worker = sub.add_parser("worker", help="工作者")
+    worker.add_argument("coordinator", help="协调者地址 host:port")
+
+    args = parser.parse_args()
+    if args.role == "worker":
+        host, port = args.coordinator.rsplit(":", 1)
+        run_worker((host, int(port)))
+        return
+
+    bind_host, bind_port = args.bind.rsplit(":", 1)
+    Coordinator(
+        args.host,
+        users=args.users,
+        duration=args.duration,
+        workers=args.workers,
+        remote_workers=args.remote_workers,
+        bind=(bind_host, int(bind_port)),
+        connect_timeout=args.connect_timeout,
+        stall_timeout=args.stall_timeout,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
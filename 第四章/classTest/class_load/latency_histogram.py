@@ -0,0 +1,237 @@
+"""
+延迟统计 - 固定内存的对数分桶直方图（HDR 风格）
+- 每个 2 的幂区间再细分为若干子桶；默认 8 位精度时桶宽不超过下界的 1/128，分位数相对误差 < 0.8%
+- 内存只与可记录的最大值有关，与请求数量无关
+- 直方图可合并，便于分段统计和多进程汇总
+"""
+import csv
+import json
+from collections import Counter
+
+
+class LatencyHistogram:
+    """对数分桶延迟直方图，单位毫秒，内部按微秒存储"""
+
+    def __init__(self, max_ms=60000, precision_bits=8):
+        """
+        :param max_ms: 可记录的最大延迟，超出的值按最大值记录
+        :param precision_bits: 精度位数，每个 2 的幂区间分为 2^(precision_bits-1) 个子桶，
+                               相对误差上界为 1/2^(precision_bits-1)（8 位约 0.78%，7 位约 1.56%）
+        """
+        self.max_ms = max_ms
+        self.precision_bits = precision_bits
+        self._sub_count = 1 << precision_bits
+        self._half = self._sub_count >> 1
+        self._max_value = int(max_ms * 1000)
+        self.counts = [0] * (self._index(self._max_value) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.min_ms = None
+        self.max_ms_seen = None
+
+    def _index(self, value):
+        """微秒值 -> 桶下标"""
+        if value < self._sub_count:
+            return value
+        shift = value.bit_length() - self.precision_bits
+        return shift * self._half + (value >> shift)
+
+    def relative_error(self):
+        """最坏情况下桶宽与桶下界之比，即分位数（取桶上界）的相对误差上界"""
+        return max((high - low + 1) / low for low, high in map(self._bounds, range(self._sub_count, len(self.counts))))
+
+    def _bounds(self, index):
+        """桶下标 -> 该桶覆盖的微秒区间 [low, high]"""
+        if index < self._sub_count:
+            return index, index
+        shift = index // self._half - 1
+        low = (index - shift * self._half) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, ms, count=1):
+        """记录一个延迟值（毫秒）"""
+        ms = min(ms, self.max_ms)
+        value = max(int(ms * 1000), 0)
+        self.counts[self._index(value)] += count
+        self.total += count
+        self.sum_ms += ms * count
+        if self.min_ms is None or ms < self.min_ms:
+            self.min_ms = ms
+        if self.max_ms_seen is None or ms > self.max_ms_seen:
+            self.max_ms_seen = ms
+
+    @property
+    def mean(self):
+        return self.sum_ms / self.total if self.total else 0.0
+
+    def percentile(self, p):
+        """返回第 p 百分位（0-100）的延迟，取所在桶的上界"""
+        if not self.total:
+            return 0.0
+        rank = max(1, -(-self.total * p // 100))  # 向上取整
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                high_ms = self._bounds(index)[1] / 1000
+                return min(high_ms, self.max_ms_seen)
+        return self.max_ms_seen
+
+    def percentiles(self):
+        """常用分位数"""
+        return {
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p99.9": self.percentile(99.9)
+        }
+
+    def merge(self, other):
+        """合并另一个直方图（参数必须相同）"""
+        if len(other.counts) != len(self.counts):
+            raise ValueError("直方图参数不一致，无法合并")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        self.sum_ms += other.sum_ms
+        if other.min_ms is not None and (self.min_ms is None or other.min_ms < self.min_ms):
+            self.min_ms = other.min_ms
+        if other.max_ms_seen is not None and (self.max_ms_seen is None or other.max_ms_seen > self.max_ms_seen):
+            self.max_ms_seen = other.max_ms_seen
+        return self
+
+    def snapshot(self):
+        """返回当前状态的副本"""
+        return LatencyHistogram(self.max_ms, self.precision_bits).merge(self)
+
+    def to_dict(self):
+        """序列化（只保存非零桶）"""
+        return {
+            "max_ms": self.max_ms,
+            "precision_bits": self.precision_bits,
+            "buckets": {str(i): c for i, c in enumerate(self.counts) if c},
+            "total": self.total,
+            "sum_ms": self.sum_ms,
+            "min_ms": self.min_ms,
+            "max_ms_seen": self.max_ms_seen
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """反序列化"""
+        hist = cls(data["max_ms"], data["precision_bits"])
+        for index, count in data["buckets"].items():
+            hist.counts[int(index)] = count
+        hist.total = data["total"]
+        hist.sum_ms = data["sum_ms"]
+        hist.min_ms = data["min_ms"]
+        hist.max_ms_seen = data["max_ms_seen"]
+        return hist
+
+
+class RunStats:
+    """一次压测的统计：延迟直方图 + 状态码分布 + 每秒时间序列"""
+
+    def __init__(self):
+        self.total = 0
+        self.success = 0
+        self.failed = 0
+        self.latency = LatencyHistogram()
+        self.status_codes = Counter()  # {200: n, 400: n, "error": n, "dropped": n}
+        self.timeseries = {}  # {秒: [请求数, 失败数, 有延迟的请求数, 延迟总和ms, 最大延迟ms]}
+
+    def record(self, ok, elapsed_ms, status, second):
+        """
+        记录一次请求
+        :param status: HTTP 状态码；连接异常为 "error"，开环模式丢弃为 "dropped"
+        :param second: 相对测试开始的秒数
+        """
+        self.total += 1
+        if ok:
+            self.success += 1
+        else:
+            self.failed += 1
+        self.status_codes[status] += 1
+
+        point = self.timeseries.get(second)
+        if point is None:
+            point = self.timeseries[second] = [0, 0, 0, 0.0, 0.0]
+        point[0] += 1
+        point[1] += 0 if ok else 1
+        if elapsed_ms is not None:
+            self.latency.record(elapsed_ms)
+            point[2] += 1
+            point[3] += elapsed_ms
+            point[4] = max(point[4], elapsed_ms)
+
+    def merge(self, other):
+        """合并另一份统计"""
+        self.total += other.total
+        self.success += other.success
+        self.failed += other.failed
+        self.latency.merge(other.latency)
+        self.status_codes.update(other.status_codes)
+        for second, other_point in other.timeseries.items():
+            point = self.timeseries.setdefault(second, [0, 0, 0, 0.0, 0.0])
+            for i in range(4):
+                point[i] += other_point[i]
+            point[4] = max(point[4], other_point[4])
+        return self
+
+    def error_breakdown(self):
+        """非 2xx 结果按状态码统计"""
+        return {str(k): v for k, v in self.status_codes.items()
+                if not (isinstance(k, int) and 200 <= k < 300)}
+
+    def to_dict(self):
+        """导出为可 JSON 序列化的字典"""
+        return {
+            "total": self.total,
+            "success": self.success,
+            "failed": self.failed,
+            "latency_ms": {
+                "mean": self.latency.mean,
+                "min": self.latency.min_ms,
+                "max": self.latency.max_ms_seen,
+                **self.latency.percentiles()
+            },
+            "status_codes": {str(k): v for k, v in self.status_codes.items()},
+            "timeseries": [
+                {"second": s, "requests": r, "errors": e, "timed": n,
+                 "avg_ms": t / n if n else 0.0, "max_ms": m}
+                for s, (r, e, n, t, m) in sorted(self.timeseries.items())
+            ],
+            "histogram": self.latency.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果恢复"""
+        stats = cls()
+        stats.total = data["total"]
+        stats.success = data["success"]
+        stats.failed = data["failed"]
+        stats.latency = LatencyHistogram.from_dict(data["histogram"])
+        for key, count in data["status_codes"].items():
+            stats.status_codes[int(key) if key.isdigit() else key] = count
+        for point in data["timeseries"]:
+            stats.timeseries[point["second"]] = [
+                point["requests"], point["errors"], point["timed"],
+                point["avg_ms"] * point["timed"], point["max_ms"]
+            ]
+        return stats
+
+    def export_json(self, path):
+        """导出 JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def export_csv(self, path):
+        """导出每秒时间序列 CSV"""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["second", "requests", "errors", "avg_ms", "max_ms"])
+            for point in self.to_dict()["timeseries"]:
+                writer.writerow([point["second"], point["requests"], point["errors"],
+                                 f"{point['avg_ms']:.3f}", f"{point['max_ms']:.3f}"])
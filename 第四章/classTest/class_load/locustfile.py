@@ -1,12 +1,22 @@
 """
 Locust 负载测试文件
 用 Python + Locust 在 VS Code 中模拟 100 用户同时请求 /order 接口，观察响应时间
+
+设置环境变量 LOCUST_SCENARIO=scenarios/mixed.json 后改为按场景文件执行（ScenarioUser）
 """
+import os
+import time
+
 from locust import HttpUser, task, between
 
+from scenario import load_scenario
+
+SCENARIO_FILE = os.environ.get("LOCUST_SCENARIO")
+
 
 class WebsiteUser(HttpUser):
     """网站用户类"""
+    abstract = SCENARIO_FILE is not None
     wait_time = between(1, 3)  # 每次请求间隔1-3秒
     
     @task
@@ -14,3 +24,25 @@ class WebsiteUser(HttpUser):
         """下单任务"""
         self.client.post("/order", json={"item": "book", "qty": 1})
 
+
+class ScenarioUser(HttpUser):
+    """场景用户类 - 任务、思考时间、请求参数与断言都来自场景文件"""
+    abstract = SCENARIO_FILE is None
+    scenario = load_scenario(SCENARIO_FILE) if SCENARIO_FILE else None
+    
+    def wait_time(self):
+        return self.scenario.think_time()
+    
+    @task
+    def run_scenario(self):
+        """按权重选择任务，顺序执行其步骤"""
+        ctx = {"user": id(self)}
+        for step in self.scenario.pick_task().steps:
+            start = time.perf_counter()
+            with self.client.request(step.method, step.path(ctx), data=step.body(ctx),
+                                     headers={"Content-Type": "application/json"},
+                                     name=step.name, catch_response=True) as res:
+                error = step.check(res.status_code, res.content, (time.perf_counter() - start) * 1000)
+                if error:
+                    res.failure(error)
+                    return
@@ -0,0 +1,226 @@
+"""
+场景化负载测试 - 用 JSON/YAML 描述多接口、带权重的压测场景
+- tasks: 按 weight 加权随机选择的任务，每个任务由若干步骤（请求）顺序组成
+- think_time: 思考时间分布（constant / uniform / exponential）
+- 请求体与路径支持参数化占位符，如 ${randint:1,5}、${choice:book,pen}、${seq}
+- expect: 每个步骤的断言（状态码、JSON 字段、包含文本、最大耗时）
+场景在加载时一次性编译：静态请求体预先编码为 bytes，占位符参数预先解析
+"""
+import itertools
+import json
+import random
+import re
+import string
+import time
+import uuid
+from bisect import bisect
+from itertools import accumulate
+
+from async_load import AsyncLoadTester
+
+_PLACEHOLDER = re.compile(r"\$\{(\w+)(?::([^}]*))?\}")
+
+
+def _make_generator(name, args):
+    """把占位符编译为生成函数 fn(ctx)"""
+    args = [a.strip() for a in args.split(",")] if args else []
+    if name == "randint":
+        low, high = int(args[0]), int(args[1])
+        return lambda ctx: random.randint(low, high)
+    if name == "uniform":
+        low, high = float(args[0]), float(args[1])
+        return lambda ctx: random.uniform(low, high)
+    if name == "choice":
+        return lambda ctx: random.choice(args)
+    if name == "seq":
+        counter = itertools.count(int(args[0]) if args else 1)
+        return lambda ctx: next(counter)
+    if name == "randstr":
+        length = int(args[0]) if args else 8
+        return lambda ctx: "".join(random.choices(string.ascii_lowercase + string.digits, k=length))
+    if name == "uuid":
+        return lambda ctx: uuid.uuid4().hex
+    if name == "user":
+        return lambda ctx: ctx["user"]
+    raise ValueError(f"未知的占位符: {name}")
+
+
+def compile_template(template):
+    """
+    编译请求模板
+    :return: (是否静态, 值) - 静态时值为模板本身，否则为生成函数 fn(ctx)
+    """
+    if isinstance(template, str):
+        matches = list(_PLACEHOLDER.finditer(template))
+        if not matches:
+            return True, template
+        if len(matches) == 1 and matches[0].group(0) == template:
+            # 整个字符串就是一个占位符：保留生成值的类型（如 randint 生成 int）
+            return False, _make_generator(matches[0].group(1), matches[0].group(2))
+        parts, pos = [], 0
+        for m in matches:
+            parts.append(template[pos:m.start()])
+            parts.append(_make_generator(m.group(1), m.group(2)))
+            pos = m.end()
+        parts.append(template[pos:])
+        return False, lambda ctx: "".join(p if isinstance(p, str) else str(p(ctx)) for p in parts)
+
+    if isinstance(template, dict):
+        compiled = {k: compile_template(v) for k, v in template.items()}
+        if all(static for static, _ in compiled.values()):
+            return True, template
+        return False, lambda ctx: {k: (v if static else v(ctx)) for k, (static, v) in compiled.items()}
+
+    if isinstance(template, list):
+        compiled = [compile_template(v) for v in template]
+        if all(static for static, _ in compiled):
+            return True, template
+        return False, lambda ctx: [v if static else v(ctx) for static, v in compiled]
+
+    return True, template
+
+
+def compile_think_time(spec):
+    """编译思考时间分布，返回 (无参采样函数, 平均值)"""
+    if spec is None:
+        return (lambda: 0.0), 0.0
+    if isinstance(spec, (int, float)):
+        return (lambda: spec), spec
+    kind = spec.get("type", "constant")
+    if kind == "constant":
+        value = spec["value"]
+        return (lambda: value), value
+    if kind == "uniform":
+        low, high = spec["min"], spec["max"]
+        return (lambda: random.uniform(low, high)), (low + high) / 2
+    if kind == "exponential":
+        mean, cap = spec["mean"], spec.get("max", float("inf"))
+        return (lambda: min(random.expovariate(1 / mean), cap)), mean
+    raise ValueError(f"未知的思考时间分布: {kind}")
+
+
+class Step:
+    """编译后的单个请求步骤"""
+
+    __slots__ = ("name", "method", "path", "body", "expect_status", "expect_json",
+                 "expect_contains", "max_ms")
+
+    def __init__(self, spec, task_name, index):
+        self.name = spec.get("name", f"{task_name}#{index + 1}")
+        self.method = spec.get("method", "GET").upper()
+
+        static, path = compile_template(spec["path"])
+        self.path = (lambda ctx: path) if static else path
+
+        if "json" not in spec:
+            body = b""
+            self.body = lambda ctx: body
+        else:
+            static, value = compile_template(spec["json"])
+            if static:
+                body = json.dumps(value).encode()
+                self.body = lambda ctx: body
+            else:
+                self.body = lambda ctx: json.dumps(value(ctx)).encode()
+
+        expect = spec.get("expect", {})
+        status = expect.get("status", 200)
+        self.expect_status = frozenset(status if isinstance(status, list) else [status])
+        self.expect_json = expect.get("json")
+        contains = expect.get("contains")
+        self.expect_contains = contains.encode() if contains else None
+        self.max_ms = expect.get("max_ms")
+
+    def check(self, status, body, elapsed_ms):
+        """执行断言，返回失败原因，通过返回None"""
+        if status not in self.expect_status:
+            return f"状态码 {status}"
+        if self.expect_contains is not None and self.expect_contains not in body:
+            return "响应不包含期望文本"
+        if self.expect_json:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                return "响应不是JSON"
+            for key, value in self.expect_json.items():
+                if not isinstance(data, dict) or data.get(key) != value:
+                    return f"字段 {key} 不符"
+        if self.max_ms is not None and elapsed_ms > self.max_ms:
+            return "响应超时"
+        return None
+
+
+class Task:
+    """一组顺序执行的步骤"""
+
+    __slots__ = ("name", "weight", "steps")
+
+    def __init__(self, spec):
+        self.name = spec["name"]
+        self.weight = spec.get("weight", 1)
+        self.steps = [Step(step, self.name, i) for i, step in enumerate(spec["steps"])]
+
+
+class Scenario:
+    """编译后的场景"""
+
+    def __init__(self, spec):
+        self.name = spec.get("name", "scenario")
+        self.tasks = [Task(t) for t in spec["tasks"]]
+        if not self.tasks:
+            raise ValueError("场景至少需要一个任务")
+        self._cumulative = list(accumulate(t.weight for t in self.tasks))
+        self.think_time, self.mean_think_time = compile_think_time(spec.get("think_time"))
+
+    def pick_task(self):
+        """按权重随机选择任务"""
+        return self.tasks[bisect(self._cumulative, random.random() * self._cumulative[-1])]
+
+
+def load_scenario(source):
+    """
+    加载并编译场景
+    :param source: 场景文件路径（.json / .yaml / .yml）、字典或已编译的 Scenario
+    """
+    if isinstance(source, Scenario):
+        return source
+    if isinstance(source, dict):
+        return Scenario(source)
+    with open(source, encoding="utf-8") as f:
+        if str(source).endswith((".yaml", ".yml")):
+            import yaml  # 仅 YAML 场景需要 pyyaml
+            return Scenario(yaml.safe_load(f))
+        return Scenario(json.load(f))
+
+
+class ScenarioLoadTester(AsyncLoadTester):
+    """按场景执行的负载测试器"""
+
+    def __init__(self, host, scenario, users=100, duration=10, **options):
+        """
+        :param scenario: 场景文件路径 / 字典 / Scenario
+        :param options: 其他参数同 AsyncLoadTester（think_time 由场景决定）
+        """
+        self.scenario = load_scenario(scenario)
+        options["think_time"] = self.scenario.mean_think_time
+        super().__init__(host, users=users, duration=duration, **options)
+
+    def next_think_time(self):
+        return self.scenario.think_time()
+
+    async def run_iteration(self, pool, scheduled, user):
+        """选择一个任务并顺序执行其步骤，某一步失败则结束本次任务"""
+        task = self.scenario.pick_task()
+        ctx = {"user": user}
+        for step in task.steps:
+            try:
+                status, body = await pool.request(step.method, step.path(ctx), body=step.body(ctx))
+            except Exception:
+                self.record(False, None)
+                return
+            elapsed_ms = (time.perf_counter() - scheduled) * 1000
+            error = step.check(status, body, elapsed_ms)
+            self.record(error is None, elapsed_ms, status if error is None else f"{step.name}: {error}")
+            if error is not None:
+                return
+            scheduled = time.perf_counter()
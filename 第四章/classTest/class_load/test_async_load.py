@@ -0,0 +1,81 @@
+"""
+异步负载测试引擎测试
+在后台线程启动 app.py 的 Flask 服务（随机端口），用引擎进行短时间压测
+"""
+import asyncio
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+import app as order_app
+from async_load import AsyncLoadTester
+
+
+@pytest.fixture(scope="module")
+def host():
+    """后台启动订单服务"""
+    server = make_server("127.0.0.1", 0, order_app.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_stage_interpolation():
+    """测试1: 分阶段计划线性插值"""
+    tester = AsyncLoadTester("http://127.0.0.1:1", users=100, duration=10, ramp_up=4)
+    assert tester.duration == 10
+    assert tester.target_at(0) == 0
+    assert tester.target_at(2) == 50
+    assert tester.target_at(6) == 100
+    staged = AsyncLoadTester("http://127.0.0.1:1", stages=[(1, 10), (1, 30), (1, 0)])
+    assert staged.duration == 3 and staged.target_at(1.5) == 20 and staged.target_at(2.5) == 15
+
+
+def test_closed_loop_reuses_connections(host):
+    """测试2: 闭环模式，连接数不超过连接池大小"""
+    tester = AsyncLoadTester(host, users=50, duration=1, think_time=0.05, connections=10)
+    tester.run()
+    assert tester.results["total"] > 50
+    assert tester.results["failed"] == 0
+    assert tester.results["latency"].total == tester.results["total"]
+    assert tester.results["status_codes"][200] == tester.results["total"]
+
+
+def test_open_loop_constant_rate(host):
+    """测试3: 开环模式按固定速率发起请求"""
+    tester = AsyncLoadTester(host, users=200, duration=1, mode="open", rate=200, connections=20)
+    tester.run()
+    assert 150 <= tester.results["total"] <= 210
+    assert tester.results["success"] == tester.results["total"]
+
+
+def test_connection_refused_counts_as_failure():
+    """测试4: 服务不可用时请求记为失败"""
+    tester = AsyncLoadTester("http://127.0.0.1:1", users=5, duration=0.3, think_time=0.05)
+    tester.run()
+    assert tester.results["total"] > 0
+    assert tester.results["failed"] == tester.results["total"]
+    assert tester.stats.error_breakdown() == {"error": tester.results["total"]}
+
+
+def test_open_loop_yields_when_behind_schedule():
+    """测试5: 到达速率远超处理能力时，调度循环仍让出事件循环，其他任务和在途请求能推进"""
+    tester = AsyncLoadTester("http://127.0.0.1:1", users=50, duration=0.3, mode="open", rate=10 ** 6)
+    ticks = []
+
+    async def main():
+        async def ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await tester.run_async()
+        task.cancel()
+
+    asyncio.run(main())
+    assert len(ticks) > 100
+    # 在途请求得到执行（连接被拒记为 error），而不是全部因在途数满而丢弃
+    assert tester.stats.error_breakdown().get("error", 0) > 50
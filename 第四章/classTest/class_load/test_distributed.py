@@ -0,0 +1,100 @@
+"""
+分布式负载测试（协调者 / 工作者）测试
+在本机启动订单服务，协调者拉起本地工作进程，另有一个工作者在线程中以“远程”方式连接
+"""
+import json
+import socket
+import threading
+import time
+
+import pytest
+from werkzeug.serving import make_server
+
+import app as order_app
+from distributed import Coordinator, run_worker
+from latency_histogram import RunStats
+
+
+@pytest.fixture(scope="module")
+def host():
+    """后台启动订单服务"""
+    server = make_server("127.0.0.1", 0, order_app.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_split_users_across_workers():
+    """测试1: 用户数和阶段计划按比例拆分"""
+    coordinator = Coordinator("http://127.0.0.1:1", users=10, duration=4, workers=3, ramp_up=2)
+    configs = [coordinator._worker_config(i, 3) for i in range(3)]
+    assert [c["users"] for c in configs] == [4, 3, 3]
+    assert configs[0]["stages"] == [(2, 4.0), (2, 4.0)]
+    assert sum(c["stages"][1][1] for c in configs) == pytest.approx(10)
+
+
+def test_local_and_remote_workers_merge(host):
+    """测试2: 本地工作进程与远程工作者的统计合并为一份报告"""
+    coordinator = Coordinator(host, users=20, duration=1.5, workers=1, remote_workers=1,
+                              think_time=0.05, connections=10, live=False)
+    address = coordinator.listen()
+    remote = threading.Thread(target=run_worker, args=(address, 0.3), daemon=True)
+    remote.start()
+
+    coordinator.run()
+    remote.join(timeout=5)
+
+    results = coordinator.results
+    assert results["total"] > 40
+    assert results["failed"] == 0
+    assert results["latency"].total == results["total"]
+    assert sum(point[0] for point in coordinator.stats.timeseries.values()) == results["total"]
+
+
+def test_missing_worker_times_out():
+    """测试3: 工作者没有全部连上时，协调者超时报错并指出缺少哪些工作者"""
+    coordinator = Coordinator("http://127.0.0.1:1", users=2, duration=1, workers=0, remote_workers=2,
+                              connect_timeout=0.3, live=False)
+    address = coordinator.listen()
+    remote = threading.Thread(target=run_worker, args=(address, 0.3, "remote-a"), daemon=True)
+    remote.start()
+    with pytest.raises(TimeoutError, match="1/2.*远程工作者 1 个"):
+        coordinator.run()
+    remote.join(timeout=5)
+    assert not remote.is_alive()
+
+
+def _stalled_worker(address, received):
+    """假工作者：回传一次统计后卡住不再发送"""
+    sock = socket.create_connection(address)
+    sock.sendall(json.dumps({"type": "hello", "name": "stuck"}).encode() + b"\n")
+    received.append(json.loads(sock.makefile("rb").readline()))
+    stats = RunStats()
+    stats.record(True, 5.0, 200, 0)
+    sock.sendall(json.dumps({"type": "stats", "data": stats.to_dict()}).encode() + b"\n")
+    time.sleep(3)
+    sock.close()
+
+
+def test_stalled_worker_reported_as_failed(host):
+    """测试4: 中途卡住的工作者在 stall_timeout 后记为失败，其余工作者的统计照常合并"""
+    coordinator = Coordinator(host, users=4, duration=1, workers=0, remote_workers=2,
+                              think_time=0.05, connections=4, stall_timeout=0.5, live=False)
+    address = coordinator.listen()
+    received = []
+    stuck = threading.Thread(target=_stalled_worker, args=(address, received), daemon=True)
+    stuck.start()
+    remote = threading.Thread(target=run_worker, args=(address, 0.3, "remote-ok"), daemon=True)
+    remote.start()
+
+    started = time.perf_counter()
+    coordinator.run()
+    assert time.perf_counter() - started < 2.5
+    remote.join(timeout=5)
+
+    assert [name.split("（")[0] for name in coordinator.failed_workers] == ["stuck"]
+    assert received[0]["offset"] >= 0
+    assert coordinator.results["total"] > 1
+    # 各工作者的时间序列都按协调者的开始时刻对齐，不会超出压测时长
+    assert max(coordinator.stats.timeseries) <= 1
@@ -0,0 +1,74 @@
+"""延迟直方图与压测统计测试"""
+import csv
+import json
+import random
+
+from latency_histogram import LatencyHistogram, RunStats
+
+
+def test_percentiles_within_one_percent():
+    """测试1: 分位数相对误差小于1%"""
+    rng = random.Random(1)
+    values = sorted(rng.expovariate(1 / 20) for _ in range(20000))
+    hist = LatencyHistogram()
+    for v in values:
+        hist.record(v)
+
+    for p in (50, 90, 99, 99.9):
+        exact = values[int(len(values) * p / 100) - 1]
+        assert abs(hist.percentile(p) - exact) / exact < 0.01
+    assert hist.total == 20000
+    assert hist.min_ms == values[0] and hist.max_ms_seen == values[-1]
+
+    # 按桶宽计算的误差上界本身也小于1%（7 位精度为 1/64，不满足）
+    assert hist.relative_error() < 0.01
+    assert LatencyHistogram(precision_bits=7).relative_error() > 0.015
+    for value in (128, 255, 1000, 65535, 123457, 59999999):
+        low, high = hist._bounds(hist._index(value))
+        assert low <= value <= high and (high - value) / value < 0.01
+
+
+def test_fixed_memory_and_clamp():
+    """测试2: 桶数量固定，超出上限的值按上限记录"""
+    hist = LatencyHistogram(max_ms=1000)
+    buckets = len(hist.counts)
+    for i in range(100000):
+        hist.record(i % 5000)
+    assert len(hist.counts) == buckets
+    assert hist.max_ms_seen == 1000 and hist.percentile(100) == 1000
+
+
+def test_merge_and_roundtrip():
+    """测试3: 合并结果与一次性记录相同，序列化后可还原"""
+    a, b, whole = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i in range(1, 1001):
+        (a if i % 2 else b).record(i / 10)
+        whole.record(i / 10)
+    merged = a.snapshot().merge(b)
+    assert merged.counts == whole.counts
+    assert merged.percentiles() == whole.percentiles()
+    assert LatencyHistogram.from_dict(json.loads(json.dumps(merged.to_dict()))).counts == whole.counts
+
+
+def test_run_stats_export(tmp_path):
+    """测试4: 状态码分布、每秒时间序列与 JSON/CSV 导出"""
+    stats = RunStats()
+    stats.record(True, 10.0, 200, 0)
+    stats.record(False, 30.0, 400, 0)
+    stats.record(False, None, "error", 1)
+    stats.record(True, 20.0, 200, 1)
+
+    assert stats.error_breakdown() == {"400": 1, "error": 1}
+    data = stats.to_dict()
+    assert data["timeseries"][0] == {"second": 0, "requests": 2, "errors": 1, "timed": 2,
+                                     "avg_ms": 20.0, "max_ms": 30.0}
+
+    stats.export_json(tmp_path / "run.json")
+    restored = RunStats.from_dict(json.loads((tmp_path / "run.json").read_text(encoding="utf-8")))
+    assert restored.to_dict() == data
+
+    stats.export_csv(tmp_path / "run.csv")
+    with open(tmp_path / "run.csv", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["second", "requests", "errors", "avg_ms", "max_ms"]
+    assert rows[2] == ["1", "2", "1", "20.000", "20.000"]
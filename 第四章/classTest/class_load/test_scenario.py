@@ -0,0 +1,78 @@
+"""场景化负载测试测试"""
+import json
+import os
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+import app as order_app
+from scenario import ScenarioLoadTester, compile_template, load_scenario
+
+
+@pytest.fixture(scope="module")
+def host():
+    """后台启动订单服务"""
+    server = make_server("127.0.0.1", 0, order_app.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_compile_template():
+    """测试1: 静态模板保持原样，占位符每次生成新值"""
+    assert compile_template({"item": "book", "qty": 1}) == (True, {"item": "book", "qty": 1})
+
+    static, make = compile_template({"qty": "${randint:2,2}", "name": "u_${seq:10}", "who": "${user}"})
+    assert not static
+    assert make({"user": 7}) == {"qty": 2, "name": "u_10", "who": 7}
+    assert make({"user": 7})["name"] == "u_11"
+
+    with pytest.raises(ValueError):
+        compile_template("${nope}")
+
+
+def test_sample_scenario_compiles():
+    """测试2: 示例场景可编译，任务按权重选择"""
+    scenario = load_scenario(os.path.join(os.path.dirname(__file__), "scenarios", "mixed.json"))
+    assert [t.name for t in scenario.tasks] == ["下单", "结算", "登录", "健康检查"]
+    assert scenario.mean_think_time == 1.0
+    picks = [scenario.pick_task().name for _ in range(5000)]
+    assert 0.5 < picks.count("下单") / 5000 < 0.7
+
+    body = json.loads(scenario.tasks[0].steps[0].body({"user": 0}))
+    assert body["item"] in ("book", "pen", "notebook") and 1 <= body["qty"] <= 3
+
+
+def test_step_assertions():
+    """测试3: 状态码、JSON 字段、文本与耗时断言"""
+    step = load_scenario({"tasks": [{"name": "t", "steps": [{
+        "path": "/x", "expect": {"status": [200], "json": {"success": True}, "max_ms": 100}
+    }]}]}).tasks[0].steps[0]
+    assert step.check(200, b'{"success": true}', 10) is None
+    assert step.check(500, b"", 10) == "状态码 500"
+    assert step.check(200, b'{"success": false}', 10) == "字段 success 不符"
+    assert step.check(200, b'{"success": true}', 200) == "响应超时"
+
+
+def test_run_scenario(host):
+    """测试4: 按场景压测，断言失败按步骤统计"""
+    spec = {
+        "think_time": {"type": "constant", "value": 0.02},
+        "tasks": [
+            {"name": "order", "weight": 3, "steps": [
+                {"method": "POST", "path": "/order", "json": {"item": "book", "qty": "${randint:1,2}"},
+                 "expect": {"status": 200, "json": {"success": True}}},
+                {"method": "GET", "path": "/health", "expect": {"contains": "healthy"}}
+            ]},
+            {"name": "missing", "weight": 1, "steps": [{"method": "GET", "path": "/checkout"}]}
+        ]
+    }
+    tester = ScenarioLoadTester(host, spec, users=10, duration=1)
+    tester.run()
+
+    errors = tester.stats.error_breakdown()
+    assert tester.results["total"] > 50
+    assert tester.stats.status_codes[200] > 0
+    assert set(errors) == {"missing#1: 状态码 404"}
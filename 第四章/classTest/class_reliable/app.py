@@ -1,31 +1,32 @@
 from flask import Flask, request, jsonify
+import os
 import sqlite3
+import sys
+
+from storage import OrderStore
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.idempotency import IdempotencyStore, idempotent
 
 app = Flask(__name__)
 DB_FILE = 'orders.db'
+store = OrderStore(DB_FILE)
+# 数据库故障返回的 503 不缓存，客户端可以用同一个键重试
+idempotency = IdempotencyStore()
 
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute('CREATE TABLE IF NOT EXISTS orders (id INTEGER PRIMARY KEY, item TEXT, qty INTEGER, status TEXT)')
-    cursor.execute('CREATE TABLE IF NOT EXISTS inventory (item TEXT PRIMARY KEY, stock INTEGER)')
-    cursor.execute("DELETE FROM inventory")
-    cursor.execute("INSERT OR REPLACE INTO inventory VALUES ('book', 100)")
-    cursor.execute("INSERT OR REPLACE INTO inventory VALUES ('pen', 200)")
-    conn.commit()
-    conn.close()
+    store.init_schema({'book': 100, 'pen': 200})
 
 @app.route('/health', methods=['GET'])
 def health():
     try:
-        conn = sqlite3.connect(DB_FILE, timeout=2)
-        conn.execute("SELECT 1")
-        conn.close()
+        store.ping()
         return jsonify({"status": "healthy"}), 200
     except:
         return jsonify({"status": "unhealthy"}), 503
 
 @app.route('/order', methods=['POST'])
+@idempotent(idempotency)
 def create_order():
     try:
         data = request.get_json()
@@ -35,23 +36,9 @@ def create_order():
         if not item or qty <= 0:
             return jsonify({"status": "error", "message": "Invalid input"}), 400
         
-        conn = sqlite3.connect(DB_FILE, timeout=5)
-        cursor = conn.cursor()
-        cursor.execute("SELECT stock FROM inventory WHERE item=?", (item,))
-        result = cursor.fetchone()
-        
-        if not result:
-            conn.close()
-            return jsonify({"status": "error", "message": "Item not found"}), 400
-        
-        if result[0] < qty:
-            conn.close()
-            return jsonify({"status": "error", "message": "Insufficient stock"}), 400
-        
-        cursor.execute("INSERT INTO orders (item, qty, status) VALUES (?, ?, 'completed')", (item, qty))
-        cursor.execute("UPDATE inventory SET stock = stock - ? WHERE item = ?", (qty, item))
-        conn.commit()
-        conn.close()
+        ok, result = store.create_order(item, qty)
+        if not ok:
+            return jsonify({"status": "error", "message": result}), 400
         
         return jsonify({"status": "success", "message": "Order created"}), 200
     except sqlite3.OperationalError:
@@ -59,6 +46,10 @@ def create_order():
     except:
         return jsonify({"status": "error", "message": "Server error"}), 500
 
+@app.route('/idempotency/stats', methods=['GET'])
+def idempotency_stats():
+    return jsonify(idempotency.stats()), 200
+
 if __name__ == '__main__':
     init_db()
     print("服务启动: http://127.0.0.1:5000")
@@ -0,0 +1,90 @@
+"""
+并发下单压测 - 原实现（先查后改，无事务） vs 存储层（BEGIN IMMEDIATE + 条件UPDATE）
+统计吞吐量、503 数量与超卖数量
+运行: python bench_concurrency.py [线程数] [每线程请求数]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from storage import OrderStore
+
+STOCK = 500
+
+
+def legacy_create_order(db_file, item, qty):
+    """原 app.py 的下单逻辑：每次新建连接，先查库存再写入"""
+    conn = sqlite3.connect(db_file, timeout=5)
+    cursor = conn.cursor()
+    cursor.execute("SELECT stock FROM inventory WHERE item=?", (item,))
+    result = cursor.fetchone()
+    if not result or result[0] < qty:
+        conn.close()
+        return False, "Insufficient stock"
+    cursor.execute("INSERT INTO orders (item, qty, status) VALUES (?, ?, 'completed')", (item, qty))
+    cursor.execute("UPDATE inventory SET stock = stock - ? WHERE item = ?", (qty, item))
+    conn.commit()
+    conn.close()
+    return True, None
+
+
+def run(name, create_order, store, threads, per_thread):
+    """并发执行下单并输出结果"""
+    counts = {"success": 0, "rejected": 0, "db_error": 0}
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(per_thread):
+            try:
+                key = "success" if create_order("book", 1)[0] else "rejected"
+            except sqlite3.OperationalError:
+                key = "db_error"
+            with lock:
+                counts[key] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    orders, sold = store.count_orders("book")
+    stock = store.get_stock("book")
+    oversell = max(0, sold - STOCK, -stock)
+    print(f"\n【{name}】")
+    print(f"  吞吐量: {threads * per_thread / elapsed:,.0f} req/s")
+    print(f"  成功: {counts['success']}  库存不足: {counts['rejected']}  数据库错误(503): {counts['db_error']}")
+    print(f"  订单数: {orders}  剩余库存: {stock}  超卖: {oversell}")
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print("=" * 60)
+    print(f"并发下单压测 - 库存 {STOCK}，{threads} 线程 x {per_thread} 请求")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        legacy_store = OrderStore(legacy_db)
+        legacy_store.init_schema({"book": STOCK})
+        legacy_store.connection().execute("PRAGMA journal_mode=DELETE")
+        legacy_store.close()
+        run("原实现", lambda item, qty: legacy_create_order(legacy_db, item, qty),
+            legacy_store, threads, per_thread)
+
+        store = OrderStore(os.path.join(tmp, "orders.db"))
+        store.init_schema({"book": STOCK})
+        run("存储层", store.create_order, store, threads, per_thread)
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
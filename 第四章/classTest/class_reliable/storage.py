@@ -0,0 +1,149 @@
+"""
+订单存储层
+- WAL 日志模式：读写互不阻塞
+- 按线程复用连接；数据库文件被移走/替换时自动识别（保持容错测试的行为）
+- 下单在 BEGIN IMMEDIATE 事务中完成，条件 UPDATE ... WHERE stock >= ? 保证不会超卖
+- 数据库忙（database is locked/busy）时按指数退避有限次重试
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+
+
+class RetryPolicy:
+    """数据库忙时的重试策略：指数退避 + 随机抖动"""
+
+    def __init__(self, attempts=5, base_delay=0.005, max_delay=0.2):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def is_busy(error):
+        """是否为可重试的忙错误"""
+        message = str(error).lower()
+        return "locked" in message or "busy" in message
+
+    def run(self, func):
+        """执行 func，遇到忙错误时重试，超过次数后抛出最后一次异常"""
+        for attempt in range(self.attempts):
+            try:
+                return func()
+            except sqlite3.OperationalError as e:
+                if not self.is_busy(e) or attempt == self.attempts - 1:
+                    raise
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                time.sleep(random.uniform(0, delay))
+
+
+class OrderStore:
+    """订单与库存存储"""
+
+    def __init__(self, db_path, busy_timeout=1.0, retry=None):
+        """
+        :param db_path: 数据库文件路径
+        :param busy_timeout: SQLite 内部等待锁的秒数
+        :param retry: 重试策略，默认 RetryPolicy()
+        """
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.retry = retry or RetryPolicy()
+        self._local = threading.local()
+
+    def _file_id(self):
+        """数据库文件标识；文件不存在时视为数据库故障"""
+        try:
+            st = os.stat(self.db_path)
+        except FileNotFoundError:
+            raise sqlite3.OperationalError("unable to open database file")
+        return st.st_dev, st.st_ino
+
+    def connection(self, create=False):
+        """
+        获取当前线程的连接
+        :param create: 数据库文件不存在时是否创建（仅初始化时使用）
+        """
+        if create and not os.path.exists(self.db_path):
+            sqlite3.connect(self.db_path).close()
+        file_id = self._file_id()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.file_id != file_id:
+            # 文件被替换（如从备份恢复），旧连接指向的已不是当前文件
+            conn.close()
+            conn = None
+        if conn is None:
+            # isolation_level=None：由我们显式控制事务
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.file_id = file_id
+        return conn
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def init_schema(self, stock=None):
+        """
+        建表建索引并重置库存
+        :param stock: 初始库存 {item: qty}
+        """
+        conn = self.connection(create=True)
+        conn.execute("CREATE TABLE IF NOT EXISTS orders (id INTEGER PRIMARY KEY, item TEXT, qty INTEGER, status TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS inventory (item TEXT PRIMARY KEY, stock INTEGER)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_item_status ON orders (item, status)")
+        if stock is not None:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM inventory")
+            conn.executemany("INSERT OR REPLACE INTO inventory VALUES (?, ?)", list(stock.items()))
+            conn.execute("COMMIT")
+
+    def ping(self):
+        """健康检查"""
+        self.connection().execute("SELECT 1 FROM inventory LIMIT 1")
+
+    def create_order(self, item, qty):
+        """
+        扣减库存并创建订单
+        :return: (True, 订单ID) 或 (False, 错误信息)
+        """
+        return self.retry.run(lambda: self._create_order(item, qty))
+
+    def _create_order(self, item, qty):
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            updated = conn.execute(
+                "UPDATE inventory SET stock = stock - ? WHERE item = ? AND stock >= ?", (qty, item, qty)
+            ).rowcount
+            if not updated:
+                exists = conn.execute("SELECT 1 FROM inventory WHERE item = ?", (item,)).fetchone()
+                conn.execute("ROLLBACK")
+                return False, "Insufficient stock" if exists else "Item not found"
+            order_id = conn.execute(
+                "INSERT INTO orders (item, qty, status) VALUES (?, ?, 'completed')", (item, qty)
+            ).lastrowid
+            conn.execute("COMMIT")
+            return True, order_id
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def get_stock(self, item):
+        """查询库存，商品不存在返回None"""
+        row = self.connection().execute("SELECT stock FROM inventory WHERE item = ?", (item,)).fetchone()
+        return row[0] if row else None
+
+    def count_orders(self, item, status="completed"):
+        """统计订单数量与总件数（走 orders(item, status) 索引）"""
+        return self.connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(qty), 0) FROM orders WHERE item = ? AND status = ?", (item, status)
+        ).fetchone()
@@ -0,0 +1,98 @@
+"""订单存储层测试（不需要启动服务）"""
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from storage import OrderStore, RetryPolicy
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = OrderStore(str(tmp_path / "orders.db"))
+    s.init_schema({"book": 100, "pen": 200})
+    return s
+
+
+def test_create_order(store):
+    """测试1: 下单成功、库存不足、商品不存在"""
+    ok, order_id = store.create_order("book", 3)
+    assert ok and order_id == 1
+    assert store.get_stock("book") == 97
+    assert store.create_order("book", 98) == (False, "Insufficient stock")
+    assert store.create_order("car", 1) == (False, "Item not found")
+    assert store.count_orders("book") == (1, 3)
+
+
+def test_schema_uses_wal_and_index(store):
+    """测试2: WAL 模式，统计查询走 orders(item, status) 索引"""
+    conn = store.connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM orders WHERE item = ? AND status = ?", ("book", "completed")
+    ).fetchall()
+    assert "idx_orders_item_status" in str(plan)
+
+
+def test_concurrent_orders_never_oversell(store):
+    """测试3: 多线程并发下单，成功数等于库存，无数据库错误"""
+    results, errors = [], []
+
+    def worker():
+        for _ in range(40):
+            try:
+                results.append(store.create_order("book", 1)[0])
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert results.count(True) == 100
+    assert store.get_stock("book") == 0
+    assert store.count_orders("book") == (100, 100)
+
+
+def test_retry_policy():
+    """测试4: 忙错误重试，其他错误直接抛出"""
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return "ok"
+
+    assert RetryPolicy(attempts=5, base_delay=0.001).run(flaky) == "ok"
+    assert len(calls) == 3
+
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    def missing_table():
+        raise sqlite3.OperationalError("no such table: x")
+
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        RetryPolicy(attempts=2, base_delay=0.001).run(locked)
+    with pytest.raises(sqlite3.OperationalError, match="no such table"):
+        RetryPolicy().run(missing_table)
+
+
+def test_database_file_removed_and_restored(store):
+    """测试5: 数据库文件被移走时报错，恢复后自动重连"""
+    store.create_order("pen", 1)
+    backup = store.db_path + ".backup"
+    os.rename(store.db_path, backup)
+    with pytest.raises(sqlite3.OperationalError):
+        store.create_order("pen", 1)
+    with pytest.raises(sqlite3.OperationalError):
+        store.ping()
+
+    os.rename(backup, store.db_path)
+    assert store.create_order("pen", 1)[0]
+    assert store.get_stock("pen") == 198
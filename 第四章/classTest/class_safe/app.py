@@ -1,8 +1,18 @@
 from flask import Flask, request, jsonify
+import os
 import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.rate_limit import LoginRateLimiter
+from common.sql_guard import SQLGuard
 
 app = Flask(__name__)
 DB_FILE = 'users.db'
+# 同一 IP / 用户名短时间内登录过多时直接返回 429，不再查库
+limiter = LoginRateLimiter(paths=['/login']).init_app(app)
+# 下面的查询仍是字符串拼接，改成参数化查询之前先在入口拦截可疑参数
+sql_guard = SQLGuard(mode='block').init_app(app)
 
 def init_db():
     conn = sqlite3.connect(DB_FILE)
@@ -0,0 +1,24 @@
+# 第四章各订单服务共用的组件
+from .inventory_store import (
+    ShardedInventoryStore,
+    MemoryBackend,
+    SQLiteBackend,
+    RedisBackend,
+    LocalRedis,
+)
+from .idempotency import IdempotencyStore, idempotent
+from .rate_limit import LoginRateLimiter
+from .sql_guard import SQLGuard
+
+
+__all__ = [
+    'ShardedInventoryStore',
+    'MemoryBackend',
+    'SQLiteBackend',
+    'RedisBackend',
+    'LocalRedis',
+    'IdempotencyStore',
+    'idempotent',
+    'LoginRateLimiter',
+    'SQLGuard',
+]
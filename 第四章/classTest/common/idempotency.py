@@ -0,0 +1,233 @@
+"""
+幂等键 - 客户端超时重试时不重复扣库存、扣余额
+- 客户端在请求头 Idempotency-Key 中带上唯一键，同一个键的重复请求直接返回第一次的响应
+- 响应缓存有容量（条数、字节数）和有效期限制，超出后按最久未使用淘汰
+- 并发到达的重复请求不会同时执行：后到的请求等待第一个请求算完，共享同一个结果
+- 同一个键配上不同的请求体视为客户端错误（422）；5xx 响应不缓存，允许重试
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+# 每条缓存除响应体外的大致开销（字典项、对象、键）
+_ENTRY_OVERHEAD = 256
+
+
+class IdempotencyConflict(Exception):
+    """同一个幂等键对应了不同的请求内容"""
+
+
+class IdempotencyInProgress(Exception):
+    """第一个请求仍在处理中，等待超时"""
+
+
+class CachedResponse:
+    """缓存的响应"""
+
+    __slots__ = ("status", "body", "content_type", "fingerprint", "expires")
+
+    def __init__(self, status, body, content_type, fingerprint, expires=0.0):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.fingerprint = fingerprint
+        self.expires = expires
+
+    @property
+    def size(self):
+        return len(self.body) + _ENTRY_OVERHEAD
+
+
+class _Flight:
+    """正在处理的请求"""
+
+    __slots__ = ("fingerprint", "done", "result")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.result = None
+
+
+class IdempotencyStore:
+    """幂等键 -> 响应的缓存，带容量、有效期和进行中请求合并"""
+
+    def __init__(self, max_entries=10000, max_bytes=16 * 1024 * 1024, ttl=24 * 3600, wait_timeout=30):
+        """
+        :param max_entries: 最多缓存的响应条数
+        :param max_bytes: 缓存响应的总字节数上限
+        :param ttl: 响应保留秒数
+        :param wait_timeout: 重复请求等待第一个请求完成的最长秒数
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+
+    def _lookup(self, key, now):
+        """取出未过期的缓存（调用方持有锁）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= now:
+            self._remove(key)
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key, response, now):
+        """写入缓存并按容量淘汰最久未使用的条目（调用方持有锁）"""
+        if response.size > self.max_bytes:
+            return
+        response.expires = now + self.ttl
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = response
+        self.bytes += response.size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def execute(self, key, fingerprint, compute):
+        """
+        按幂等键执行 compute
+        :param fingerprint: 请求内容摘要，同一个键的内容不同时抛出 IdempotencyConflict
+        :param compute: 无参函数，返回 CachedResponse（status 为 5xx 时不缓存）
+        :return: (CachedResponse, 是否为重放)
+        """
+        while True:
+            with self._lock:
+                entry = self._lookup(key, time.time())
+                if entry is not None:
+                    if entry.fingerprint != fingerprint:
+                        raise IdempotencyConflict(key)
+                    self.hits += 1
+                    return entry, True
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = _Flight(fingerprint)
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+
+            if not leader:
+                if flight.fingerprint != fingerprint:
+                    raise IdempotencyConflict(key)
+                if not flight.done.wait(self.wait_timeout):
+                    raise IdempotencyInProgress(key)
+                if flight.result is not None:
+                    return flight.result, True
+                continue  # 第一个请求抛出了异常，重新竞争执行
+
+            try:
+                response = compute()
+            except BaseException:
+                with self._lock:
+                    del self._inflight[key]
+                flight.done.set()
+                raise
+            response.fingerprint = fingerprint
+            with self._lock:
+                del self._inflight[key]
+                if response.status < 500:
+                    self._put(key, response, time.time())
+            flight.result = response
+            flight.done.set()
+            return response, False
+
+    def purge_expired(self):
+        """清理所有过期条目，返回清理数量"""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry.expires <= now]
+            for key in expired:
+                self._remove(key)
+            self.expired += len(expired)
+            return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """命中率与内存统计"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
+
+def request_fingerprint(method, path, body):
+    """请求内容摘要：方法 + 路径 + 请求体"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (method.encode(), path.encode(), body):
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def idempotent(store):
+    """
+    Flask 视图装饰器：带 Idempotency-Key 请求头的请求按键去重，不带的照常执行
+        @app.route("/order", methods=["POST"])
+        @idempotent(store)
+        def order(): ...
+    """
+    from flask import Response, jsonify, make_response, request
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(*args, **kwargs)
+
+            def compute():
+                response = make_response(view(*args, **kwargs))
+                return CachedResponse(response.status_code, response.get_data(), response.content_type, None)
+
+            fingerprint = request_fingerprint(request.method, request.path, request.get_data(cache=True))
+            try:
+                cached, replayed = store.execute((request.path, key), fingerprint, compute)
+            except IdempotencyConflict:
+                return jsonify({"error": "Idempotency-Key 已用于不同的请求"}), 422
+            except IdempotencyInProgress:
+                return jsonify({"error": "相同 Idempotency-Key 的请求正在处理"}), 409
+            response = Response(cached.body, status=cached.status, content_type=cached.content_type)
+            if replayed:
+                response.headers[REPLAY_HEADER] = "true"
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,229 @@
+"""
+分片库存存储 - 锁分段（lock striping）保证扣减原子性
+按商品哈希分到 N 个分片，每个分片一把锁，不同分片的商品可以并行扣减
+后端可插拔：内存 / SQLite / Redis（默认使用进程内的 Redis 替身）
+"""
+import sqlite3
+import threading
+
+
+class MemoryBackend:
+    """内存后端 - 普通字典"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, item):
+        """返回库存，商品不存在时返回None"""
+        return self.data.get(item)
+
+    def set(self, item, qty):
+        self.data[item] = qty
+
+    def delete(self, item):
+        self.data.pop(item, None)
+
+    def items(self):
+        return list(self.data.items())
+
+    def try_reserve(self, item, qty):
+        """扣减库存，返回扣减后的库存；商品不存在返回None，库存不足返回False"""
+        stock = self.data.get(item)
+        if stock is None:
+            return None
+        if stock < qty:
+            return False
+        self.data[item] = stock - qty
+        return stock - qty
+
+    def release(self, item, qty):
+        """归还库存"""
+        self.data[item] = self.data.get(item, 0) + qty
+        return self.data[item]
+
+
+class SQLiteBackend:
+    """SQLite 后端 - 条件 UPDATE 保证库存不会被扣成负数，每个线程一个连接"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._conn().execute("CREATE TABLE IF NOT EXISTS inventory (item TEXT PRIMARY KEY, stock INTEGER NOT NULL)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None：每条语句自动提交
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, item):
+        row = self._conn().execute("SELECT stock FROM inventory WHERE item = ?", (item,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, item, qty):
+        self._conn().execute("INSERT OR REPLACE INTO inventory (item, stock) VALUES (?, ?)", (item, qty))
+
+    def delete(self, item):
+        self._conn().execute("DELETE FROM inventory WHERE item = ?", (item,))
+
+    def items(self):
+        return self._conn().execute("SELECT item, stock FROM inventory").fetchall()
+
+    def try_reserve(self, item, qty):
+        conn = self._conn()
+        cursor = conn.execute(
+            "UPDATE inventory SET stock = stock - ? WHERE item = ? AND stock >= ?", (qty, item, qty)
+        )
+        if cursor.rowcount == 0:
+            return None if self.get(item) is None else False
+        return self.get(item)
+
+    def release(self, item, qty):
+        self._conn().execute("UPDATE inventory SET stock = stock + ? WHERE item = ?", (qty, item))
+        return self.get(item)
+
+
+class LocalRedis:
+    """进程内 Redis 替身 - 只实现库存用到的命令，每条命令原子执行"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+        return None if value is None else str(value).encode()
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = int(value)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            return 1 if self._data.pop(key, None) is not None else 0
+
+    def exists(self, key):
+        with self._lock:
+            return 1 if key in self._data else 0
+
+    def incrby(self, key, amount):
+        with self._lock:
+            self._data[key] = self._data.get(key, 0) + amount
+            return self._data[key]
+
+    def decrby(self, key, amount):
+        return self.incrby(key, -amount)
+
+    def scan_iter(self, match="*"):
+        prefix = match.rstrip("*")
+        with self._lock:
+            keys = [k for k in self._data if k.startswith(prefix)]
+        return iter([k.encode() for k in keys])
+
+
+class RedisBackend:
+    """Redis 后端 - DECRBY 扣减，结果为负时 INCRBY 回滚（兼容 redis-py 客户端）"""
+
+    def __init__(self, client=None, prefix="inventory:"):
+        self.client = client if client is not None else LocalRedis()
+        self.prefix = prefix
+
+    def _key(self, item):
+        return f"{self.prefix}{item}"
+
+    def get(self, item):
+        value = self.client.get(self._key(item))
+        return None if value is None else int(value)
+
+    def set(self, item, qty):
+        self.client.set(self._key(item), qty)
+
+    def delete(self, item):
+        self.client.delete(self._key(item))
+
+    def items(self):
+        result = []
+        for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            item = key.decode()[len(self.prefix):]
+            result.append((item, self.get(item)))
+        return result
+
+    def try_reserve(self, item, qty):
+        key = self._key(item)
+        if not self.client.exists(key):
+            return None
+        remaining = self.client.decrby(key, qty)
+        if remaining < 0:
+            self.client.incrby(key, qty)
+            return False
+        return remaining
+
+    def release(self, item, qty):
+        return self.client.incrby(self._key(item), qty)
+
+
+class ShardedInventoryStore:
+    """分片库存：按商品哈希选择分片锁，扣减在分片锁内完成"""
+
+    def __init__(self, initial=None, backend=None, shards=16):
+        """
+        :param initial: 初始库存 {item: qty}
+        :param backend: 存储后端，默认 MemoryBackend
+        :param shards: 分片（锁）数量
+        """
+        self.backend = backend if backend is not None else MemoryBackend()
+        self._locks = [threading.Lock() for _ in range(shards)]
+        for item, qty in (initial or {}).items():
+            self.set(item, qty)
+
+    def _lock_for(self, item):
+        return self._locks[hash(item) % len(self._locks)]
+
+    def try_reserve(self, item, qty):
+        """
+        原子扣减库存
+        :return: (True, 剩余库存) 或 (False, 错误信息)
+        """
+        with self._lock_for(item):
+            remaining = self.backend.try_reserve(item, qty)
+        if remaining is None:
+            return False, "商品不存在"
+        if remaining is False:
+            return False, "库存不足"
+        return True, remaining
+
+    def release(self, item, qty):
+        """归还库存（后续步骤失败时回滚），返回归还后的库存"""
+        with self._lock_for(item):
+            return self.backend.release(item, qty)
+
+    def get(self, item, default=None):
+        with self._lock_for(item):
+            stock = self.backend.get(item)
+        return default if stock is None else stock
+
+    def set(self, item, qty):
+        with self._lock_for(item):
+            self.backend.set(item, qty)
+
+    def snapshot(self):
+        """返回所有商品的库存字典"""
+        return dict(self.backend.items())
+
+    # 兼容原来直接使用字典的代码：inventory["book"] / "book" in inventory
+    def __getitem__(self, item):
+        stock = self.get(item)
+        if stock is None:
+            raise KeyError(item)
+        return stock
+
+    def __setitem__(self, item, qty):
+        self.set(item, qty)
+
+    def __contains__(self, item):
+        return self.get(item) is not None
@@ -0,0 +1,116 @@
+"""
+登录限流 - 按 IP 和用户名的令牌桶，防止撞库/暴力破解占满工作线程
+- 每个键一个令牌桶：容量 capacity，每秒补充 rate 个，每次请求消耗 1 个
+- 桶放在 OrderedDict 中按最近使用排序，键数超过上限时淘汰最久未用的桶，内存有界，每次操作 O(1)
+  （被淘汰的桶再次出现时按满桶处理，等价于该键很久没有请求）
+- 作为 Flask before_request 钩子运行：超限时直接返回 429 和 Retry-After，不进入视图函数，不查库也不算哈希
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketTable:
+    """一组令牌桶，键为 IP / 用户名"""
+
+    def __init__(self, capacity, rate, max_keys=100000):
+        """
+        :param capacity: 桶容量（允许的突发请求数）
+        :param rate: 每秒补充的令牌数（长期允许的平均速率）
+        :param max_keys: 最多保留的桶数
+        """
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # {key: [令牌数, 上次更新时间]}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def take(self, key, now=None, cost=1):
+        """
+        尝试消耗令牌
+        :return: (是否允许, 需要等待的秒数)
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.capacity, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                self.allowed += 1
+                return True, 0.0
+            self.rejected += 1
+            return False, (cost - bucket[0]) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def stats(self):
+        return {"keys": len(self._buckets), "allowed": self.allowed,
+                "rejected": self.rejected, "evictions": self.evictions}
+
+
+class LoginRateLimiter:
+    """登录接口限流：同时检查 IP 桶和用户名桶，任一超限即拒绝"""
+
+    def __init__(self, paths=("/login",), per_ip=(30, 5.0), per_username=(10, 0.5), max_keys=100000):
+        """
+        :param paths: 需要限流的路径
+        :param per_ip: IP 桶的 (容量, 每秒补充数)
+        :param per_username: 用户名桶的 (容量, 每秒补充数)
+        :param max_keys: 每种桶最多保留的键数
+        """
+        self.paths = set(paths)
+        self.by_ip = TokenBucketTable(*per_ip, max_keys=max_keys)
+        self.by_username = TokenBucketTable(*per_username, max_keys=max_keys)
+
+    def check(self, ip, username=None, now=None):
+        """
+        :return: 允许时返回 None，否则返回需要等待的秒数
+        注意先检查 IP 再检查用户名：同一 IP 换用户名撞库时只消耗 IP 桶
+        """
+        ok, wait = self.by_ip.take(ip, now)
+        if not ok:
+            return wait
+        if username:
+            ok, wait = self.by_username.take(username, now)
+            if not ok:
+                return wait
+        return None
+
+    def init_app(self, app):
+        """注册为 Flask 的 before_request 钩子（app.config["RATELIMIT_ENABLED"] = False 时不限流）"""
+        from flask import current_app, jsonify, request
+
+        @app.before_request
+        def _rate_limit():
+            if request.method != "POST" or request.path not in self.paths:
+                return None
+            if not current_app.config.get("RATELIMIT_ENABLED", True):
+                return None
+            data = request.get_json(silent=True)
+            username = data.get("username") if isinstance(data, dict) else None
+            username = username.strip() if isinstance(username, str) else None
+            wait = self.check(request.remote_addr or "-", username)
+            if wait is None:
+                return None
+            response = jsonify({"status": "error", "message": "请求过于频繁，请稍后再试"})
+            response.status_code = 429
+            response.headers["Retry-After"] = str(max(1, math.ceil(wait)))
+            return response
+
+        return self
+
+    def stats(self):
+        return {"ip": self.by_ip.stats(), "username": self.by_username.stats()}
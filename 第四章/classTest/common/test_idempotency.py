@@ -0,0 +1,119 @@
+"""幂等键测试"""
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify, request
+
+from common.idempotency import (
+    CachedResponse, IdempotencyConflict, IdempotencyStore, idempotent, request_fingerprint
+)
+from common.inventory_store import ShardedInventoryStore
+
+
+def ok(body=b"{}", status=200):
+    return lambda: CachedResponse(status, body, "application/json", None)
+
+
+def test_replay_and_conflict():
+    """测试1: 相同键直接返回缓存；相同键不同内容报冲突"""
+    store = IdempotencyStore()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return CachedResponse(200, b'{"n": 1}', "application/json", None)
+
+    assert store.execute("k1", "f1", compute)[1] is False
+    response, replayed = store.execute("k1", "f1", compute)
+    assert replayed and response.body == b'{"n": 1}' and len(calls) == 1
+    with pytest.raises(IdempotencyConflict):
+        store.execute("k1", "f2", compute)
+    assert store.stats()["hits"] == 1 and store.stats()["misses"] == 1
+
+
+def test_bounded_and_ttl():
+    """测试2: 超过条数/字节数上限按最久未使用淘汰，过期条目重新执行"""
+    store = IdempotencyStore(max_entries=3, max_bytes=10**6, ttl=0.05)
+    for i in range(5):
+        store.execute(f"k{i}", "f", ok())
+    assert len(store) == 3 and store.stats()["evictions"] == 2
+    assert store.stats()["bytes"] == sum(e.size for e in store._entries.values())
+
+    small = IdempotencyStore(max_bytes=2000)
+    for i in range(10):
+        small.execute(f"k{i}", "f", ok(b"x" * 500))
+    assert small.bytes <= 2000
+
+    time.sleep(0.06)
+    assert store.execute("k4", "f", ok())[1] is False
+    assert store.purge_expired() == 2
+
+
+def test_inflight_coalescing():
+    """测试3: 并发的重复请求只执行一次，其余等待并共享结果"""
+    store = IdempotencyStore()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return CachedResponse(200, b"done", "text/plain", None)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.execute("k", "f", slow)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r[0].body == b"done" for r in results)
+    assert sum(1 for r in results if r[1]) == 7
+    assert store.stats()["hit_rate"] == pytest.approx(7 / 8)
+
+
+def test_errors_not_cached():
+    """测试4: 5xx 响应与异常都不缓存，同一个键可以重试"""
+    store = IdempotencyStore()
+    assert store.execute("k", "f", ok(status=503))[0].status == 503
+    assert store.execute("k", "f", ok())[1] is False
+
+    def boom():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        store.execute("k2", "f", boom)
+    assert store.execute("k2", "f", ok())[1] is False
+
+
+def test_flask_order_retry_deducts_once():
+    """测试5: Flask 下单接口带相同幂等键重试只扣一次库存"""
+    app = Flask(__name__)
+    inventory = ShardedInventoryStore({"book": 10})
+    store = IdempotencyStore()
+
+    @app.route("/order", methods=["POST"])
+    @idempotent(store)
+    def order():
+        ok, result = inventory.try_reserve(request.json["item"], request.json["qty"])
+        if not ok:
+            return jsonify({"error": result}), 400
+        return jsonify({"remaining": result})
+
+    client = app.test_client()
+    headers = {"Idempotency-Key": "order-1"}
+    first = client.post("/order", json={"item": "book", "qty": 3}, headers=headers)
+    retry = client.post("/order", json={"item": "book", "qty": 3}, headers=headers)
+    assert first.json == retry.json == {"remaining": 7}
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert inventory["book"] == 7
+
+    assert client.post("/order", json={"item": "book", "qty": 1}, headers=headers).status_code == 422
+    client.post("/order", json={"item": "book", "qty": 1})
+    client.post("/order", json={"item": "book", "qty": 1})
+    assert inventory["book"] == 5
+    assert request_fingerprint("POST", "/a", b"1") != request_fingerprint("POST", "/a1", b"")
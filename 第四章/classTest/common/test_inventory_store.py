@@ -0,0 +1,52 @@
+"""分片库存存储测试"""
+import threading
+
+import pytest
+
+from common.inventory_store import (
+    LocalRedis, MemoryBackend, RedisBackend, SQLiteBackend, ShardedInventoryStore
+)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    """三种后端分别测试"""
+    if request.param == "memory":
+        return MemoryBackend()
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "inventory.db"))
+    return RedisBackend(LocalRedis())
+
+
+def test_reserve_and_release(backend):
+    """测试1: 扣减、库存不足、商品不存在、归还"""
+    store = ShardedInventoryStore({"book": 5}, backend=backend, shards=4)
+    assert store.try_reserve("book", 2) == (True, 3)
+    assert store.try_reserve("book", 4) == (False, "库存不足")
+    assert store.try_reserve("car", 1) == (False, "商品不存在")
+    assert store.release("book", 2) == 5
+    assert store["book"] == 5 and "book" in store and "car" not in store
+    assert store.snapshot() == {"book": 5}
+
+
+def test_concurrent_reserve_never_oversells(backend):
+    """测试2: 多线程并发扣减多个商品，成功次数等于初始库存"""
+    items = [f"sku{i}" for i in range(8)]
+    store = ShardedInventoryStore({item: 50 for item in items}, backend=backend, shards=4)
+    success = []
+
+    def worker(n):
+        count = 0
+        for i in range(100):
+            ok, _ = store.try_reserve(items[(n + i) % len(items)], 1)
+            count += ok
+        success.append(count)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(success) == 50 * len(items)
+    assert all(stock == 0 for stock in store.snapshot().values())
@@ -0,0 +1,60 @@
+"""登录限流测试"""
+from flask import Flask, jsonify
+
+from common.rate_limit import LoginRateLimiter, TokenBucketTable
+
+
+def test_token_bucket_refill():
+    """测试1: 容量用完后拒绝，并给出等待时间；按速率补充"""
+    table = TokenBucketTable(capacity=3, rate=2.0)
+    assert all(table.take("ip", now=0)[0] for _ in range(3))
+    ok, wait = table.take("ip", now=0)
+    assert not ok and wait == 0.5
+    assert table.take("ip", now=0.5)[0]
+    assert not table.take("ip", now=0.5)[0]
+    assert table.take("other", now=0.5)[0]
+    assert table.stats()["rejected"] == 2
+
+
+def test_bounded_keys():
+    """测试2: 键数超过上限淘汰最久未用的桶"""
+    table = TokenBucketTable(capacity=1, rate=0.001, max_keys=100)
+    table.take("hot", now=0)
+    for i in range(1000):
+        table.take("hot", now=i)
+        table.take(f"ip{i}", now=i)
+    assert len(table) == 100 and table.stats()["evictions"] == 901
+    assert "hot" in table._buckets
+
+
+def test_ip_and_username():
+    """测试3: 同一用户名换 IP 仍受用户名桶限制；同一 IP 换用户名受 IP 桶限制"""
+    limiter = LoginRateLimiter(per_ip=(5, 1.0), per_username=(2, 1.0))
+    assert limiter.check("1.1.1.1", "admin", now=0) is None
+    assert limiter.check("2.2.2.2", "admin", now=0) is None
+    assert limiter.check("3.3.3.3", "admin", now=0) == 1.0
+    results = [limiter.check("9.9.9.9", f"user{i}", now=0) for i in range(6)]
+    assert results[:5] == [None] * 5 and results[5] == 1.0
+
+
+def test_flask_429_before_handler():
+    """测试4: 超限请求返回 429 + Retry-After，不进入视图函数"""
+    app = Flask(__name__)
+    calls = []
+
+    @app.route("/login", methods=["POST"])
+    def login():
+        calls.append(1)
+        return jsonify({"status": "error"}), 400
+
+    LoginRateLimiter(per_ip=(100, 1.0), per_username=(3, 0.1)).init_app(app)
+    client = app.test_client()
+    codes = [client.post("/login", json={"username": "admin", "password": "x"}).status_code
+             for _ in range(5)]
+    assert codes == [400, 400, 400, 429, 429] and len(calls) == 3
+    response = client.post("/login", json={"username": " admin ", "password": "x"})
+    assert response.status_code == 429 and response.headers["Retry-After"] == "10"
+    assert client.post("/login", json={"username": "user", "password": "x"}).status_code == 400
+    assert client.get("/login").status_code == 405
+    app.config["RATELIMIT_ENABLED"] = False
+    assert client.post("/login", json={"username": "admin", "password": "x"}).status_code == 400
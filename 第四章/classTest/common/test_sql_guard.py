@@ -0,0 +1,95 @@
+"""SQL注入请求检查测试"""
+import re
+
+from flask import Flask, jsonify
+
+from common.sql_guard import PATTERNS, AhoCorasick, SQLGuard, normalize
+
+
+def test_automaton_matches_naive_search():
+    """测试1: 自动机结果与逐个 find 一致（含重叠的特征串）"""
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    assert sorted(automaton.patterns[i] for i in automaton.search("ushers")) == ["he", "hers", "she"]
+
+    automaton = AhoCorasick(PATTERNS)
+    text = normalize("x' OR 1=1 -- ; union select sqlite_master, 'a'='a' and drop table users")
+    expected = sorted(p for p in automaton.patterns for _ in re.finditer(f"(?={re.escape(p)})", text))
+    assert sorted(automaton.patterns[i] for i in automaton.search(text)) == expected
+
+
+def test_normalize_and_scan():
+    """测试2: 编码、大小写、注释空白等变形都能识别；正常输入不误报"""
+    guard = SQLGuard()
+    attacks = ["' OR '1'='1", "admin'--", "admin' --", "%27%20OR%201%3D1--", "%27%2f%2a%2a%2fOR%201%3D1",
+               "＇ OR ＇1＇＝＇1", "'/**/UnIoN/**/SeLeCt/**/NULL--", "x');\tDROP TABLE users",
+               "' || load_extension('x') || '"]
+    for value in attacks:
+        assert guard.scan(value), value
+    for value in ["admin", "admin123", "O'Brien", "p@ss;word#1", "hello world", "李雷", "a-b_c.d@e.com"]:
+        assert guard.scan(value) == [], value
+
+
+def test_flask_block_and_flag():
+    """测试3: block 模式返回 403 且不进入视图函数；flag 模式只计数"""
+    app = Flask(__name__)
+    calls = []
+
+    @app.route("/login", methods=["POST"])
+    def login():
+        calls.append(1)
+        return jsonify({"status": "success"})
+
+    guard = SQLGuard(paths=["/login"]).init_app(app)
+    client = app.test_client()
+    response = client.post("/login", json={"username": "admin' --", "password": "x"})
+    assert response.status_code == 403 and "username" in response.json["message"]
+    assert client.post("/login?next=' or 1=1", json={"username": "a", "password": "b"}).status_code == 403
+    assert client.post("/login", data={"username": "admin", "password": "pass123"}).status_code == 200
+    assert len(calls) == 1 and guard.stats()["flagged"] == 2
+
+    guard.mode = "flag"
+    assert client.post("/login", json={"username": "admin' --", "password": "x"}).status_code == 200
+    assert guard.stats() == {"checked": 4, "flagged": 3, "mode": "flag"}
+
+
+def test_nested_json_values():
+    """测试4: JSON 中嵌套的列表、字典键值和非字符串值同样检查"""
+    app = Flask(__name__)
+
+    @app.route("/login", methods=["POST"])
+    def login():
+        return jsonify({"status": "success"})
+
+    SQLGuard(paths=["/login"]).init_app(app)
+    client = app.test_client()
+    for body in ({"username": ["' or 1=1 --"], "password": "x"},
+                 {"username": {"' or 1=1 --": 1}, "password": "x"},
+                 {"username": {"a": [{"b": "x' union select null--"}]}},
+                 ["' or 1=1 --"]):
+        response = client.post("/login", json=body)
+        assert response.status_code == 403, body
+    response = client.post("/login", json={"username": ["admin"], "age": 18, "remember": True, "x": None})
+    assert response.status_code == 200
+    assert SQLGuard().inspect([("u", {"k": ["ok", "' or 1=1 --"]})])[0] == "u.k[1]"
+
+
+def test_breakout_without_spaces():
+    """测试5: 引号后不带空格、带括号或注释的闭合同样拦截；URL 只解码一次，%25 不误报"""
+    guard = SQLGuard()
+    for value in ["x'or'a'<'b", "'or(1)or'", "x'OR(1)--", "admin'and'1'='1", "'union(select 1)",
+                  "')or(1)--", "'/*x*/or 1", "'\tOR\t1", "\"or\"1"]:
+        assert guard.scan(value), value
+    for value in ["O'Brien", "orange'order", "it's 'android'", "100%2527", "50%25 off", "%2527%2520or%25201%253D1"]:
+        assert guard.scan(value) == [], value
+    assert normalize("100%2527") == "100%27"
+
+    app = Flask(__name__)
+
+    @app.route("/login", methods=["POST"])
+    def login():
+        return jsonify({"status": "success"})
+
+    SQLGuard(paths=["/login"]).init_app(app)
+    client = app.test_client()
+    for username in ["x'or'a'<'b", "'or(1)or'", "x'OR(1)--"]:
+        assert client.post("/login", json={"username": username, "password": "x"}).status_code == 403, username